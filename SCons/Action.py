@@ -102,12 +102,15 @@ way for wrapping up the functions.
 
 from __future__ import annotations
 
+import concurrent.futures
 import inspect
+import multiprocessing
 import os
 import pickle
 import re
 import subprocess
 import sys
+import threading
 from abc import ABC, abstractmethod
 from collections import OrderedDict
 from subprocess import DEVNULL, PIPE
@@ -137,6 +140,55 @@ print_actions_presub = False
 # ACTION_SIGNATURE_PICKLE_PROTOCOL = 4
 
 
+# The pool of worker processes that runs FunctionActions created with
+# process_pool=True, if enabled (``--experimental=process_pool``).
+# Set up and shut down by SCons.Taskmaster.Job.Jobs.
+process_pool = None
+
+
+class ProcessPool:
+    """A lazily started pool of worker processes for Python function actions.
+
+    Python functions hold the GIL while they run, so in a parallel build
+    they serialize no matter how many jobs are allowed.  Actions which
+    opt in (``Action(func, process_pool=True)``) are instead sent to a
+    worker process from this pool, while the job thread waits for the
+    result.  The processes are only started when the first such action
+    actually runs.  The ``spawn`` start method is used, as forking a
+    process that is running threads is not safe.
+    """
+
+    def __init__(self, num) -> None:
+        self.num = num
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def submit(self, func, *args) -> concurrent.futures.Future:
+        with self.lock:
+            if self.executor is None:
+                self.executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.num,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+        return self.executor.submit(func, *args)
+
+    def shutdown(self) -> None:
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+
+def _call_portable(call):
+    """Call a function action in a worker process.
+
+    *call* is the function and its arguments, pickled once by
+    :meth:`FunctionAction.execute_portable`.
+    """
+    execfunction, target, source, env = pickle.loads(call)
+    return execfunction(target=target, source=source, env=env)
+
+
 def rfile(n):
     try:
         return n.rfile()
@@ -144,6 +196,13 @@ def rfile(n):
         return n
 
 
+def _node_abspath(n) -> str:
+    try:
+        return n.get_abspath()
+    except AttributeError:
+        return os.path.abspath(str(n))
+
+
 def default_exitstatfunc(s):
     return s
 
@@ -1353,12 +1412,21 @@ class LazyAction(CommandGeneratorAction, CommandAction):
 
 
 class FunctionAction(_ActionAction):
-    """Class for Python function actions."""
+    """Class for Python function actions.
+
+    If created with ``process_pool=True``, the function is called with
+    portable arguments: *target* and *source* are lists of absolute path
+    strings, and *env* is a plain dict of the construction variables named
+    in the action's *varlist*.  When a :class:`ProcessPool` is active and
+    the function and those values can be pickled, the call is made in a
+    worker process; otherwise it is made in the calling thread.
+    """
 
     def __init__(self, execfunction, kw) -> None:
         if SCons.Debug.track_instances: logInstanceCreation(self, 'Action.FunctionAction')
 
         self.execfunction = execfunction
+        self.portable = kw.pop('process_pool', False)
         try:
             self.funccontents = _callable_contents(execfunction)
         except AttributeError:
@@ -1429,7 +1497,10 @@ class FunctionAction(_ActionAction):
                 source = executor.get_all_sources()
             rsources = list(map(rfile, source))
             try:
-                result = self.execfunction(target=target, source=rsources, env=env)
+                if self.portable:
+                    result = self.execute_portable(target, rsources, env)
+                else:
+                    result = self.execfunction(target=target, source=rsources, env=env)
             except (KeyboardInterrupt, SystemExit):
                 raise
             except Exception as e:
@@ -1452,6 +1523,27 @@ class FunctionAction(_ActionAction):
             # more information about this issue.
             del exc_info
 
+    def execute_portable(self, target, source, env):
+        """Call the function with portable arguments.
+
+        Uses the process pool if there is one and everything the worker
+        needs can be pickled, else falls back to calling it directly.
+        """
+        target = [_node_abspath(t) for t in target]
+        source = [_node_abspath(s) for s in source]
+        env = {k: env.get(k) for k in self.varlist}
+        pool = process_pool
+        if pool is not None:
+            # Pickle the call here, so what can't be pickled is found
+            # before submitting it, and the pool only passes on bytes.
+            try:
+                call = pickle.dumps((self.execfunction, target, source, env))
+            except Exception:
+                pass
+            else:
+                return pool.submit(_call_portable, call).result()
+        return self.execfunction(target=target, source=source, env=env)
+
     def get_presig(self, target, source, env, executor: Executor | None = None):
         """Return the signature contents of this callable action."""
         try:
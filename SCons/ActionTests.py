@@ -1601,6 +1601,26 @@ class CommandGeneratorActionTestCase(unittest.TestCase):
             self.assertIn(c, matches_foo)
 
 
+def pool_function(target, source, env) -> int:
+    """Function action for the process pool tests; must be picklable."""
+    for t in target:
+        with open(t, 'w') as f:
+            f.write("%s %s %d\n" % (env['TEXT'], ' '.join(source), os.getpid()))
+    return 0
+
+
+class PickleCount:
+    """A value for the process pool tests which counts its picklings."""
+    count = 0
+
+    def __init__(self, text) -> None:
+        self.text = text
+
+    def __reduce__(self):
+        PickleCount.count += 1
+        return (str, (self.text,))
+
+
 class FunctionActionTestCase(unittest.TestCase):
 
     def test___init__(self) -> None:
@@ -1626,6 +1646,49 @@ class FunctionActionTestCase(unittest.TestCase):
         assert a.execfunction == func2, a.execfunction
         assert a.strfunction == func3, a.strfunction
 
+    def test_execute_process_pool(self) -> None:
+        """Test executing function Actions that opt in to a process pool"""
+        env = Environment(TEXT='pooled', OTHER='unused')
+        src = test.workpath('src')
+
+        act = SCons.Action.Action(pool_function, varlist=['TEXT'], process_pool=True)
+        assert act.portable, act
+        assert not SCons.Action.Action(pool_function).portable
+
+        # No pool active: called in this process, with portable arguments.
+        r = act([outfile], [src], env)
+        assert r == 0, r
+        c = test.read(outfile, 'r')
+        assert c == "pooled %s %d\n" % (src, os.getpid()), c
+
+        # A lambda can't be pickled, so it stays in this process too.
+        seen = []
+        lam = SCons.Action.Action(lambda target, source, env: seen.append(env),
+                                  varlist=['TEXT'], process_pool=True)
+        SCons.Action.process_pool = SCons.Action.ProcessPool(2)
+        try:
+            r = lam([outfile], [src], env)
+            assert not r, r
+            assert seen == [{'TEXT': 'pooled'}], seen
+            assert SCons.Action.process_pool.executor is None
+
+            r = act([outfile2], [src], env)
+            assert r == 0, r
+            c = test.read(outfile2, 'r')
+            assert c.startswith("pooled %s " % src), c
+            assert c != "pooled %s %d\n" % (src, os.getpid()), c
+
+            # The call is pickled once, not checked and then pickled again.
+            PickleCount.count = 0
+            r = act([outfile2], [src], Environment(TEXT=PickleCount('counted')))
+            assert r == 0, r
+            c = test.read(outfile2, 'r')
+            assert c.startswith("counted %s " % src), c
+            assert PickleCount.count == 1, PickleCount.count
+        finally:
+            SCons.Action.process_pool.shutdown()
+            SCons.Action.process_pool = None
+
     def test___str__(self) -> None:
         """Test the __str__() method for function Actions."""
 
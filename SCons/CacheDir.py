@@ -31,7 +31,11 @@ import shutil
 import stat
 import sys
 import tempfile
+import threading
+import time
 import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 import SCons.Action
 import SCons.Errors
@@ -43,6 +47,34 @@ CACHE_TAG = (
     b"Signature: 8a477f597d28d172789f06886806bc55\n"
     b"# SCons cache directory - see https://bford.info/cachedir/\n"
 )
+CACHE_INDEX = 'index'  # access index of a size-limited cache
+CACHE_EVICT_TO = 0.9  # fraction of the size limit eviction leaves in use
+CACHE_EVICT_STALE = 600  # seconds after which an eviction lock is stale
+CACHE_ENTRY_MAGIC = b"\0SCons cache entry:"  # starts a compressed entry
+CACHE_CHUNKSIZE = 1024 * 1024
+
+# Codecs for compressed cache entries: the name recorded in the config
+# and in each entry, mapped to compressor and decompressor factories.
+# The objects made have the methods of zlib's compressobj/decompressobj.
+CACHE_CODECS = {'zlib': (zlib.compressobj, zlib.decompressobj)}
+try:
+    from compression import zstd  # Python 3.14+
+    CACHE_CODECS['zstd'] = (zstd.ZstdCompressor, zstd.ZstdDecompressor)
+except ImportError:
+    try:
+        import zstandard
+        CACHE_CODECS['zstd'] = (
+            lambda: zstandard.ZstdCompressor().compressobj(),
+            lambda: zstandard.ZstdDecompressor().decompressobj(),
+        )
+    except ImportError:
+        pass
+CACHE_DEFAULT_CODEC = 'zstd' if 'zstd' in CACHE_CODECS else 'zlib'
+
+# How files are put in and taken out of the cache: always copied, or
+# cloned if the filesystem supports it, or also hard linked.
+CACHE_LINK_MODES = ('copy', 'reflink', 'hardlink')
+FICLONE = 0x40049409  # ioctl from linux/fs.h
 
 cache_enabled = True
 cache_debug = False
@@ -51,35 +83,157 @@ cache_show = False
 cache_readonly = False
 cache_tmp_uuid = uuid.uuid4().hex
 
+# Workers for the cache writes done in the background: copying entries
+# found in a shared tier into the local tier, and compressing pushes.
+_writer = None
+_writer_lock = threading.Lock()
+
+def _writes() -> ThreadPoolExecutor:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+        return _writer
+
+def wait_for_writes() -> None:
+    """Wait until the pending background writes to caches are done."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.shutdown(wait=True)
+
+def _write_tempfile(cachefile) -> str:
+    """Return a temporary name for writing *cachefile* in this thread."""
+    return "%s.tmp%s.%d" % (cachefile, cache_tmp_uuid, threading.get_ident())
+
+def entry_codec(cachefile):
+    """Return the codec a cache entry is compressed with.
+
+    Returns ``None`` for an entry which is not compressed.
+    """
+    try:
+        with open(cachefile, 'rb') as f:
+            head = f.read(len(CACHE_ENTRY_MAGIC) + 16)
+    except OSError:
+        return None
+    if not head.startswith(CACHE_ENTRY_MAGIC):
+        return None
+    name, sep, _ = head[len(CACHE_ENTRY_MAGIC):].partition(b"\n")
+    return name.decode('ascii', 'replace') if sep else None
+
+def read_entry(cachefile):
+    """Yield the contents of a cache entry, decompressed, in chunks."""
+    with open(cachefile, 'rb') as f:
+        head = f.read(len(CACHE_ENTRY_MAGIC))
+        if head != CACHE_ENTRY_MAGIC:
+            yield head
+            yield from iter(lambda: f.read(CACHE_CHUNKSIZE), b'')
+            return
+        codec = f.readline()[:-1].decode('ascii', 'replace')
+        try:
+            decompressor = CACHE_CODECS[codec][1]()
+        except KeyError:
+            raise OSError("Unknown codec %s of cache entry %s" % (codec, cachefile))
+        for chunk in iter(lambda: f.read(CACHE_CHUNKSIZE), b''):
+            yield decompressor.decompress(chunk)
+        flush = getattr(decompressor, 'flush', None)
+        if flush:
+            yield flush()
+
+def reflink(src, dst) -> bool:
+    """Make *dst* a copy-on-write clone of *src*.
+
+    Returns ``False``, leaving no *dst*, if the platform or filesystem
+    cannot clone files or *src* and *dst* are on different filesystems.
+    """
+    if not sys.platform.startswith('linux'):
+        return False
+    import fcntl  # pylint: disable=import-outside-toplevel
+    try:
+        with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+            fcntl.ioctl(fout.fileno(), FICLONE, fin.fileno())
+    except OSError:
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+        return False
+    return True
+
+def running_as_root() -> bool:
+    """Return whether this process can write to read-only files."""
+    return hasattr(os, 'geteuid') and os.geteuid() == 0
+
+def _retrieve_entry(tier, env, t, cachefile):
+    """Put the entry *cachefile* of cache *tier* in place as target *t*.
+
+    Returns ``'reflink'`` or ``'hardlink'`` if the entry was linked,
+    else ``None``.  Raises :exc:`FileNotFoundError` if the entry is gone,
+    evicted by another build since it was looked up.
+    """
+    fs = t.fs
+    linked = None
+    if fs.islink(cachefile):
+        fs.symlink(fs.readlink(cachefile), t.get_internal_path())
+    else:
+        linked = tier.link_from_cache(env, cachefile, t)
+        if not linked:
+            tier.copy_from_cache(env, cachefile, t.get_internal_path())
+        if linked != 'hardlink':
+            # A hard link would change the times of the target too.
+            try:
+                os.utime(cachefile, None)
+            except OSError:
+                pass
+    st = fs.stat(cachefile)
+    if linked != 'hardlink':
+        # A hard linked target stays read-only, like the cache entry.
+        fs.chmod(t.get_internal_path(), stat.S_IMODE(st.st_mode) | stat.S_IWRITE)
+    tier.record(cachefile, st.st_size)
+    return linked
+
 def CacheRetrieveFunc(target, source, env) -> int:
     t = target[0]
-    fs = t.fs
     cd = env.get_CacheDir()
     cd.requests += 1
-    cachedir, cachefile = cd.cachepath(t)
-    if not fs.exists(cachefile):
-        cd.CacheDebug('CacheRetrieve(%s):  %s not in cache\n', t, cachefile)
+    if t.cached:
+        # Retrieved before the build started, see prefetch().
+        cd.hits += 1
+        tier, cachefile = cd.lookup(t)
+        if tier is cd:
+            cd.CacheDebug('CacheRetrieve(%s):  retrieving from %s\n', t, cachefile)
+        else:
+            cd.CacheDebug('CacheRetrieve(%s):  retrieving from %s in shared cache\n', t, cachefile)
+        return 0
+    tier, cachefile = cd._located.pop(t, None) or cd.lookup(t)
+    if tier is None:
+        cd.CacheDebug('CacheRetrieve(%s):  %s not in cache\n', t, cd.cachepath(t)[1])
         return 1
     cd.hits += 1
-    cd.CacheDebug('CacheRetrieve(%s):  retrieving from %s\n', t, cachefile)
+    if tier is cd:
+        cd.CacheDebug('CacheRetrieve(%s):  retrieving from %s\n', t, cachefile)
+    else:
+        cd.CacheDebug('CacheRetrieve(%s):  retrieving from %s in shared cache\n', t, cachefile)
     if SCons.Action.execute_actions:
-        if fs.islink(cachefile):
-            fs.symlink(fs.readlink(cachefile), t.get_internal_path())
-        else:
-            cd.copy_from_cache(env, cachefile, t.get_internal_path())
-            try:
-                os.utime(cachefile, None)
-            except OSError:
-                pass
-        st = fs.stat(cachefile)
-        fs.chmod(t.get_internal_path(), stat.S_IMODE(st.st_mode) | stat.S_IWRITE)
+        try:
+            linked = _retrieve_entry(tier, env, t, cachefile)
+        except FileNotFoundError:
+            cd.hits -= 1
+            cd.CacheDebug('CacheRetrieve(%s):  %s not in cache\n', t, cachefile)
+            return 1
+        if linked:
+            cd.CacheDebug('CacheRetrieve(%s):  ' + linked + ' from %s\n', t, cachefile)
+        if tier is not cd:
+            cd.promote(t, cachefile)
     return 0
 
 def CacheRetrieveString(target, source, env) -> str:
     t = target[0]
     cd = env.get_CacheDir()
-    cachedir, cachefile = cd.cachepath(t)
-    if t.fs.exists(cachefile):
+    # Remembered for CacheRetrieveFunc, so a shared tier is probed once.
+    tier, cachefile = cd._located[t] = cd.lookup(t)
+    if tier is not None:
         return "Retrieved `%s' from cache" % t.get_internal_path()
     return ""
 
@@ -94,9 +248,16 @@ def CachePushFunc(target, source, env) -> None:
     t = target[0]
     if t.nocache:
         return
-    fs = t.fs
     cd = env.get_CacheDir()
-    cachedir, cachefile = cd.cachepath(t)
+    for tier in cd.tiers():
+        if not tier.is_readonly():
+            _push_to_tier(cd, tier, target, env)
+
+def _push_to_tier(cd, tier, target, env) -> None:
+    """Push *target* into cache *tier* of the CacheDir *cd*."""
+    t = target[0]
+    fs = t.fs
+    cachedir, cachefile = tier.cachepath(t)
     if fs.exists(cachefile):
         # Don't bother copying it if it's already there.  Note that
         # usually this "shouldn't happen" because if the file already
@@ -108,6 +269,16 @@ def CachePushFunc(target, source, env) -> None:
         cd.CacheDebug('CachePush(%s):  %s already exists in cache\n', t, cachefile)
         return
 
+    size = tier.entry_size(t.get_internal_path())
+    if not tier.reserve(size):
+        cd.CacheDebug('CachePush(%s):  %s is larger than the cache\n', t, cachefile)
+        return
+
+    if tier.codec and not fs.islink(t.get_internal_path()):
+        cd.CacheDebug('CachePush(%s):  compressing to %s\n', t, cachefile)
+        tier.push_compressed(env, t.get_internal_path(), cachedir, cachefile, size)
+        return
+
     cd.CacheDebug('CachePush(%s):  pushing to %s\n', t, cachefile)
 
     tempfile = "%s.tmp%s"%(cachefile,cache_tmp_uuid)
@@ -116,16 +287,19 @@ def CachePushFunc(target, source, env) -> None:
     try:
         fs.makedirs(cachedir, exist_ok=True)
     except OSError:
+        tier.reserve(-size)
         msg = errfmt % (str(target), cachefile)
         raise SCons.Errors.SConsEnvironmentError(msg)
     try:
         if fs.islink(t.get_internal_path()):
             fs.symlink(fs.readlink(t.get_internal_path()), tempfile)
-        else:
-            cd.copy_to_cache(env, t.get_internal_path(), tempfile)
+        elif not tier.link_to_cache(env, t, tempfile):
+            tier.copy_to_cache(env, t.get_internal_path(), tempfile)
         fs.rename(tempfile, cachefile)
+        tier.record(cachefile, size)
 
     except OSError:
+        tier.reserve(-size)
         # It's possible someone else tried writing the file at the
         # same time we did, or else that there was some problem like
         # the CacheDir being on a separate file system that's full.
@@ -147,15 +321,89 @@ class CacheDir:
         is read from the config file in the supplied path if
         one exists,  if not the config file is created and
         the default config is written, as well as saved in the object.
+
+        *path* may also be a dict with the keys ``path``, ``readonly``
+        (only retrieve from this cache) and ``max_size`` (the size in
+        bytes the cache is kept under, stored in its config; ``0``
+        removes the limit), ``compress`` (true, or the name of a
+        codec in :data:`CACHE_CODECS`, to compress the entries pushed
+        from now on; the codec is stored in the config) and ``link``
+        (one of :data:`CACHE_LINK_MODES`, stored in the config), or a
+        list of such tiers for a layered cache.  The first tier in the list is
+        checked first on retrieval, the later ones, usually shared,
+        only when it misses; files found there are copied into the
+        first tier in the background.  Pushes go to all tiers which
+        are not read-only.
         """
         self.requests = 0
         self.hits = 0
-        self.path = path
         self.current_cache_debug = None
         self.debugFP = None
         self.config = {}
+        self.readonly = False
+        self.shared = None
+        self._size = None
+        self._size_lock = threading.RLock()
+        self._located = {}
+        # Where prefetch() found targets in the cache, or not.
+        self._prefetched = {}
+        if SCons.Util.is_List(path):
+            # A layered cache: this is the first tier, the rest are
+            # set up as the shared tier behind it.
+            tiers = list(path)
+            path = tiers.pop(0) if tiers else None
+            if tiers:
+                self.shared = type(self)(tiers if len(tiers) > 1 else tiers[0])
+        max_size = compress = link = None
+        if SCons.Util.is_Dict(path):
+            path, max_size, compress, link = self._parse_tier(path)
+        self.path = path
         if path is not None:
             self._readconfig(path)
+            if max_size is not None and max_size != self.max_size:
+                self._set_config('max_size', max_size)
+            if compress is True:
+                compress = CACHE_DEFAULT_CODEC
+            codec = self.codec or compress
+            if codec and codec not in CACHE_CODECS:
+                msg = "Cache %s is compressed with %s, which is not available" % (
+                    path, codec)
+                raise SCons.Errors.SConsEnvironmentError(msg)
+            if codec != self.codec:
+                self._set_config('codec', codec)
+            if link is not None and link != self.link:
+                self._set_config('link', link)
+
+    def _parse_tier(self, spec) -> tuple:
+        """Set up the tier settings from *spec*.
+
+        Returns the path, the size limit, the compression and the link
+        mode of the tier.
+        """
+        unknown = set(spec) - {'path', 'readonly', 'max_size', 'compress', 'link'}
+        if (unknown or 'path' not in spec
+                or spec.get('link', 'copy') not in CACHE_LINK_MODES):
+            msg = "Invalid cache tier %s" % repr(spec)
+            raise SCons.Errors.SConsEnvironmentError(msg)
+        self.readonly = bool(spec.get('readonly', False))
+        return (spec['path'], spec.get('max_size'), spec.get('compress'),
+                spec.get('link'))
+
+    def _set_config(self, key, value) -> None:
+        """Store *value* for *key* in the config file of this cache."""
+        config_file = os.path.join(self.path, 'config')
+        tempfile = "%s.tmp%s" % (config_file, cache_tmp_uuid)
+        try:
+            with SCons.Util.FileLock(config_file, timeout=5, writer=True):
+                with open(config_file) as config:
+                    self.config = json.load(config)
+                self.config[key] = value
+                with open(tempfile, 'w') as config:
+                    json.dump(self.config, config)
+                os.replace(tempfile, config_file)
+        except (OSError, ValueError, SCons.Util.SConsLockFailure) as e:
+            msg = "Failed to write cache configuration for " + self.path
+            raise SCons.Errors.SConsEnvironmentError(msg) from e
 
     def _add_config(self, path: str) -> None:
         """Create the cache config file in *path*.
@@ -288,7 +536,20 @@ class CacheDir:
 
     @classmethod
     def copy_from_cache(cls, env, src, dst) -> str:
-        """Copy a file from cache."""
+        """Copy a file from cache.
+
+        A compressed entry is decompressed as it is read, straight
+        into *dst*.
+        """
+        if entry_codec(src):
+            with open(dst, 'wb') as f:
+                for chunk in read_entry(src):
+                    f.write(chunk)
+            if env.cache_timestamp_newer:
+                shutil.copymode(src, dst)
+            else:
+                shutil.copystat(src, dst)
+            return dst
         if env.cache_timestamp_newer:
             return env.fs.copy(src, dst)
         else:
@@ -311,6 +572,27 @@ class CacheDir:
         except AttributeError as ex:
             raise OSError from ex
 
+    @classmethod
+    def compress_to_cache(cls, env, src, dst, codec) -> int:
+        """Copy a file to cache, compressing it with *codec*.
+
+        Like :meth:`copy_to_cache`, the metadata is copied too, and
+        the cachefile is made writeable.  Returns the size of the
+        compressed file.
+        """
+        compressor = CACHE_CODECS[codec][0]()
+        with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+            fout.write(CACHE_ENTRY_MAGIC + codec.encode('ascii') + b"\n")
+            for chunk in iter(lambda: fin.read(CACHE_CHUNKSIZE), b''):
+                fout.write(compressor.compress(chunk))
+            fout.write(compressor.flush())
+            size = fout.tell()
+        shutil.copystat(src, dst)
+        st = stat.S_IMODE(os.stat(dst).st_mode)
+        if not st & stat.S_IWRITE:
+            os.chmod(dst, st | stat.S_IWRITE)
+        return size
+
     @property
     def hit_ratio(self) -> float:
         return (100.0 * self.hits / self.requests if self.requests > 0 else 100)
@@ -323,11 +605,399 @@ class CacheDir:
         return cache_enabled and self.path is not None
 
     def is_readonly(self) -> bool:
-        return cache_readonly
+        return cache_readonly or self.readonly
+
+    def tiers(self):
+        """Yield the tiers of this cache, the local tier first."""
+        tier = self
+        while tier is not None:
+            yield tier
+            tier = tier.shared
+
+    def lookup(self, node) -> tuple:
+        """Find the cached copy of a file.
+
+        Return the first tier holding the cached copy of *node*,
+        checking the local tier first, and the path to it.  If the
+        file is not in the cache, return a tuple of None.
+        """
+        try:
+            return self._prefetched[node]
+        except KeyError:
+            pass
+        for tier in self.tiers():
+            cachedir, cachefile = tier.cachepath(node)
+            if cachefile and node.fs.exists(cachefile):
+                return tier, cachefile
+        return None, None
+
+    @staticmethod
+    def entry_size(path) -> int:
+        """Return the space the cache entry for *path* takes up."""
+        try:
+            return os.lstat(path).st_size
+        except OSError:
+            return 0
+
+    @property
+    def link(self) -> str:
+        """How files are put in and taken out of this cache."""
+        return self.config.get('link', 'copy')
+
+    def _can_hardlink(self, env, node) -> bool:
+        """Return whether *node* may share its file with a cache entry.
+
+        A hard linked target is read-only, so tools cannot modify it in
+        place, and SCons removes it before rebuilding it.  Precious
+        targets are not removed, and targets retrieved for the
+        timestamp-newer decider need a new timestamp, so those are
+        copied instead.  So are all targets on Windows, where
+        read-only files cannot be removed, and all targets when running
+        as root, which read-only files do not stop.
+        """
+        return (self.link == 'hardlink'
+                and os.name != 'nt'
+                and not node.precious
+                and not env.cache_timestamp_newer
+                and not running_as_root())
+
+    @staticmethod
+    def _make_readonly(path) -> None:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+        if mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH):
+            os.chmod(path, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+    def link_from_cache(self, env, src, node):
+        """Put the cache entry *src* in place for *node* without copying.
+
+        Depending on the link mode of the cache, clones the entry, or
+        failing that hard links it (see :meth:`_can_hardlink`).
+        Returns ``'reflink'`` or ``'hardlink'`` for what was done,
+        ``None`` if the file should be copied.  Compressed entries are
+        always copied.
+        """
+        if self.link == 'copy' or entry_codec(src):
+            return None
+        dst = node.get_internal_path()
+        if reflink(src, dst):
+            if env.cache_timestamp_newer:
+                shutil.copymode(src, dst)
+            else:
+                shutil.copystat(src, dst)
+            return 'reflink'
+        if self._can_hardlink(env, node):
+            try:
+                self._make_readonly(src)
+                if os.path.lexists(dst):
+                    os.unlink(dst)
+                os.link(src, dst)
+                return 'hardlink'
+            except OSError:
+                pass
+        return None
+
+    def link_to_cache(self, env, node, dst) -> bool:
+        """Put *node* in the cache as *dst* without copying.
+
+        The counterpart of :meth:`link_from_cache`: clones the target,
+        or hard links it and makes it read-only.  Returns ``False`` if
+        the file should be copied.
+        """
+        if self.link == 'copy':
+            return False
+        src = node.get_internal_path()
+        if reflink(src, dst):
+            shutil.copystat(src, dst)
+            st = stat.S_IMODE(os.stat(dst).st_mode)
+            if not st & stat.S_IWRITE:
+                os.chmod(dst, st | stat.S_IWRITE)
+            return True
+        if self._can_hardlink(env, node):
+            try:
+                os.link(src, dst)
+            except OSError:
+                return False
+            self._make_readonly(dst)
+            return True
+        return False
+
+    @property
+    def codec(self):
+        """The codec entries pushed to this cache are compressed with."""
+        return self.config.get('codec')
+
+    @property
+    def max_size(self):
+        """The size limit of this cache in bytes, ``None`` if unlimited."""
+        return self.config.get('max_size') or None
+
+    def _scan_entries(self) -> dict:
+        """Return the entries in this tier.
+
+        Maps each entry name to a list of its modification time, size
+        and path.  Files being pushed by a build are left out.
+        """
+        entries = {}
+        prefix_len = self.config['prefix_len']
+        with os.scandir(self.path) as dirs:
+            for d in dirs:
+                if len(d.name) != prefix_len or not d.is_dir(follow_symlinks=False):
+                    continue
+                with os.scandir(d.path) as files:
+                    for f in files:
+                        if '.tmp' in f.name:
+                            continue
+                        st = f.stat(follow_symlinks=False)
+                        entries[f.name] = [st.st_mtime, st.st_size, f.path]
+        return entries
+
+    def _read_index(self) -> tuple:
+        """Read the access index of this tier.
+
+        Returns a dict mapping each entry name to its last access time
+        and size, and the number of records read.  The index is an
+        append-only file of ``name size time`` lines; the last record
+        of a name is the current one.
+        """
+        index = {}
+        records = 0
+        with open(os.path.join(self.path, CACHE_INDEX)) as f:
+            for line in f:
+                try:
+                    name, size, atime = line.split()
+                    index[name] = [float(atime), int(size)]
+                except ValueError:
+                    # torn by a concurrent append
+                    continue
+                records += 1
+        return index, records
+
+    def record(self, cachefile, size) -> None:
+        """Record an access to *cachefile* in the index of this tier.
+
+        This is an append of one line, so a hit refreshes the recency
+        of an entry without rewriting anything.  Caches without a size
+        limit keep no index.
+        """
+        if not self.max_size:
+            return
+        try:
+            with open(os.path.join(self.path, CACHE_INDEX), 'a') as f:
+                f.write("%s %d %.3f\n" % (os.path.basename(cachefile), size, time.time()))
+        except OSError:
+            pass
+
+    def reserve(self, size) -> bool:
+        """Account for an entry of *size* bytes being added.
+
+        Returns ``False`` if the entry is larger than the size limit of
+        this tier.  Going over the limit starts an eviction pass.
+        A negative *size* gives back space reserved for an entry
+        which could not be added after all.
+        """
+        max_size = self.max_size
+        if not max_size:
+            return True
+        if size > max_size:
+            return False
+        with self._size_lock:
+            if self._size is None:
+                try:
+                    index, records = self._read_index()
+                    self._size = sum(entry[1] for entry in index.values())
+                except OSError:
+                    index, records = {}, None
+                if records is None or records > 2 * len(index) + 1000:
+                    # Build a missing index, or compact a long one.
+                    self.evict(0)
+                    if self._size is None:
+                        self._size = 0
+            self._size += size
+            if size > 0 and self._size > max_size:
+                self.evict(size)
+        return True
+
+    def evict(self, room) -> None:
+        """Remove the least recently used entries of this tier.
+
+        Entries are removed until they take up no more than
+        :data:`CACHE_EVICT_TO` of the size limit, less *room* bytes
+        wanted for a new entry, and the index is rewritten with
+        just the entries kept.  The entries on disk are the truth:
+        entries missing from the index, such as those pushed by older
+        versions of SCons, count with their modification time.
+
+        The index lock is held while doing this, so concurrent builds
+        do not evict at the same time; if another build holds it,
+        nothing is done.  A lock file not touched for
+        :data:`CACHE_EVICT_STALE` seconds was left by a build which
+        was killed while evicting, and is broken.  A build retrieving
+        an entry being removed sees a cache miss.
+        """
+        index_file = os.path.join(self.path, CACHE_INDEX)
+        lock = SCons.Util.FileLock(index_file, writer=True)
+        try:
+            lock.acquire_lock()
+        except SCons.Util.SConsLockFailure:
+            try:
+                if not self._break_stale_lock(lock.lockfile):
+                    raise
+                lock.acquire_lock()
+            except SCons.Util.SConsLockFailure:
+                self.CacheDebug("CacheDir eviction skipped in %s: %s is held by another build\n",
+                                self.path, lock.lockfile)
+                return
+        with self._size_lock, lock:
+            try:
+                index, records = self._read_index()
+            except OSError:
+                index = {}
+            entries = self._scan_entries()
+            # Scanning a large cache takes a while; show we are alive.
+            try:
+                os.utime(lock.lockfile)
+            except OSError:
+                pass
+            for name, (atime, size) in index.items():
+                if name in entries and atime > entries[name][0]:
+                    entries[name][0] = atime
+            total = sum(entry[1] for entry in entries.values())
+            limit = self.max_size * CACHE_EVICT_TO - room
+            for name, (atime, size, path) in sorted(
+                entries.items(), key=lambda item: item[1][0]
+            ):
+                if total <= limit:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total -= size
+                del entries[name]
+
+            tempfile = "%s.tmp%s" % (index_file, cache_tmp_uuid)
+            try:
+                with open(tempfile, 'w') as f:
+                    for name, (atime, size, path) in entries.items():
+                        f.write("%s %d %.3f\n" % (name, size, atime))
+                os.replace(tempfile, index_file)
+            except OSError:
+                pass
+            self._size = total + room
+
+    def _break_stale_lock(self, lockfile) -> bool:
+        """Remove the eviction lock *lockfile* if it is stale.
+
+        The lock is renamed away first and checked again, so of several
+        builds finding the same stale lock only one removes it, and a
+        build which has just taken the lock keeps it.  Returns ``True``
+        if the lock was removed, or is already gone.
+        """
+        try:
+            if time.time() - os.stat(lockfile).st_mtime < CACHE_EVICT_STALE:
+                return False
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return False
+        stale = "%s.tmp%s" % (lockfile, cache_tmp_uuid)
+        try:
+            os.rename(lockfile, stale)
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return False
+        taken = False
+        try:
+            taken = time.time() - os.stat(stale).st_mtime < CACHE_EVICT_STALE
+            if taken:
+                # Another build broke the lock and took it meanwhile.
+                os.link(stale, lockfile)
+            os.unlink(stale)
+        except OSError:
+            pass
+        if taken:
+            return False
+        self.CacheDebug("CacheDir broke stale eviction lock in %s: %s\n",
+                        self.path, lockfile)
+        return True
+
+    def promote(self, node, cachefile) -> None:
+        """Copy a shared tier's *cachefile* for *node* into this tier.
+
+        The copy is done in the background, so the build does not
+        wait on it.  It is only an optimization, so errors are ignored.
+        """
+        if self.is_readonly():
+            return
+        cachedir, localfile = self.cachepath(node)
+        _writes().submit(self._promote, cachefile, cachedir, localfile)
+
+    def _promote(self, src, cachedir, cachefile) -> None:
+        if os.path.lexists(cachefile):
+            return
+        size = self.entry_size(src)
+        if not self.reserve(size):
+            return
+        tempfile = _write_tempfile(cachefile)
+        try:
+            os.makedirs(cachedir, exist_ok=True)
+            if os.path.islink(src):
+                os.symlink(os.readlink(src), tempfile)
+            else:
+                shutil.copy2(src, tempfile)
+            os.replace(tempfile, cachefile)
+        except OSError:
+            self.reserve(-size)
+        else:
+            self.record(cachefile, size)
+
+    def push_compressed(self, env, src, cachedir, cachefile, size) -> None:
+        """Compress the file *src* into *cachefile* in the background.
+
+        *size* bytes were reserved for the entry.  If *src* changes
+        before the compressed copy is done, it is not put in the
+        cache, since it no longer matches the build signature.
+        """
+        try:
+            st = os.stat(src)
+        except OSError:
+            self.reserve(-size)
+            return
+        _writes().submit(
+            self._push_compressed, env, src, (st.st_size, st.st_mtime_ns),
+            cachedir, cachefile, size,
+        )
+
+    def _push_compressed(self, env, src, stamp, cachedir, cachefile, size) -> None:
+        tempfile = _write_tempfile(cachefile)
+        try:
+            os.makedirs(cachedir, exist_ok=True)
+            csize = self.compress_to_cache(env, src, tempfile, self.codec)
+            st = os.stat(src)
+            if (st.st_size, st.st_mtime_ns) != stamp:
+                raise OSError("%s changed while being pushed" % src)
+            os.replace(tempfile, cachefile)
+        except OSError:
+            # As for the other pushes, failing to push only costs
+            # a future rebuild.
+            try:
+                os.unlink(tempfile)
+            except OSError:
+                pass
+            self.reserve(-size)
+            return
+        self.reserve(csize - size)
+        self.record(cachefile, csize)
 
     def get_cachedir_csig(self, node) -> str:
-        cachedir, cachefile = self.cachepath(node)
-        if cachefile and os.path.exists(cachefile):
+        tier, cachefile = self.lookup(node)
+        if cachefile:
+            if entry_codec(cachefile):
+                m = SCons.Util.hashes._get_hash_object(None)
+                for chunk in read_entry(cachefile):
+                    m.update(chunk)
+                return m.hexdigest()
             return SCons.Util.hash_file_signature(cachefile, SCons.Node.FS.File.hash_chunksize)
 
     def cachepath(self, node) -> tuple:
@@ -389,10 +1059,156 @@ class CacheDir:
         return False
 
     def push(self, node):
-        if self.is_readonly() or not self.is_enabled():
+        if not self.is_enabled():
+            return
+        if all(tier.is_readonly() for tier in self.tiers()):
             return
         return CachePush(node, [], node.get_build_env())
 
     def push_if_forced(self, node):
         if cache_force:
             return self.push(node)
+
+
+def _known_input(node) -> bool:
+    """Return whether *node* is an input which is not built."""
+    if node.is_derived():
+        return False
+    if isinstance(node, SCons.Node.FS.Entry):
+        node = node.disambiguate()
+    if isinstance(node, SCons.Node.FS.Base):
+        return (isinstance(node, SCons.Node.FS.File)
+                and node.srcnode() is node and node.rexists())
+    return isinstance(node, SCons.Node.Python.Value)
+
+def _prefetch_candidates(targets) -> list:
+    """Collect the targets below *targets* which could come from cache.
+
+    Those are derived files, each the only target of its builder and
+    with no side effects, built through an environment with a cache,
+    which need building, and whose inputs are all known: plain source
+    files or values, once scanned.  Returns (node, CacheDir) pairs.
+    """
+    import SCons.Node.FS  # pylint: disable=import-outside-toplevel
+    import SCons.Node.Python  # pylint: disable=import-outside-toplevel
+
+    candidates = []
+    seen = set()
+    stack = list(targets)
+    while stack:
+        node = stack.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+        if isinstance(node, SCons.Node.FS.Entry):
+            # As the Taskmaster would, once it gets to the node.
+            node = node.disambiguate()
+        if isinstance(node, SCons.Node.FS.Dir):
+            stack.extend(child for name, child in node.entries.items()
+                         if name not in ('.', '..'))
+        kids = node.children(scan=0)
+        stack.extend(kids)
+        if (not isinstance(node, SCons.Node.FS.File) or not node.has_builder()
+                or node.nocache or node.always_build or node.side_effects
+                or not all(_known_input(kid) for kid in kids)):
+            continue
+        try:
+            cd = node.get_build_env().get_CacheDir()
+            if not cd.is_enabled() or node.rfile() is not node:
+                continue
+            if len(node.get_executor().get_all_targets()) != 1:
+                continue
+            if node.exists() and node.precious:
+                continue
+            # Scanning here rather than in the Taskmaster is the same work.
+            if not all(_known_input(kid) for kid in node.children()):
+                continue
+            if node.exists() and not node.changed():
+                continue
+            node.get_cachedir_bsig()
+        except Exception:
+            # Leave any problem to be reported by the build.
+            continue
+        candidates.append((node, cd))
+    return candidates
+
+def prefetch(targets, num_workers: int) -> int:
+    """Retrieve the cached targets below *targets* ahead of a build.
+
+    Each :meth:`CacheDir.retrieve` otherwise probes the cache for its
+    target when the Taskmaster gets to it.  This pre-pass computes the
+    cache signatures of the targets which need building and whose
+    inputs are known (see :func:`_prefetch_candidates`), lists each
+    cache directory they fall in once with :func:`os.scandir`, tier by
+    tier, and retrieves the hits in a pool of *num_workers* threads.
+    Those targets are marked as ``cached``; the Taskmaster still visits
+    them, but retrieving them then does no more I/O, and their files
+    are not removed beforehand.
+    Where the other targets are in the cache is remembered too, so
+    they are not probed again.
+
+    Returns the number of targets retrieved.
+    """
+    candidates = _prefetch_candidates(targets)
+    if not candidates:
+        return 0
+
+    def listdir(cachedir):
+        try:
+            with os.scandir(cachedir) as entries:
+                return {e.name for e in entries}
+        except OSError:
+            return set()
+
+    hits = []
+    with ThreadPoolExecutor(max_workers=max(1, num_workers)) as pool:
+        pending = [(node, cd, cd) for node, cd in candidates]
+        while pending:
+            paths = [tier.cachepath(node) for node, cd, tier in pending]
+            cachedirs = sorted({cachedir for cachedir, cachefile in paths})
+            listing = dict(zip(cachedirs, pool.map(listdir, cachedirs)))
+            misses = []
+            for (node, cd, tier), (cachedir, cachefile) in zip(pending, paths):
+                if os.path.basename(cachefile) in listing[cachedir]:
+                    cd._prefetched[node] = (tier, cachefile)
+                    hits.append((node, cd, tier, cachefile))
+                elif tier.shared is not None:
+                    misses.append((node, cd, tier.shared))
+                else:
+                    cd._prefetched[node] = (None, None)
+            pending = misses
+
+        # The target directories are created, and out-of-date targets
+        # removed, here, as File.prepare() would do.
+        ready = []
+        for node, cd, tier, cachefile in hits:
+            try:
+                node._createDir()
+                if node.exists() or node.islink():
+                    node.fs.unlink(node.get_internal_path())
+            except Exception:
+                continue
+            ready.append((node, cd, tier, cachefile))
+
+        def retrieve(hit):
+            node, cd, tier, cachefile = hit
+            try:
+                _retrieve_entry(tier, node.get_build_env(), node, cachefile)
+            except OSError:
+                return False
+            return True
+
+        done = list(pool.map(retrieve, ready))
+
+    count = 0
+    for (node, cd, tier, cachefile), ok in zip(ready, done):
+        node.clear_memoized_values()
+        if ok:
+            node.cached = True
+            if tier is not cd:
+                cd.promote(node, cachefile)
+            count += 1
+        else:
+            del cd._prefetched[node]
+    return count
+
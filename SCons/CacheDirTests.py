@@ -21,12 +21,15 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+import glob
+import io
 import os.path
 import shutil
 import sys
 import unittest
 import tempfile
 import stat
+import time
 
 from TestCmd import TestCmd, IS_WINDOWS, IS_ROOT
 
@@ -62,6 +65,12 @@ class Environment:
     def get_CacheDir(self):
         return self.cachedir
 
+class SConsEnvironment(Environment):
+    def __init__(self, cachedir) -> None:
+        super().__init__(cachedir)
+        self.cache_timestamp_newer = False
+        self.fs = SCons.Node.FS.FS()
+
 class BaseTestCase(unittest.TestCase):
     """Base fixtures common to our other unittest classes."""
 
@@ -107,6 +116,334 @@ class CacheDirTestCase(BaseTestCase):
         finally:
             SCons.Util.hash_collect = save_collect
 
+class LayeredCacheDirTestCase(unittest.TestCase):
+    """Test a CacheDir with a local tier in front of a shared one."""
+
+    def setUp(self) -> None:
+        self.test = TestCmd(workdir='')
+        self.fs = SCons.Node.FS.FS()
+        self.local = self.test.workpath('local')
+        self.shared = self.test.workpath('shared')
+
+    def tearDown(self) -> None:
+        SCons.CacheDir.wait_for_writes()
+
+    def File(self, cd, name, bsig):
+        self.test.write(name, name + "\n")
+        node = self.fs.File(self.test.workpath(name))
+        node.builder_set(Builder(SConsEnvironment(cd), Action()))
+        node.cachesig = bsig
+        return node
+
+    def test_tiers(self) -> None:
+        """Test setting up the tiers"""
+        cd = SCons.CacheDir.CacheDir(
+            [self.local, {'path': self.shared, 'readonly': True, 'max_size': 10}]
+        )
+        assert [t.path for t in cd.tiers()] == [self.local, self.shared]
+        assert not cd.is_readonly()
+        assert cd.max_size is None
+        assert cd.shared.is_readonly()
+        assert cd.shared.max_size == 10
+        assert os.path.exists(os.path.join(self.shared, 'config'))
+
+        with self.assertRaises(SCons.Errors.SConsEnvironmentError):
+            SCons.CacheDir.CacheDir({'path': self.local, 'readony': True})
+
+    def test_push_retrieve(self) -> None:
+        """Test pushing to both tiers and promoting shared hits"""
+        cd = SCons.CacheDir.CacheDir([self.local, self.shared])
+        f1 = self.File(cd, 'f1', 'f1_bsig')
+        SCons.CacheDir.CachePushFunc([f1], [], f1.get_build_env())
+        local_file = cd.cachepath(f1)[1]
+        shared_file = cd.shared.cachepath(f1)[1]
+        assert os.path.exists(local_file)
+        assert os.path.exists(shared_file)
+
+        os.unlink(local_file)
+        os.unlink(f1.get_internal_path())
+        assert cd.lookup(f1) == (cd.shared, shared_file)
+        r = SCons.CacheDir.CacheRetrieveFunc([f1], [], f1.get_build_env())
+        assert r == 0, r
+        assert self.test.read('f1', mode='r') == "f1\n"
+        SCons.CacheDir.wait_for_writes()
+        assert cd.lookup(f1) == (cd, local_file)
+        assert cd.hits == 1
+
+    def test_readonly(self) -> None:
+        """Test that a read-only tier is not pushed to or promoted into"""
+        cd = SCons.CacheDir.CacheDir([{'path': self.local, 'readonly': True}, self.shared])
+        f2 = self.File(cd, 'f2', 'f2_bsig')
+        SCons.CacheDir.CachePushFunc([f2], [], f2.get_build_env())
+        assert not os.path.exists(cd.cachepath(f2)[1])
+        assert os.path.exists(cd.shared.cachepath(f2)[1])
+
+        r = SCons.CacheDir.CacheRetrieveFunc([f2], [], f2.get_build_env())
+        assert r == 0, r
+        SCons.CacheDir.wait_for_writes()
+        assert not os.path.exists(cd.cachepath(f2)[1])
+
+    def test_max_size(self) -> None:
+        """Test keeping a tier under its size limit"""
+        cd = SCons.CacheDir.CacheDir([{'path': self.local, 'max_size': 5}, self.shared])
+        assert cd.config['max_size'] == 5
+        f3 = self.File(cd, 'f3', 'f3_bsig')
+        f4 = self.File(cd, 'f4', 'f4_bsig')
+        SCons.CacheDir.CachePushFunc([f3], [], f3.get_build_env())
+        assert cd._size == 3, cd._size
+        SCons.CacheDir.CachePushFunc([f4], [], f4.get_build_env())
+        # f3 was evicted to make room for f4.
+        assert not os.path.exists(cd.cachepath(f3)[1])
+        assert os.path.exists(cd.cachepath(f4)[1])
+        assert os.path.exists(cd.shared.cachepath(f3)[1])
+        assert cd._size == 3, cd._size
+        index, records = cd._read_index()
+        assert sorted(index) == ['f4_bsig'], index
+
+        # The limit is kept in the config, and the size is counted
+        # from the index.
+        cd = SCons.CacheDir.CacheDir([self.local, self.shared])
+        assert cd.max_size == 5
+        assert cd.reserve(2)
+        assert cd._size == 5, cd._size
+        assert not cd.reserve(6)
+
+        cd = SCons.CacheDir.CacheDir({'path': self.local, 'max_size': 0})
+        assert cd.max_size is None
+
+class CompressTestCase(unittest.TestCase):
+    """Test a CacheDir compressing its entries."""
+
+    def setUp(self) -> None:
+        self.test = TestCmd(workdir='')
+        self.fs = SCons.Node.FS.FS()
+        self.path = self.test.workpath('cache')
+
+    def tearDown(self) -> None:
+        SCons.CacheDir.wait_for_writes()
+
+    def File(self, cd, name, bsig, contents):
+        self.test.write(name, contents)
+        node = self.fs.File(self.test.workpath(name))
+        node.builder_set(Builder(SConsEnvironment(cd), Action()))
+        node.cachesig = bsig
+        return node
+
+    def test_codec(self) -> None:
+        """Test recording the codec in the config"""
+        cd = SCons.CacheDir.CacheDir({'path': self.path, 'compress': 'zlib'})
+        assert cd.codec == 'zlib'
+        # The codec stays that of the existing entries.
+        cd = SCons.CacheDir.CacheDir({'path': self.path, 'compress': True})
+        assert cd.codec == 'zlib'
+        cd = SCons.CacheDir.CacheDir(self.path)
+        assert cd.config['codec'] == 'zlib'
+
+        with self.assertRaises(SCons.Errors.SConsEnvironmentError):
+            SCons.CacheDir.CacheDir({'path': self.test.workpath('c2'), 'compress': 'nosuch'})
+        cd = SCons.CacheDir.CacheDir({'path': self.test.workpath('c3'), 'compress': True})
+        assert cd.codec == SCons.CacheDir.CACHE_DEFAULT_CODEC
+
+    def test_push_retrieve(self) -> None:
+        """Test compressing pushes and decompressing retrieves"""
+        cd = SCons.CacheDir.CacheDir({'path': self.path, 'compress': 'zlib'})
+        contents = "compressible\n" * 1000
+        f1 = self.File(cd, 'f1', 'f1_bsig', contents)
+        csig = f1.get_csig()
+        SCons.CacheDir.CachePushFunc([f1], [], f1.get_build_env())
+        SCons.CacheDir.wait_for_writes()
+        cachefile = cd.cachepath(f1)[1]
+        assert SCons.CacheDir.entry_codec(cachefile) == 'zlib'
+        assert os.path.getsize(cachefile) < len(contents) // 10
+        assert glob.glob(cachefile + '.tmp*') == []
+
+        os.unlink(f1.get_internal_path())
+        r = SCons.CacheDir.CacheRetrieveFunc([f1], [], f1.get_build_env())
+        assert r == 0, r
+        assert self.test.read('f1', mode='r') == contents
+        assert cd.get_cachedir_csig(f1) == csig
+
+        # Entries which are not compressed are still read.
+        f2 = self.File(cd, 'f2', 'f2_bsig', "f2\n")
+        cachedir, cachefile = cd.cachepath(f2)
+        os.makedirs(cachedir, exist_ok=True)
+        shutil.copy2(f2.get_internal_path(), cachefile)
+        assert SCons.CacheDir.entry_codec(cachefile) is None
+        os.unlink(f2.get_internal_path())
+        r = SCons.CacheDir.CacheRetrieveFunc([f2], [], f2.get_build_env())
+        assert r == 0, r
+        assert self.test.read('f2', mode='r') == "f2\n"
+
+    def test_changed(self) -> None:
+        """Test that a file changed while being pushed is not cached"""
+        cd = SCons.CacheDir.CacheDir({'path': self.path, 'compress': 'zlib'})
+        f3 = self.File(cd, 'f3', 'f3_bsig', "f3\n")
+        cachedir, cachefile = cd.cachepath(f3)
+        cd._push_compressed(None, f3.get_internal_path(), (0, 0), cachedir, cachefile, 3)
+        assert not os.path.exists(cachefile)
+        assert os.listdir(cachedir) == []
+
+class LinkTestCase(unittest.TestCase):
+    """Test a CacheDir linking files rather than copying them."""
+
+    def setUp(self) -> None:
+        self.test = TestCmd(workdir='')
+        self.fs = SCons.Node.FS.FS()
+        self.path = self.test.workpath('cache')
+        self.save_reflink = SCons.CacheDir.reflink
+        self.save_running_as_root = SCons.CacheDir.running_as_root
+
+    def tearDown(self) -> None:
+        SCons.CacheDir.reflink = self.save_reflink
+        SCons.CacheDir.running_as_root = self.save_running_as_root
+
+    def File(self, cd, name, bsig):
+        self.test.write(name, name + "\n")
+        node = self.fs.File(self.test.workpath(name))
+        node.builder_set(Builder(SConsEnvironment(cd), Action()))
+        node.cachesig = bsig
+        return node
+
+    def push_and_retrieve(self, node) -> str:
+        env = node.get_build_env()
+        SCons.CacheDir.CachePushFunc([node], [], env)
+        os.unlink(node.get_internal_path())
+        r = SCons.CacheDir.CacheRetrieveFunc([node], [], env)
+        assert r == 0, r
+        return env.get_CacheDir().cachepath(node)[1]
+
+    def test_mode(self) -> None:
+        """Test recording the link mode in the config"""
+        cd = SCons.CacheDir.CacheDir({'path': self.path, 'link': 'hardlink'})
+        assert cd.link == 'hardlink'
+        cd = SCons.CacheDir.CacheDir(self.path)
+        assert cd.link == 'hardlink'
+        cd = SCons.CacheDir.CacheDir({'path': self.path, 'link': 'copy'})
+        assert cd.config['link'] == 'copy'
+        with self.assertRaises(SCons.Errors.SConsEnvironmentError):
+            SCons.CacheDir.CacheDir({'path': self.path, 'link': 'symlink'})
+
+    def test_reflink(self) -> None:
+        """Test cloning, and copying when cloning is not possible"""
+        cloned = []
+        def reflink(src, dst):
+            cloned.append(dst)
+            shutil.copyfile(src, dst)
+            return True
+        SCons.CacheDir.reflink = reflink
+        cd = SCons.CacheDir.CacheDir({'path': self.path, 'link': 'reflink'})
+        f1 = self.File(cd, 'f1', 'f1_bsig')
+        cachefile = self.push_and_retrieve(f1)
+        assert len(cloned) == 2, cloned
+        assert cloned[1] == f1.get_internal_path(), cloned
+        assert self.test.read('f1', mode='r') == "f1\n"
+
+        # Without reflink support, a reflink cache copies.
+        SCons.CacheDir.reflink = lambda src, dst: False
+        f2 = self.File(cd, 'f2', 'f2_bsig')
+        cachefile = self.push_and_retrieve(f2)
+        assert not os.path.samefile(cachefile, f2.get_internal_path())
+        assert self.test.read('f2', mode='r') == "f2\n"
+
+    @unittest.skipIf(IS_WINDOWS, "No hard linked targets on Windows")
+    def test_hardlink(self) -> None:
+        """Test hard linking read-only entries"""
+        SCons.CacheDir.reflink = lambda src, dst: False
+        SCons.CacheDir.running_as_root = lambda: False
+        cd = SCons.CacheDir.CacheDir({'path': self.path, 'link': 'hardlink'})
+        f3 = self.File(cd, 'f3', 'f3_bsig')
+        cachefile = self.push_and_retrieve(f3)
+        assert os.path.samefile(cachefile, f3.get_internal_path())
+        assert not os.stat(cachefile).st_mode & stat.S_IWUSR
+        assert self.test.read('f3', mode='r') == "f3\n"
+
+        # A precious target is copied, so it can be modified in place.
+        f4 = self.File(cd, 'f4', 'f4_bsig')
+        f4.set_precious()
+        cachefile = self.push_and_retrieve(f4)
+        assert not os.path.samefile(cachefile, f4.get_internal_path())
+        assert os.stat(f4.get_internal_path()).st_mode & stat.S_IWUSR
+
+        # Read-only files do not stop root, so nothing is hard linked.
+        SCons.CacheDir.running_as_root = lambda: True
+        f5 = self.File(cd, 'f5', 'f5_bsig')
+        cachefile = self.push_and_retrieve(f5)
+        assert not os.path.samefile(cachefile, f5.get_internal_path())
+        assert os.stat(cachefile).st_mode & stat.S_IWUSR
+
+class EvictTestCase(unittest.TestCase):
+    """Test evicting entries from a size-limited CacheDir."""
+
+    def setUp(self) -> None:
+        self.test = TestCmd(workdir='')
+        self.path = self.test.workpath('cache')
+        self.cd = SCons.CacheDir.CacheDir({'path': self.path, 'max_size': 100})
+
+    def add(self, name, size, mtime) -> str:
+        cachedir = os.path.join(self.path, name[:2].upper())
+        os.makedirs(cachedir, exist_ok=True)
+        cachefile = os.path.join(cachedir, name)
+        with open(cachefile, 'wb') as f:
+            f.write(b'x' * size)
+        os.utime(cachefile, (mtime, mtime))
+        return cachefile
+
+    def test_lru(self) -> None:
+        """Test that the least recently used entries go first"""
+        now = time.time()
+        old = self.add('aa_old', 40, now - 300)
+        new = self.add('bb_new', 40, now - 200)
+        hit = self.add('cc_hit', 40, now - 100)
+        # An access recorded in the index counts, not just the mtime.
+        self.cd.record(old, 40)
+        self.cd.evict(0)
+        assert os.path.exists(old)
+        assert not os.path.exists(new)
+        assert os.path.exists(hit)
+        assert self.cd._size == 80, self.cd._size
+        index, records = self.cd._read_index()
+        assert sorted(index) == ['aa_old', 'cc_hit'], index
+        assert records == 2, records
+
+        # Nothing is done while another build holds the lock.
+        self.cd.record(old, 40)
+        self.add('dd_more', 40, now)
+        with SCons.Util.FileLock(os.path.join(self.path, 'index'), writer=True):
+            self.cd.evict(0)
+        assert os.path.exists(hit)
+        self.cd.evict(0)
+        assert not os.path.exists(hit)
+
+    def test_stale_lock(self) -> None:
+        """Test that a lock left by a killed build is broken"""
+        now = time.time()
+        old = self.add('aa_old', 60, now - 200)
+        new = self.add('bb_new', 60, now - 100)
+        lockfile = os.path.join(self.path, 'index.lock')
+        with open(lockfile, 'w'):
+            pass
+        debug = io.StringIO()
+        save_debug = SCons.CacheDir.cache_debug
+        try:
+            SCons.CacheDir.cache_debug = '-'
+            self.cd.current_cache_debug = '-'
+            self.cd.debugFP = debug
+
+            # A fresh lock is held by a running build.
+            self.cd.evict(0)
+            assert os.path.exists(old)
+            assert "eviction skipped" in debug.getvalue(), debug.getvalue()
+
+            stale = now - SCons.CacheDir.CACHE_EVICT_STALE - 10
+            os.utime(lockfile, (stale, stale))
+            self.cd.evict(0)
+            assert not os.path.exists(old)
+            assert os.path.exists(new)
+            assert not os.path.exists(lockfile)
+            assert "broke stale eviction lock" in debug.getvalue(), debug.getvalue()
+        finally:
+            SCons.CacheDir.cache_debug = save_debug
+
 class CacheDirExistsTestCase(unittest.TestCase):
     """Test passing an existing but not setup cache directory."""
 
@@ -398,6 +398,55 @@ Touch = ActionFactory(touch_func, lambda file: f'Touch({get_paths_str(file)})')
 
 # Internal utility functions
 
+# The most flag expansions kept for one construction environment
+# before the memo is started over.
+FLAGS_MEMO_SIZE = 1000
+
+
+def _flags_memo(env, prefix, suffix):
+    """Return the memo of flag expansions for *env*, or ``None``.
+
+    The expansions by :func:`_concat`, :func:`_defines` and
+    :func:`_stripixes` are memoized in the environment's ``_memo``
+    under keys that hold everything the result depends on, so an
+    :class:`~SCons.Environment.OverrideEnvironment` can share the memo
+    of its subject.  Nothing is memoized before the SConscript files
+    have been read, while the string forms of Nodes can still change,
+    nor for a *prefix* or *suffix* that needs substitution.
+    """
+    if not SCons.Node.FS.Save_Strings:
+        return None
+    memo = getattr(env, '_memo', None)
+    if memo is None:
+        return None
+    try:
+        if '$' in prefix or '$' in suffix:
+            return None
+    except TypeError:
+        return None
+    try:
+        return memo['_flags']
+    except KeyError:
+        flags = memo['_flags'] = {}
+        return flags
+
+
+def _flags_key(*key):
+    """Return *key* for the flags memo, or ``None`` if it is unhashable."""
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _flags_save(memo, key, anchor, value) -> None:
+    """Save *value* under *key* in the flags *memo*, with its *anchor*."""
+    if len(memo) >= FLAGS_MEMO_SIZE:
+        memo.clear()
+    memo[key] = (anchor, value)
+
+
 # pylint: disable-msg=too-many-arguments
 def _concat(prefix, items_iter, suffix, env, f=lambda x: x, target=None, source=None, affect_signature: bool=True):
     """
@@ -414,6 +463,26 @@ def _concat(prefix, items_iter, suffix, env, f=lambda x: x, target=None, source=
     if l is not None:
         items_iter = l
 
+    key = None
+    memo = _flags_memo(env, prefix, suffix)
+    if memo is not None and l is not None:
+        # A substituted path list is a tuple and can be its own key.
+        # RDirs hands back the same list every time for the same path
+        # list looked up from the same directory, so the identity of
+        # that list stands for both its contents and the variant dir
+        # the target is built in; it is kept in the entry so the id
+        # cannot be reused by another list.
+        key = _flags_key('_concat', prefix, suffix, affect_signature,
+                         l if is_Tuple(l) else id(l))
+        if key is not None:
+            try:
+                anchor, value = memo[key]
+            except KeyError:
+                pass
+            else:
+                if anchor is l or is_Tuple(l):
+                    return list(value)
+
     if not affect_signature:
         value = ['$(']
     else:
@@ -423,6 +492,8 @@ def _concat(prefix, items_iter, suffix, env, f=lambda x: x, target=None, source=
     if not affect_signature:
         value += ["$)"]
 
+    if key is not None:
+        _flags_save(memo, key, l, tuple(value))
     return value
 # pylint: enable-msg=too-many-arguments
 
@@ -517,8 +588,21 @@ def _stripixes(
     # which is why PathList() otherwise wants to split strings.
     do_split = not literal_prefix == os.pathsep
 
+    items = SCons.PathList.PathList(items, do_split).subst_path(env, None, None)
+
+    key = None
+    memo = _flags_memo(env, prefix, suffix) if c is _concat_ixes else None
+    if memo is not None:
+        key = _flags_key('_stripixes', prefix, suffix, tuple(stripprefixes),
+                         tuple(stripsuffixes), literal_prefix, items)
+        if key is not None:
+            try:
+                return list(memo[key][1])
+            except KeyError:
+                pass
+
     stripped = []
-    for l in SCons.PathList.PathList(items, do_split).subst_path(env, None, None):
+    for l in items:
         if isinstance(l, SCons.Node.FS.File):
             stripped.append(l)
             continue
@@ -546,7 +630,10 @@ def _stripixes(
 
         stripped.append(l)
 
-    return c(prefix, stripped, suffix, env)
+    value = c(prefix, stripped, suffix, env)
+    if key is not None:
+        _flags_save(memo, key, None, tuple(value))
+    return value
 
 
 def processDefines(defs) -> list[str]:
@@ -625,7 +712,22 @@ def _defines(prefix, defs, suffix, env, target=None, source=None, c=_concat_ixes
     """A wrapper around :func:`_concat_ixes` that turns a list or string
     into a list of C preprocessor command-line definitions.
     """
-    return c(prefix, env.subst_list(processDefines(defs), target=target, source=source), suffix, env)
+    defines = processDefines(defs)
+
+    key = None
+    memo = _flags_memo(env, prefix, suffix) if c is _concat_ixes else None
+    if memo is not None and not any('$' in d for d in defines):
+        key = _flags_key('_defines', prefix, suffix, tuple(defines))
+        if key is not None:
+            try:
+                return list(memo[key][1])
+            except KeyError:
+                pass
+
+    value = c(prefix, env.subst_list(defines, target=target, source=source), suffix, env)
+    if key is not None:
+        _flags_save(memo, key, None, tuple(value))
+    return value
 
 
 class NullCmdGenerator:
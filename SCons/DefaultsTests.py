@@ -27,7 +27,15 @@ import collections
 
 import TestCmd
 
-from SCons.Defaults import mkdir_func, _defines, processDefines
+import SCons.Environment
+import SCons.Node.FS
+from SCons.Defaults import (
+    mkdir_func,
+    _concat,
+    _defines,
+    _stripixes,
+    processDefines,
+)
 from SCons.Errors import UserError
 
 
@@ -152,6 +160,74 @@ class DefaultsTestCase(unittest.TestCase):
             ):
                 rv = processDefines([('name', 'val', 'bad')])
 
+    def test_flags_memo(self) -> None:
+        """Verify the memoization of flag expansions."""
+        env = SCons.Environment.Environment(
+            tools=[],
+            CPPPATH=['inc', 'include'],
+            CPPDEFINES=['A', ('B', 2)],
+            LIBS=['foo', 'libbar.a'],
+            LIBPREFIX='lib',
+            LIBSUFFIX='.a',
+        )
+        def libflags(e):
+            return _stripixes('-l', e['LIBS'], '', ['$LIBPREFIX'],
+                              ['$LIBSUFFIX'], e)
+
+        # Nothing is memoized while the SConscript files are read.
+        _concat('-I', env['CPPPATH'], '', env)
+        self.assertNotIn('_flags', env._memo)
+
+        SCons.Node.FS.save_strings(True)
+        try:
+            with self.subTest():
+                x = _concat('-I', env['CPPPATH'], '', env)
+                self.assertEqual(x, ['-Iinc', '-Iinclude'])
+                x.append('-Iother')
+                y = _concat('-I', env['CPPPATH'], '', env)
+                self.assertEqual(y, ['-Iinc', '-Iinclude'])
+                self.assertEqual(len(env._memo['_flags']), 1)
+                x = _concat('-I', env['CPPPATH'], '', env, affect_signature=False)
+                self.assertEqual(x, ['$(', '-Iinc', '-Iinclude', '$)'])
+                env.Append(CPPPATH=['more'])
+                x = _concat('-I', env['CPPPATH'], '', env)
+                self.assertEqual(x, ['-Iinc', '-Iinclude', '-Imore'])
+
+            with self.subTest():
+                # the directory lists looked up from different
+                # directories keep their own expansions
+                sub1 = env.fs.Dir('sub1')
+                sub2 = env.fs.Dir('sub2')
+                for i in range(2):
+                    x = _concat('-I', ['inc'], '', env, sub1.Rfindalldirs)
+                    self.assertEqual(x, ['-I' + os.path.join('sub1', 'inc')])
+                    y = _concat('-I', ['inc'], '', env, sub2.Rfindalldirs)
+                    self.assertEqual(y, ['-I' + os.path.join('sub2', 'inc')])
+
+            with self.subTest():
+                x = _defines('-D', env['CPPDEFINES'], '', env)
+                self.assertEqual(x, ['-DA', '-DB=2'])
+                y = _defines('-D', env['CPPDEFINES'], '', env)
+                self.assertEqual(y, ['-DA', '-DB=2'])
+                self.assertIn(('_defines', '-D', '', ('A', 'B=2')),
+                              env._memo['_flags'])
+                env['X'] = 'x'
+                x = _defines('-D', ['$X'], '', env)
+                self.assertEqual(x, ['-Dx'])
+                env['X'] = 'y'
+                x = _defines('-D', ['$X'], '', env)
+                self.assertEqual(x, ['-Dy'])
+
+            with self.subTest():
+                # an override shares the memo but not the expansions
+                self.assertEqual(libflags(env), ['-lfoo', '-lbar'])
+                self.assertEqual(libflags(env), ['-lfoo', '-lbar'])
+                override = env.Override({'LIBPREFIX': 'x', 'LIBS': ['xbaz']})
+                self.assertEqual(libflags(override), ['-lbaz'])
+                self.assertEqual(libflags(env), ['-lfoo', '-lbar'])
+        finally:
+            SCons.Node.FS.save_strings(False)
+
 
 if __name__ == "__main__":
     unittest.main()
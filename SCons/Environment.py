@@ -37,6 +37,7 @@ import os
 import sys
 import re
 import shlex
+import types
 from collections import UserDict, UserList, deque
 from subprocess import PIPE, DEVNULL
 from typing import TYPE_CHECKING, Callable, Collection, Sequence
@@ -47,6 +48,7 @@ import SCons.Debug
 from SCons.Debug import logInstanceCreation
 import SCons.Defaults
 from SCons.Errors import UserError, BuildError
+import SCons.Journal
 import SCons.Memoize
 import SCons.Node
 import SCons.Node.Alias
@@ -74,7 +76,6 @@ from SCons.Util import (
     is_String,
     is_Tuple,
     semi_deepcopy,
-    semi_deepcopy_dict,
     to_String_for_subst,
     uniquer_hashables,
 )
@@ -90,6 +91,28 @@ _warn_target_signatures_deprecated = True
 CleanTargets = {}
 CalculatorArgs = {}
 
+# Values which a clone can always share: they cannot be changed, or
+# semi_deepcopy() would not copy them anyway.
+_IMMUTABLE_TYPES = (
+    str, int, float, type(None), type,
+    types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+)
+
+# Whether to compile the signatures of command lines into templates,
+# see SubstitutionEnvironment.subst_target_source().  Turned on by the
+# main program once the SConscript files are read: up to then values
+# are changed in place, through references handed out, too freely to
+# keep templates of them.
+sig_templates = False
+
+# Counts the changes made to construction environments.  A signature
+# template compiled before the latest change is out of date.
+_changes = 0
+
+def _changed() -> None:
+    global _changes
+    _changes += 1
+
 def alias_builder(env, target, source) -> None:
     """Dummy action for use by the Alias Builder."""
     pass
@@ -567,6 +590,9 @@ class SubstitutionEnvironment:
         self.ans = SCons.Node.Alias.default_ans
         self.lookup_list = SCons.Node.arg2nodes_lookups
         self._dict = kw.copy()
+        self._private = set()
+        self._shared = set()
+        self._sig_templates = {}
         self._init_special()
         self.added_methods = []
         #self._memo = {}
@@ -605,7 +631,31 @@ class SubstitutionEnvironment:
         """
         return self._dict == other._dict
 
+    def _own(self, key) -> None:
+        """Copy the value of *key* if it is shared with other environments.
+
+        :meth:`~Base.Clone` shares the values which no caller holds a
+        reference to, the *private* ones, between an environment and its
+        clone: each environment takes its own copy of a shared value
+        before changing it or handing it out.  The copy is private.
+        """
+        if key in self._shared:
+            self._shared.discard(key)
+            self._dict[key] = semi_deepcopy(self._dict[key])
+
+    def _hand_out(self, key) -> None:
+        """Own the value of *key*, which a caller gets a reference to."""
+        self._own(key)
+        self._private.discard(key)
+
+    def _hand_out_all(self) -> None:
+        for key in list(self._private):
+            self._hand_out(key)
+
     def __delitem__(self, key) -> None:
+        _changed()
+        self._private.discard(key)
+        self._shared.discard(key)
         special = self._special_del.get(key)
         if special:
             special(self, key)
@@ -613,9 +663,15 @@ class SubstitutionEnvironment:
             del self._dict[key]
 
     def __getitem__(self, key):
+        if key in self._private:
+            self._hand_out(key)
         return self._dict[key]
 
     def __setitem__(self, key, value):
+        _changed()
+        if key in self._private:
+            self._private.discard(key)
+            self._shared.discard(key)
         if key in self._special_set_keys:
             self._special_set[key](self, key, value)
         else:
@@ -634,6 +690,8 @@ class SubstitutionEnvironment:
 
     def get(self, key, default=None):
         """Emulate the ``get`` method of dictionaries."""
+        if key in self._private:
+            self._hand_out(key)
         return self._dict.get(key, default)
 
     def __contains__(self, key) -> bool:
@@ -645,14 +703,20 @@ class SubstitutionEnvironment:
 
     def values(self):
         """Emulate the ``values`` method of dictionaries."""
+        self._hand_out_all()
         return self._dict.values()
 
     def items(self):
         """Emulate the ``items`` method of dictionaries."""
+        self._hand_out_all()
         return self._dict.items()
 
     def setdefault(self, key, default=None):
         """Emulate the ``setdefault`` method of dictionaries."""
+        if key in self._private:
+            self._hand_out(key)
+        elif key not in self._dict:
+            _changed()
         return self._dict.setdefault(key, default)
 
     def arg2nodes(self, args, node_factory=_null, lookup_list=_null, **kw):
@@ -810,7 +874,46 @@ class SubstitutionEnvironment:
             r.append(p)
         return r
 
-    subst_target_source = subst
+    def subst_target_source(self, string, raw: int=0, target=None, source=None, conv=None, executor: Executor | None = None, overrides: dict | None = None):
+        """Substitute *string* for the targets and sources of an action.
+
+        As :meth:`subst`.  Signatures (*raw* is ``SUBST_SIG``) are
+        what an action is substituted for most, once for every target
+        it builds; only the targets and sources differ between them.
+        Once the SConscript files are read, the signature of a string
+        seen again is compiled into a template, see
+        :func:`SCons.Subst.subst_sig_template`, which just the targets
+        and sources are put into from then on.
+        """
+        if (
+            not sig_templates
+            or raw != SCons.Subst.SUBST_SIG
+            or conv is not None
+            or overrides
+            or not is_String(string)
+        ):
+            return self.subst(string, raw, target, source, conv, executor, overrides)
+
+        templates = self._sig_templates
+        changes, template = templates.get(string, (None, None))
+        if changes != _changes:
+            # Many strings are only substituted for one target.
+            templates[string] = (_changes, None)
+            return self.subst(string, raw, target, source, executor=executor)
+
+        gvars = self.gvars()
+        lvars = self.lvars()
+        lvars['__env__'] = self
+        if template is None:
+            template = SCons.Subst.subst_sig_template(string, self, gvars, lvars) or ()
+            templates[string] = (_changes, template)
+        if executor:
+            lvars.update(executor.get_lvars())
+        if template:
+            result = SCons.Subst.fill_sig_template(template, self, target, source, gvars, lvars)
+            if result is not None:
+                return result
+        return SCons.Subst.scons_subst(string, self, raw, target, source, gvars, lvars)
 
 
     def backtick(self, command) -> str:
@@ -1265,6 +1368,9 @@ class Base(SubstitutionEnvironment):
         self.ans = SCons.Node.Alias.default_ans
         self.lookup_list = SCons.Node.arg2nodes_lookups
         self._dict = semi_deepcopy(SCons.Defaults.ConstructionEnvironment)
+        self._private = set(self._dict)
+        self._shared = set()
+        self._sig_templates = {}
         self._init_special()
         self.added_methods = []
 
@@ -1489,8 +1595,16 @@ class Base(SubstitutionEnvironment):
 
         Bypasses the normal checks that occur when users try to set items.
         """
+        _changed()
+        self._private.difference_update(other)
+        self._shared.difference_update(other)
         self._dict.update(other)
 
+    def _check_private(self, key, val) -> None:
+        """Stop counting *key* as private if it was set to *val* itself."""
+        if self._dict.get(key) is val:
+            self._private.discard(key)
+
     def _update_onlynew(self, other) -> None:
         """Private method to add new items to an environment's consvar dict.
 
@@ -1499,6 +1613,7 @@ class Base(SubstitutionEnvironment):
         Bypasses the normal checks that occur when setting items through the
         public API.
         """
+        _changed()
         for k, v in other.items():
             if k not in self._dict:
                 self._dict[k] = v
@@ -1517,10 +1632,13 @@ class Base(SubstitutionEnvironment):
 
         The variable is created if it is not already present.
         """
+        _changed()
         kw = copy_non_reserved_keywords(kw)
         for key, val in kw.items():
+            self._own(key)
             if key == 'CPPDEFINES':
                 _add_cppdefines(self._dict, val)
+                self._check_private(key, val)
                 continue
 
             try:
@@ -1552,6 +1670,7 @@ class Base(SubstitutionEnvironment):
                         if orig:
                             val.insert(0, orig)
                         self._dict[key] = val
+                        self._private.discard(key)
                     else:
                         # The original is a list, so append the new
                         # value to it (if there's a value to append).
@@ -1609,6 +1728,8 @@ class Base(SubstitutionEnvironment):
               path will not be moved to the end, but left where it is.
               Default is ``True``.
         """
+        _changed()
+        self._own(envname)
         orig = ''
         if envname in self._dict and name in self._dict[envname]:
             orig = self._dict[envname][name]
@@ -1632,15 +1753,19 @@ class Base(SubstitutionEnvironment):
         move to the end; otherwise (the default) values are skipped if
         already present.
         """
+        _changed()
         kw = copy_non_reserved_keywords(kw)
         for key, val in kw.items():
+            self._own(key)
             if key == 'CPPDEFINES':
                 _add_cppdefines(self._dict, val, unique=True, delete_existing=delete_existing)
+                self._check_private(key, val)
                 continue
             if is_List(val):
                 val = _delete_duplicates(val, delete_existing)
             if key not in self._dict or self._dict[key] in ('', None):
                 self._dict[key] = val
+                self._private.discard(key)
             elif is_Dict(self._dict[key]) and is_Dict(val):
                 self._dict[key].update(val)
             elif is_List(val):
@@ -1675,6 +1800,9 @@ class Base(SubstitutionEnvironment):
         recursively of each object, except that a reference is copied when
         an object is not deep-copyable (like a function).  There are no
         references to any mutable objects in the original environment.
+        Values nothing outside the environments refers to are only copied
+        when one of the environments changes them or hands them out,
+        see :meth:`_own`.
 
         Unrecognized keyword arguments are taken as construction variable
         assignments.
@@ -1694,7 +1822,21 @@ class Base(SubstitutionEnvironment):
 
         clone = copy.copy(self)
         # BUILDERS is not safe to do a simple copy
-        clone._dict = semi_deepcopy_dict(self._dict, ['BUILDERS'])
+        clone._dict = {}
+        clone._private = set()
+        clone._shared = set()
+        clone._sig_templates = {}
+        for key, value in self._dict.items():
+            if key == 'BUILDERS' or isinstance(value, _IMMUTABLE_TYPES):
+                clone._dict[key] = value
+                continue
+            if key in self._private:
+                clone._dict[key] = value
+                clone._shared.add(key)
+            else:
+                clone._dict[key] = semi_deepcopy(value)
+            clone._private.add(key)
+        self._shared.update(clone._shared)
         clone._dict['BUILDERS'] = BuilderDict(builders, clone)
 
         # Check the methods added via AddMethod() and re-bind them to
@@ -1752,6 +1894,10 @@ class Base(SubstitutionEnvironment):
         """Decide whether a target needs to be rebuilt based on timestamp matching."""
         return dependency.changed_timestamp_match(target, prev_ni, repo_node)
 
+    def _changed_journal(self, dependency, target, prev_ni, repo_node=None) -> bool:
+        """Decide whether a target needs to be rebuilt using the change journal."""
+        return SCons.Journal.changed(dependency, target, prev_ni, repo_node)
+
     def Decider(self, function):
         """Set the decision function for whether targets need rebuilding."""
         self.cache_timestamp_newer = False
@@ -1765,6 +1911,9 @@ class Base(SubstitutionEnvironment):
             self.cache_timestamp_newer = True
         elif function == 'timestamp-match':
             function = self._changed_timestamp_match
+        elif function == 'content-timestamp-journal':
+            function = self._changed_journal
+            SCons.Journal.enable()
         elif not callable(function):
             raise UserError("Unknown Decider value %s" % repr(function))
 
@@ -1812,7 +1961,11 @@ class Base(SubstitutionEnvironment):
            Added the *as_dict* keyword arg to specify always returning a dict.
         """
         if not args:
+            self._hand_out_all()
             return self._dict
+        for key in args:
+            if key in self._private:
+                self._hand_out(key)
         if as_dict:
             return {key: self._dict[key] for key in args}
         dlist = [self._dict[key] for key in args]
@@ -1977,10 +2130,13 @@ class Base(SubstitutionEnvironment):
 
         The variable is created if it is not already present.
         """
+        _changed()
         kw = copy_non_reserved_keywords(kw)
         for key, val in kw.items():
+            self._own(key)
             if key == 'CPPDEFINES':
                 _add_cppdefines(self._dict, val, prepend=True)
+                self._check_private(key, val)
                 continue
             try:
                 orig = self._dict[key]
@@ -2016,6 +2172,7 @@ class Base(SubstitutionEnvironment):
                         if orig:
                             add_to_val(orig)
                         self._dict[key] = val
+                        self._private.discard(key)
                 continue
 
             # The original looks like a dictionary, so update it
@@ -2057,6 +2214,8 @@ class Base(SubstitutionEnvironment):
               path will not be moved to the front, but left where it is.
               Default is ``True``.
         """
+        _changed()
+        self._own(envname)
         orig = ''
         if envname in self._dict and name in self._dict[envname]:
             orig = self._dict[envname][name]
@@ -2081,15 +2240,19 @@ class Base(SubstitutionEnvironment):
         move to the front; otherwise (the default) values are skipped if
         already present.
         """
+        _changed()
         kw = copy_non_reserved_keywords(kw)
         for key, val in kw.items():
+            self._own(key)
             if key == 'CPPDEFINES':
                 _add_cppdefines(self._dict, val, unique=True, prepend=True, delete_existing=delete_existing)
+                self._check_private(key, val)
                 continue
             if is_List(val):
                 val = _delete_duplicates(val, not delete_existing)
             if key not in self._dict or self._dict[key] in ('', None):
                 self._dict[key] = val
+                self._private.discard(key)
             elif is_Dict(self._dict[key]) and is_Dict(val):
                 self._dict[key].update(val)
             elif is_List(val):
@@ -2133,6 +2296,8 @@ class Base(SubstitutionEnvironment):
             self.__setitem__('BUILDERS', kwbd)
         kw = copy_non_reserved_keywords(kw)
         self._update(semi_deepcopy(kw))
+        # The values are copies no caller holds.
+        self._private.update(kw)
         self.scanner_map_delete(kw)
 
     def ReplaceIxes(self, path, old_prefix, old_suffix, new_prefix, new_suffix):
@@ -2367,10 +2532,19 @@ class Base(SubstitutionEnvironment):
 
         Args:
             path: Path to the CacheDir directory. If ``None``, disables caching.
+                May also be a dict describing a cache tier, or a list
+                of tiers for a layered cache.
             custom_class: Optional custom CacheDir class to use.
         """
-        if path is not None:
-            path = self.subst(path)
+        def subst_tier(tier):
+            if is_Dict(tier) and 'path' in tier:
+                return dict(tier, path=self.subst(tier['path']))
+            return self.subst(tier)
+
+        if is_List(path):
+            path = [subst_tier(tier) for tier in path]
+        elif path is not None:
+            path = subst_tier(path)
         self._CacheDir_path = path
 
         if custom_class:
@@ -2794,6 +2968,7 @@ class OverrideEnvironment(Base):
         self.__dict__['__subject'] = subject
         self.__dict__['overrides'] = overrides
         self.__dict__['__deleted'] = []
+        self.__dict__['_sig_templates'] = {}
 
     # Methods that make this class act like a proxy.
 
@@ -2845,6 +3020,7 @@ class OverrideEnvironment(Base):
         # set in the override dict, so don't spend time checking for existance.
         if not key.isidentifier():
             raise UserError(f"Illegal construction variable {key!r}")
+        _changed()
         self.__dict__['overrides'][key] = value
         if key in self.__dict__['__deleted']:
             # it's no longer "deleted" if we set it
@@ -2868,6 +3044,7 @@ class OverrideEnvironment(Base):
             deleted = True
         if not deleted and key not in self.__dict__['__subject']:
             raise KeyError(key)
+        _changed()
         self.__dict__['__deleted'].append(key)
 
     def get(self, key, default=None):
@@ -2937,13 +3114,22 @@ class OverrideEnvironment(Base):
         try:
             return self.__getitem__(key)
         except KeyError:
+            _changed()
             self.__dict__['overrides'][key] = default
             return default
 
     # Overridden private construction environment methods.
 
+    def _own(self, key) -> None:
+        """Leave the copying of shared values to the subject.
+
+        A value not yet in the override is read from the subject, which
+        owns it before handing it out.
+        """
+
     def _update(self, other) -> None:
         """Update the construction variable dict with another dict."""
+        _changed()
         self.__dict__['overrides'].update(other)
 
     def _update_onlynew(self, other) -> None:
@@ -2952,6 +3138,7 @@ class OverrideEnvironment(Base):
         Unlike the .update method, if the key is already present,
         it is not replaced.
         """
+        _changed()
         for k, v in other.items():
             if k not in self.__dict__['overrides']:
                 self.__dict__['overrides'][k] = v
@@ -2970,6 +3157,7 @@ class OverrideEnvironment(Base):
 
     def Replace(self, **kw) -> None:
         """Assign new values to construction variables."""
+        _changed()
         kw = copy_non_reserved_keywords(kw)
         self.__dict__['overrides'].update(semi_deepcopy(kw))
 
@@ -602,6 +602,40 @@ class SubstitutionTestCase(unittest.TestCase):
         mystr = env.subst_target_source("$AAA ${AAA}A $BBBB $BBB")
         assert mystr == "a aA b", mystr
 
+    def test_subst_target_source_templates(self) -> None:
+        """Test subst_target_source() compiling signature templates"""
+        env = SubstitutionEnvironment(CC='cc', CCCOM='$CC -o $TARGET -c $SOURCES')
+        sig = SCons.Subst.SUBST_SIG
+        save = SCons.Environment.sig_templates
+        SCons.Environment.sig_templates = True
+        try:
+            def subst(t, s):
+                return env.subst_target_source('$CCCOM', sig, [DummyNode(t)], [DummyNode(s)])
+
+            # Compiled the second time a string is seen.
+            assert subst('a.o', 'a.c') == 'cc -o a.o -c a.c'
+            assert env._sig_templates['$CCCOM'][1] is None
+            assert subst('b.o', 'b.c') == 'cc -o b.o -c b.c'
+            template = env._sig_templates['$CCCOM'][1]
+            assert template == (('cc -o ', 'TARGET', ' -c ', 'SOURCES', ''), ()), template
+            assert subst('c.o', 'c.c') == 'cc -o c.o -c c.c'
+            # Names the template can't take fall back to substitution.
+            assert subst('d  d.o', '$d.c') == 'cc -o d d.o -c $d.c'
+
+            # Changing the environment makes it stale.
+            env['CC'] = 'gcc'
+            assert subst('e.o', 'e.c') == 'gcc -o e.o -c e.c'
+            assert subst('f.o', 'f.c') == 'gcc -o f.o -c f.c'
+
+            # An override keeps its own templates.
+            over = env.Override({'CC': 'clang'})
+            over.subst_target_source('$CCCOM', sig, [DummyNode('g.o')], [DummyNode('g.c')])
+            r = over.subst_target_source('$CCCOM', sig, [DummyNode('h.o')], [DummyNode('h.c')])
+            assert r == 'clang -o h.o -c h.c', r
+            assert subst('i.o', 'i.c') == 'gcc -o i.o -c i.c'
+        finally:
+            SCons.Environment.sig_templates = save
+
     def test_backtick(self) -> None:
         """Test the backtick() method for capturing command output"""
         env = SubstitutionEnvironment()
@@ -2079,6 +2113,51 @@ def generate(env):
             assert ('BUILDERS' in env) is False
             env2 = env.Clone()
 
+    def test_Clone_shared(self) -> None:
+        """Test that a clone only copies values when it has to"""
+        env1 = self.TestEnvironment(CPPPATH=['a'], LIBS=['m'], ENV={'P': 'x'})
+        env2 = env1.Clone()
+        self.assertIs(env2._dict['CPPPATH'], env1._dict['CPPPATH'])
+        self.assertIs(env2._dict['LIBS'], env1._dict['LIBS'])
+
+        # Changing a value copies it, in either environment.
+        env2.Append(CPPPATH=['b'])
+        env1.AppendENVPath('P', 'y')
+        self.assertEqual(env1['CPPPATH'], ['a'])
+        self.assertEqual(env2['CPPPATH'], ['a', 'b'])
+        self.assertEqual(env2['ENV'], {'P': 'x'})
+
+        # So does handing it out, which also keeps it out of later clones.
+        libs = env2['LIBS']
+        self.assertIsNot(libs, env1._dict['LIBS'])
+        env3 = env2.Clone()
+        self.assertIsNot(env3._dict['LIBS'], libs)
+        libs.append('z')
+        self.assertEqual(env1['LIBS'], ['m'])
+        self.assertEqual(env3['LIBS'], ['m'])
+        env4 = env1.Clone()
+        self.assertIsNot(env4._dict['LIBS'], env1._dict['LIBS'])
+
+        # A value set directly is the caller's, so is not shared.
+        value = ['v']
+        env1['VALUE'] = value
+        env5 = env1.Clone()
+        value.append('w')
+        self.assertEqual(env5['VALUE'], ['v'])
+
+        # Nor is a value read through Dictionary().
+        d = env5.Dictionary()
+        env6 = env5.Clone()
+        d['CPPPATH'].append('c')
+        self.assertEqual(env6['CPPPATH'], ['a'])
+
+        # Changing a value through an override of a clone leaves
+        # the value the clone shares alone.
+        env7 = env1.Clone()
+        env7.Override({'X': 1}).Append(CPPPATH=['d'])
+        env7['CPPPATH'].append('e')
+        self.assertEqual(env1['CPPPATH'], ['a'])
+
     def test_Detect(self) -> None:
         """Test Detect()ing tools"""
         test = TestCmd.TestCmd(workdir = '')
@@ -0,0 +1,641 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Change journal kept by a file watcher, for the journal Decider.
+
+``scons --watch-daemon`` runs :func:`watch`, which watches every
+directory of the project with inotify and appends the path of each
+file that changes to a journal file, kept with the other files of the
+journal in a directory of its own below the top directory.
+
+Selecting the ``content-timestamp-journal`` Decider turns it on
+(:func:`enable`): the journal is read with :func:`start`, after a
+handshake with the daemon which makes sure every change made up to
+that point has been written, and the stat() result of a source file
+which an earlier build in the same daemon session recorded, and which
+the journal shows has not been touched since, is taken from the
+records instead of the file system.  The Decider itself
+(:func:`changed`) then works like ``content-timestamp``.  The results
+a build read are saved by :func:`save` for the next one, after which
+the daemon drops the part of the journal no build needs any more.
+
+Anything which leaves the journal incomplete - no daemon running, a
+restarted daemon, an overflow of the kernel's event queue, a directory
+which could not be watched, a file reached through a symbolic link -
+makes the Decider check files as usual.
+"""
+
+from __future__ import annotations
+
+import errno
+import os
+import pickle
+import select
+import signal
+import stat
+import struct
+import sys
+import threading
+import time
+import uuid
+
+import SCons.Errors
+import SCons.Node.FS
+
+JOURNAL_DIR = '.scons_journal'
+JOURNAL_FILE = 'journal'
+MARKS_FILE = 'marks'
+SYNC_PREFIX = 'sync.'
+COMPACT_PREFIX = 'compact.'
+JOURNAL_VERSION = 2
+
+# How long a build waits for the daemon to answer, in seconds.
+sync_timeout = 5.0
+
+# The journal is a header line followed by records, one per line:
+#   C <path>   the file or directory at <path> changed
+#   D <path>   <path> could not be watched: anything below it may change
+#   !          events were lost: anything may have changed
+#   S <token>  a build synchronized with the daemon
+# Positions in the journal are counted from where it was first
+# started, so that they stay the same when the daemon compacts it.
+# The header gives the position of the start of the file, and the
+# position from which on all the changes are kept.
+_MAGIC = b'scons-journal'
+_POSITION = b'%020d'
+
+# From <sys/inotify.h>.
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM
+               | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+               | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+
+_event = struct.Struct('iIII')
+
+
+class Inotify:
+    """A minimal binding to the Linux inotify API."""
+
+    def __init__(self) -> None:
+        if not sys.platform.startswith('linux'):
+            raise SCons.Errors.UserError(
+                "--watch-daemon needs inotify, which is only available on Linux"
+            )
+        import ctypes
+        import ctypes.util
+
+        self._ctypes = ctypes
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: str) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = self._ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def read(self, timeout: float):
+        """Return the ``(wd, mask, name)`` events ready within *timeout*."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        buf = os.read(self.fd, 65536)
+        events = []
+        pos = 0
+        while pos < len(buf):
+            wd, mask, _cookie, length = _event.unpack_from(buf, pos)
+            pos += _event.size
+            name = os.fsdecode(buf[pos:pos + length].rstrip(b'\0'))
+            pos += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class Watcher:
+    """Writes the change journal for the project under *root*."""
+
+    def __init__(self, root: str, inotify: Inotify | None = None) -> None:
+        self.root = root
+        self.inotify = inotify if inotify is not None else Inotify()
+        self.session = uuid.uuid4().hex
+        self.paths = {}   # watch descriptor -> directory path
+        self.lines = []
+        self.unwatched = set()
+        self.dir = os.path.join(root, JOURNAL_DIR)
+        os.makedirs(self.dir, exist_ok=True)
+        self.path = os.path.join(self.dir, JOURNAL_FILE)
+        self.start = self.base = 0
+        self.out = None
+        self.rewrite(b'')
+
+    def header(self) -> bytes:
+        return b' '.join([_MAGIC, b'%d' % JOURNAL_VERSION,
+                          self.session.encode(), b'%d' % os.getpid(),
+                          _POSITION % self.base, _POSITION % self.start,
+                          os.fsencode(self.root)]) + b'\n'
+
+    def rewrite(self, records: bytes) -> None:
+        """Replace the journal by a new one holding *records*."""
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(self.header() + records)
+        os.replace(tmp, self.path)
+        if self.out is not None:
+            self.out.close()
+        self.out = open(self.path, 'ab')
+        self.size = self.out.tell()
+
+    def emit(self, kind: bytes, path: str | None = None) -> None:
+        if path is None:
+            self.lines.append(kind + b'\n')
+            return
+        name = os.fsencode(path)
+        if b'\n' in name:
+            # Can not be written down; count it as lost.
+            self.lines.append(b'!\n')
+            return
+        if kind == b'D':
+            self.unwatched.add(path)
+        self.lines.append(kind + b' ' + name + b'\n')
+
+    def flush(self) -> None:
+        if self.lines:
+            data = b''.join(self.lines)
+            self.out.write(data)
+            self.out.flush()
+            self.size += len(data)
+            self.lines = []
+
+    def compact(self, position: int) -> None:
+        """Drop the records before *position*, which no build needs any more.
+
+        Only the directories which could not be watched are kept from
+        them.  The records from *position* on keep their positions.
+        """
+        self.flush()
+        offset = position - self.base
+        if position <= self.start or offset > self.size:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            tail = f.read()
+        kept = b''.join(b'D ' + os.fsencode(d) + b'\n'
+                        for d in sorted(self.unwatched))
+        self.start = position
+        # The header has the same length whatever the positions are.
+        self.base = position - len(self.header()) - len(kept)
+        self.rewrite(kept + tail)
+
+    def watch_tree(self, top: str, report: bool = False) -> None:
+        """Watch *top* and the directories below it.
+
+        If *report* is true, also record every entry found as changed,
+        as for a directory which appeared after the daemon started.
+        """
+        dirs = [top]
+        while dirs:
+            d = dirs.pop()
+            try:
+                wd = self.inotify.add_watch(d)
+            except OSError as e:
+                if e.errno not in (errno.ENOENT, errno.ENOTDIR):
+                    self.emit(b'D', d)
+                continue
+            self.paths[wd] = d
+            try:
+                with os.scandir(d) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                if report:
+                    self.emit(b'C', entry.path)
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                except OSError:
+                    pass
+
+    def rewatch(self) -> None:
+        """Watch the whole tree again, after losing track of it."""
+        self.emit(b'!')
+        self.paths = {}
+        self.watch_tree(self.root)
+
+    def handle(self, wd: int, mask: int, name: str) -> bool:
+        """Record one event.  Returns false if watching must stop."""
+        if mask & IN_Q_OVERFLOW:
+            self.rewatch()
+            return True
+        if mask & IN_IGNORED:
+            self.paths.pop(wd, None)
+            return True
+        d = self.paths.get(wd)
+        if d is None:
+            return True
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            if d == self.root:
+                self.emit(b'!')
+                return False
+            # The parent directory reports the change.
+            return True
+        if d == self.dir:
+            if mask & IN_CREATE:
+                if name.startswith(SYNC_PREFIX):
+                    self.emit(b'S', name[len(SYNC_PREFIX):])
+                elif name.startswith(COMPACT_PREFIX):
+                    try:
+                        self.compact(int(name[len(COMPACT_PREFIX):]))
+                    except ValueError:
+                        pass
+            return True
+        if d == self.root and name == JOURNAL_DIR:
+            return True
+        path = os.path.join(d, name)
+        if mask & IN_ISDIR and mask & (IN_MOVED_FROM | IN_MOVED_TO):
+            # The watches below a moved directory have the wrong paths.
+            self.rewatch()
+            return True
+        self.emit(b'C', path)
+        if mask & IN_ISDIR and mask & IN_CREATE:
+            self.watch_tree(path, report=True)
+        return True
+
+    def run(self, stop: threading.Event | None = None) -> None:
+        """Record changes until interrupted, or until *stop* is set."""
+        self.watch_tree(self.root)
+        self.flush()
+        while stop is None or not stop.is_set():
+            for wd, mask, name in self.inotify.read(0.5):
+                if not self.handle(wd, mask, name):
+                    self.flush()
+                    return
+            self.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.out.close()
+        self.inotify.close()
+        # Only remove the journal if a newer daemon has not replaced it.
+        try:
+            with open(self.path, 'rb') as f:
+                header = f.readline().split(b' ', 6)
+            if header[2].decode() == self.session:
+                os.unlink(self.path)
+                for name in (MARKS_FILE, MARKS_FILE + '.tmp'):
+                    try:
+                        os.unlink(os.path.join(self.dir, name))
+                    except OSError:
+                        pass
+                os.rmdir(self.dir)
+        except (OSError, IndexError, UnicodeDecodeError):
+            pass
+
+
+def watch(root: str, stop: threading.Event | None = None) -> None:
+    """Run the watch daemon for the project under *root*."""
+    root = os.path.abspath(root)
+    watcher = Watcher(root)
+    if threading.current_thread() is threading.main_thread():
+        def terminate(signum, frame):
+            raise SystemExit(0)
+        signal.signal(signal.SIGTERM, terminate)
+    try:
+        watcher.run(stop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+class Journal:
+    """The change journal as it stood when a build started.
+
+    *position* is the position in the journal up to which all changes
+    are known, and *start* the one from which on they are.  Changes are
+    kept as the position of the last record for each path, so the
+    question "has this file changed since an earlier build synchronized
+    at position N?" needs no further reading.
+    """
+
+    def __init__(self, root: str, session: str, start: int = 0) -> None:
+        self.root = root
+        self.session = session
+        self.start = start
+        self.position = 0
+        self.changed = {}
+        self.gap = 0
+        self.unwatched = []
+        # path -> (stat result, position) seen by earlier builds, and
+        # by this one.
+        self.records = {}
+        self.seen = {}
+        self._real_root = None
+        self._real_dirs = {}
+
+    def stat(self, node):
+        """Return the stat() result for *node*, from the records if possible.
+
+        A recorded result is good if the journal has nothing for the
+        path since the build which recorded it.  Results for regular
+        files read from the file system are recorded for the next build.
+        """
+        path = node.get_abspath()
+        record = self.records.get(path)
+        if record is not None and self.unchanged_since(path, record[1]):
+            return record[0]
+        try:
+            result = node.fs.stat(path)
+        except OSError:
+            return None
+        if stat.S_ISREG(result.st_mode) and self.watched(path):
+            self.seen[path] = (result, self.position)
+        return result
+
+    def watched(self, path: str) -> bool:
+        """Return whether the daemon sees the changes to the file at *path*.
+
+        It does not follow symbolic links, so the contents of a file
+        reached through one, or in a directory reached through one,
+        can change unseen.
+        """
+        if self._real_root is None:
+            self._real_root = os.path.realpath(self.root)
+        d = os.path.dirname(path)
+        real = self._real_dirs.get(d)
+        if real is None:
+            real = self._real_dirs[d] = (
+                (d + os.sep).startswith(os.path.join(self.root, ''))
+                and os.path.realpath(d) == self._real_root + d[len(self.root):]
+            )
+        return real and not os.path.islink(path)
+
+    def unchanged_since(self, path: str, position: int) -> bool:
+        """Return whether *path* is known not to have changed since *position*."""
+        if position < self.start or position < self.gap:
+            return False
+        if self.changed.get(path, 0) > position:
+            return False
+        if not path.startswith(os.path.join(self.root, '')):
+            return False
+        for d in self.unwatched:
+            if path == d or path.startswith(os.path.join(d, '')):
+                return False
+        return True
+
+    def parse(self, data: bytes, offset: int, token: str | None = None) -> int | None:
+        """Take in the complete lines of *data*, which starts at *offset*.
+
+        Returns the number of bytes used, or ``None`` once the sync
+        record for *token* has been read (and :attr:`position` set).
+        """
+        used = 0
+        while True:
+            end = data.find(b'\n', used)
+            if end < 0:
+                return used
+            line = data[used:end]
+            used = end + 1
+            here = offset + used
+            kind, _, arg = line.partition(b' ')
+            if kind == b'C':
+                self.changed[os.fsdecode(arg)] = here
+            elif kind == b'D':
+                self.unwatched.append(os.fsdecode(arg))
+            elif kind == b'!':
+                self.gap = here
+            elif kind == b'S' and token is not None and arg.decode() == token:
+                self.position = here
+                return None
+
+
+# The journal for this build, if there is a usable one.
+journal = None
+
+# The top directory of the project, set by the main script: the journal
+# is only read once the journal Decider is selected.
+_top = None
+_started = False
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    except OSError:
+        return False
+    return True
+
+
+def set_top(top: str) -> None:
+    """Set the top directory of the project for :func:`enable`."""
+    global journal, _top, _started
+    journal = None
+    _top = os.path.abspath(top)
+    _started = False
+
+
+def _open(path: str):
+    """Open the journal at *path*.
+
+    Returns the open file, a :class:`Journal` to read it into and the
+    position of its first record, or ``None`` if there is no journal
+    kept by a live daemon.
+    """
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return None
+    header = f.readline()
+    fields = header.rstrip(b'\n').split(b' ', 6)
+    try:
+        if fields[0] != _MAGIC or int(fields[1]) != JOURNAL_VERSION:
+            raise ValueError
+        session = fields[2].decode()
+        pid = int(fields[3])
+        base = int(fields[4])
+        start = int(fields[5])
+        root = os.fsdecode(fields[6])
+    except (IndexError, ValueError, UnicodeDecodeError):
+        f.close()
+        return None
+    if not _pid_alive(pid):
+        f.close()
+        return None
+    return f, Journal(root, session, start), base + len(header)
+
+
+def start(top: str) -> Journal | None:
+    """Read the journal for the project under *top*, if a daemon keeps one.
+
+    Synchronizes with the daemon, so that every change made before
+    this call is in the journal.  Sets and returns the module-level
+    :data:`journal`, which is ``None`` if there is no usable journal.
+    """
+    global journal
+    journal = None
+    top = os.path.abspath(top)
+    path = os.path.join(top, JOURNAL_DIR, JOURNAL_FILE)
+    opened = _open(path)
+    if opened is None:
+        return None
+    f, j, offset = opened
+    if j.root != top:
+        f.close()
+        return None
+    token = uuid.uuid4().hex
+    sync = os.path.join(top, JOURNAL_DIR, SYNC_PREFIX + token)
+    try:
+        open(sync, 'x').close()
+    except OSError:
+        f.close()
+        return None
+    try:
+        data = b''
+        deadline = time.monotonic() + sync_timeout
+        while True:
+            data += f.read()
+            used = j.parse(data, offset, token)
+            if used is None:
+                break
+            data = data[used:]
+            offset += used
+            if time.monotonic() > deadline:
+                return None
+            try:
+                replaced = os.stat(path).st_ino != os.fstat(f.fileno()).st_ino
+            except OSError:
+                return None
+            if replaced:
+                # The daemon compacted the journal: read the new one,
+                # which has all that is needed from the old one.
+                f.close()
+                opened = _open(path)
+                if opened is None:
+                    return None
+                f, j, offset = opened
+                data = b''
+            else:
+                time.sleep(0.005)
+    finally:
+        f.close()
+        try:
+            os.unlink(sync)
+        except OSError:
+            pass
+
+    try:
+        with open(os.path.join(top, JOURNAL_DIR, MARKS_FILE), 'rb') as f:
+            marks = pickle.load(f)
+        if marks['version'] == JOURNAL_VERSION and marks['session'] == j.session:
+            j.records = marks['records']
+    except Exception:
+        pass
+    journal = j
+    return j
+
+
+def save() -> None:
+    """Save the stat() results this build read for the next one.
+
+    The records still good are saved as of the position of this build,
+    so the daemon is then asked to drop the journal before it.
+    """
+    j = journal
+    if j is None or not j.seen:
+        return
+    records = {path: (result, j.position)
+               for path, (result, position) in j.records.items()
+               if j.unchanged_since(path, position)}
+    records.update(j.seen)
+    path = os.path.join(j.root, JOURNAL_DIR, MARKS_FILE)
+    tmp = path + '.tmp'
+    try:
+        with open(tmp, 'wb') as f:
+            pickle.dump({'version': JOURNAL_VERSION, 'session': j.session,
+                         'records': records}, f,
+                        pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        # The name is all the daemon needs.
+        request = os.path.join(j.root, JOURNAL_DIR, COMPACT_PREFIX + '%d' % j.position)
+        open(request, 'x').close()
+        os.unlink(request)
+    except OSError:
+        pass
+
+
+def enable() -> None:
+    """Serve the stat() results of source files from the journal.
+
+    Called when the journal Decider is selected; the first call reads
+    the journal.  Does nothing if there is no usable journal, in which
+    case files are checked as usual.
+    """
+    global _started
+    if not _started and _top is not None:
+        _started = True
+        start(_top)
+    if journal is not None:
+        SCons.Node.FS.stat_journal = journal
+
+
+def changed(dependency, target, prev_ni, repo_node=None) -> bool:
+    """Decide whether *dependency* changed, like ``content-timestamp``.
+
+    The journal does its work underneath: the timestamp of a source
+    file known not to have changed comes from the journal's records
+    instead of the file system.
+    """
+    return dependency.changed_timestamp_then_content(target, prev_ni, repo_node)
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,239 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+import sys
+import threading
+import unittest
+
+import TestCmd
+
+import SCons.Journal
+import SCons.Node.FS
+
+
+class JournalTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd.TestCmd(workdir='')
+        self.root = os.path.realpath(self.test.workpath(''))
+
+    def tearDown(self) -> None:
+        SCons.Journal.journal = None
+        SCons.Journal._top = None
+        SCons.Journal._started = False
+        SCons.Node.FS.stat_journal = None
+
+    def path(self, name) -> str:
+        return os.path.join(self.root, name)
+
+    def journal_path(self) -> str:
+        return os.path.join(self.root, SCons.Journal.JOURNAL_DIR,
+                            SCons.Journal.JOURNAL_FILE)
+
+    def test_parse(self) -> None:
+        """Test reading journal records"""
+        j = SCons.Journal.Journal(self.root, 'session')
+        data = ("C %s\nS other\nC %s\nS token\nC %s\n"
+                % (self.path('a'), self.path('b'), self.path('c'))).encode()
+        assert j.parse(data, 100, 'token') is None
+        sync = 100 + data.index(b'S token') + len(b'S token\n')
+        assert j.position == sync, j.position
+        assert self.path('c') not in j.changed
+
+        assert j.unchanged_since(self.path('a'), j.changed[self.path('a')])
+        assert not j.unchanged_since(self.path('b'), j.changed[self.path('a')])
+        assert j.unchanged_since(self.path('b'), sync)
+        assert j.unchanged_since(self.path('x'), 0)
+        assert not j.unchanged_since('/elsewhere/x', sync)
+
+        # An incomplete line is left for later.
+        j = SCons.Journal.Journal(self.root, 'session')
+        assert j.parse(b'C /x\nC /y', 0, 'token') == 5
+        assert '/y' not in j.changed
+
+    def test_gaps(self) -> None:
+        """Test that lost events and unwatched directories count as changes"""
+        j = SCons.Journal.Journal(self.root, 'session')
+        data = ("S one\n!\nD %s\nS two\n" % self.path('sub')).encode()
+        j.parse(data, 0, 'two')
+        first = len(b'S one\n')
+        assert not j.unchanged_since(self.path('a'), first)
+        assert j.unchanged_since(self.path('a'), j.position)
+        assert not j.unchanged_since(self.path('sub'), j.position)
+        assert not j.unchanged_since(os.path.join(self.path('sub'), 'a'), j.position)
+        assert j.unchanged_since(self.path('subx'), j.position)
+
+    def test_stat(self) -> None:
+        """Test serving stat() results from the records"""
+        self.test.write('a', "a\n")
+        self.test.write('b', "b\n")
+        fs = SCons.Node.FS.FS(self.root)
+        j = SCons.Journal.Journal(self.root, 'session')
+        j.parse(("S one\nC %s\nS two\n" % self.path('b')).encode(), 0, 'two')
+        fake = os.stat(self.path('a'))
+        fake = os.stat_result((fake.st_mode,) + (0,) * 9)
+        j.records = {self.path('a'): (fake, 6), self.path('b'): (fake, 6)}
+        SCons.Node.FS.stat_journal = j
+
+        a = fs.File('a')
+        assert a.stat() is fake
+        # b changed after it was recorded.
+        b = fs.File('b')
+        assert b.stat().st_size == 2
+        assert j.seen[self.path('b')][1] == j.position
+        # Only source files are looked up.
+        t = fs.File('t')
+        t.builder_set(object())
+        assert t.stat() is None
+
+    def test_stat_symlink(self) -> None:
+        """Test that files reached through symbolic links are not recorded"""
+        if not hasattr(os, 'symlink'):
+            self.skipTest("no symbolic links")
+        self.test.subdir('sub')
+        self.test.write(['sub', 'a'], "a\n")
+        os.symlink('sub', self.path('dlink'))
+        os.symlink(os.path.join('sub', 'a'), self.path('flink'))
+        fs = SCons.Node.FS.FS(self.root)
+        j = SCons.Journal.Journal(self.root, 'session')
+        SCons.Node.FS.stat_journal = j
+
+        for name in ('sub/a', 'dlink/a', 'flink'):
+            assert fs.File(name).stat().st_size == 2
+        assert list(j.seen) == [os.path.join(self.path('sub'), 'a')], j.seen
+
+    def test_start_no_daemon(self) -> None:
+        """Test that there is no journal without a live daemon"""
+        assert SCons.Journal.start(self.root) is None
+        self.test.subdir(SCons.Journal.JOURNAL_DIR)
+        self.test.write(self.journal_path(),
+                        "scons-journal 2 session 999999999 0 0 %s\n" % self.root)
+        assert SCons.Journal.start(self.root) is None
+        self.test.write(self.journal_path(), "garbage\n")
+        assert SCons.Journal.start(self.root) is None
+        SCons.Journal.set_top(self.root)
+        SCons.Journal.enable()
+        assert SCons.Journal._started
+        assert SCons.Node.FS.stat_journal is None
+
+    def test_compact(self) -> None:
+        """Test that compacting the journal keeps the positions of the records"""
+        class FakeInotify:
+            def add_watch(self, path) -> int:
+                return 1
+            def close(self) -> None:
+                pass
+
+        w = SCons.Journal.Watcher(self.root, FakeInotify())
+        try:
+            w.emit(b'C', self.path('a'))
+            w.emit(b'D', self.path('sub'))
+            w.emit(b'S', 'one')
+            w.emit(b'C', self.path('b'))
+            w.emit(b'S', 'two')
+            w.flush()
+
+            def read(token):
+                f, j, offset = SCons.Journal._open(self.journal_path())
+                with f:
+                    assert j.parse(f.read(), offset, token) is None
+                return j
+
+            one = read('one').position
+            before = read('two')
+            size = os.path.getsize(self.journal_path())
+            w.compact(one)
+            assert os.path.getsize(self.journal_path()) < size
+            after = read('two')
+            assert after.start == one, (after.start, one)
+            assert after.position == before.position
+            b = self.path('b')
+            assert after.changed[b] == before.changed[b], after.changed
+            assert self.path('a') not in after.changed
+            assert after.unwatched == [self.path('sub')], after.unwatched
+            assert not after.unchanged_since(self.path('x'), one - 1)
+            assert after.unchanged_since(self.path('x'), one)
+
+            # Records added after compacting keep counting on.
+            w.compact(one)
+            w.emit(b'C', self.path('c'))
+            w.emit(b'S', 'three')
+            w.flush()
+            three = read('three')
+            assert three.position > after.position
+            assert three.changed[b] == before.changed[b], three.changed
+        finally:
+            w.close()
+        assert not os.path.exists(self.path(SCons.Journal.JOURNAL_DIR))
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "needs inotify")
+    def test_watch(self) -> None:
+        """Test a watch daemon and builds synchronizing with it"""
+        self.test.subdir('sub')
+        self.test.write(['sub', 'a'], "a\n")
+        stop = threading.Event()
+        daemon = threading.Thread(target=SCons.Journal.watch, args=(self.root, stop))
+        daemon.start()
+        try:
+            for _ in range(1000):
+                if os.path.exists(self.journal_path()):
+                    break
+                stop.wait(0.01)
+            j = SCons.Journal.start(self.root)
+            assert j is not None
+            assert SCons.Journal.journal is j
+            first = j.position
+
+            self.test.write(['sub', 'a'], "a 2\n")
+            self.test.subdir('new')
+            self.test.write(['new', 'b'], "b\n")
+            j = SCons.Journal.start(self.root)
+            assert j is not None
+            assert j.position > first
+            a = os.path.join(self.path('sub'), 'a')
+            assert not j.unchanged_since(a, first), j.changed
+            assert not j.unchanged_since(self.path('new'), first), j.changed
+            assert j.unchanged_since(a, j.position)
+
+            # Records are kept for the rest of the session, and the
+            # journal before them is dropped.
+            fs = SCons.Node.FS.FS(self.root)
+            SCons.Journal.enable()
+            assert fs.File(a).stat().st_size == 4
+            SCons.Journal.save()
+            saved = j.position
+            j = SCons.Journal.start(self.root)
+            assert a in j.records, j.records
+            assert j.start == saved, (j.start, saved)
+            assert j.unchanged_since(a, j.records[a][1])
+        finally:
+            stop.set()
+            daemon.join()
+        assert not os.path.exists(self.path(SCons.Journal.JOURNAL_DIR))
+        assert SCons.Journal.start(self.root) is None
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -40,7 +40,8 @@ import shutil
 import stat
 import sys
 import time
-from itertools import chain
+from array import array
+from operator import attrgetter
 from typing import TYPE_CHECKING, Any, Callable
 
 import SCons.Action
@@ -104,6 +105,11 @@ class EntryProxyAttributeError(AttributeError):
 # any file that's been untouched for more than two days.
 default_max_drift = 2*24*60*60
 
+# While a change journal is in use (see SCons.Journal), the stat() results
+# of source files are looked up through it, so a file which is known not
+# to have changed need not be looked at.
+stat_journal = None
+
 #
 # We stringify these file system Nodes a lot.  Turning a file system Node
 # into a string is non-trivial, because the final string representation
@@ -642,7 +648,8 @@ class Base(SCons.Node.Node):
         self._labspath = ""
         self._path = ""
         self._tpath = ""
-        self._path_elements: list[DirNode] = []
+        # Only a Dir keeps a list, see get_path_elements().
+        self._path_elements = ()
 
         self.dir: DirNode = directory
         self.cwd: DirNode | None = None # will hold the SConscript directory for target nodes
@@ -753,10 +760,13 @@ class Base(SCons.Node.Node):
             return self._memo['stat']
         except KeyError:
             pass
-        try:
-            result = self.fs.stat(self.get_abspath())
-        except os.error:
-            result = None
+        if stat_journal is not None and not self.has_builder():
+            result = stat_journal.stat(self)
+        else:
+            try:
+                result = self.fs.stat(self.get_abspath())
+            except os.error:
+                result = None
 
         self._memo['stat'] = result
         return result
@@ -2480,29 +2490,47 @@ class RootDir(Dir):
         invocation to find or create the parent directory or directories.
         """
         k = _my_normcase(p)
+        lookup = self._lookupDict
+        result = lookup.get(k)
+        if result is not None:
+            # There is already a Node for this path name.  Allow it to
+            # complain if we were looking for an inappropriate type.
+            result.must_be_same(klass)
+            return result
+
+        # Only directories are kept in the lookup dictionary, so that
+        # each file does not hold on to another copy of its full path:
+        # other nodes are found through the entries of their directory.
+        dir_key, name = k.rsplit('/', 1)
+        dir_node = lookup.get(dir_key)
+        if dir_node is None:
+            if create:
+                dir_node = self._lookup_abs(p.rsplit('/', 1)[0], Dir)
+            else:
+                try:
+                    dir_node = self._lookup_abs(p.rsplit('/', 1)[0], Entry, create=False)
+                except SCons.Errors.UserError:
+                    pass
         try:
-            result = self._lookupDict[k]
-        except KeyError:
+            result = dir_node.entries[name]
+        except (AttributeError, KeyError):
             if not create:
                 msg = "No such file or directory: '%s' in '%s' (and create is False)" % (p, str(self))
                 raise SCons.Errors.UserError(msg)
             # There is no Node for this path name, and we're allowed
             # to create it.
-            dir_name, file_name = p.rsplit('/', 1)
-            dir_node = self._lookup_abs(dir_name, Dir)
-            result = klass(file_name, dir_node, self.fs)
+            result = klass(p.rsplit('/', 1)[1], dir_node, self.fs)
 
             # Double-check on disk (as configured) that the Node we
             # created matches whatever is out there in the real world.
             result.diskcheck_match()
 
-            self._lookupDict[k] = result
-            dir_node.entries[_my_normcase(file_name)] = result
+            dir_node.entries[name] = result
             dir_node.implicit = None
         else:
-            # There is already a Node for this path name.  Allow it to
-            # complain if we were looking for an inappropriate type.
             result.must_be_same(klass)
+        if klass is Dir:
+            lookup[k] = result
         return result
 
     def __str__(self) -> str:
@@ -2564,6 +2592,206 @@ class FileNodeInfo(SCons.Node.NodeInfoBase):
         return not self.__eq__(other)
 
 
+# The dependency lists of a FileBuildInfo, in the order they are packed.
+_dependency_attrs = ('bsources', 'bsourcesigs', 'bdepends', 'bdependsigs',
+                     'bimplicit', 'bimplicitsigs')
+
+# Packed build info refers to dependencies by their index in this table
+# of (path, fields, csig, timestamp, size) records, so each is held once
+# however many targets depend on it.  fields tells which of the NodeInfo
+# fields are set; csig is kept as raw bytes rather than a hex string.
+_dependency_records: list[tuple] = []
+_dependency_record_ids: dict[tuple, int] = {}
+# Maps (path, id(NodeInfo)) to (NodeInfo, its fields, record index).
+_dependency_record_cache: dict[tuple, tuple] = {}
+_ninfo_fields = attrgetter('csig', 'timestamp', 'size')
+# The NodeInfo made from each record, shared like those read from a
+# .sconsign file; they are not changed once made.
+_dependency_ninfos: dict[int, FileNodeInfo] = {}
+
+
+def _cache_record(key: tuple, ni: FileNodeInfo, record_id: int) -> None:
+    try:
+        _dependency_record_cache[key] = (ni, _ninfo_fields(ni), record_id)
+    except AttributeError:
+        pass
+
+
+def _dependency_record_id(record: tuple) -> int:
+    try:
+        return _dependency_record_ids[record]
+    except KeyError:
+        i = _dependency_record_ids[record] = len(_dependency_records)
+        _dependency_records.append(record)
+        return i
+
+
+class PackedDependencies:
+    """The dependency lists of a :class:`FileBuildInfo` in compact form.
+
+    Build info holds a path and a NodeInfo for every dependency of its
+    target, which as Python objects take a hundred bytes or more each,
+    repeated for each target.  Packed, each dependency is an index into
+    a shared table of records (see ``_dependency_records``), four bytes
+    in an array.  NodeInfo other than a plain FileNodeInfo is kept as
+    it is.  The lists are rebuilt when asked for.
+    """
+
+    __slots__ = ('counts', 'ids', 'others')
+
+    # Bits in the fields value of a record.
+    CSIG, TIMESTAMP, SIZE = 1, 2, 4
+
+    @classmethod
+    def pack(cls, binfo: FileBuildInfo) -> PackedDependencies | None:
+        """Return the packed dependency lists of *binfo*.
+
+        Returns ``None`` if they can not be packed, as when they hold
+        Nodes rather than the path strings stored in .sconsign.
+        """
+        try:
+            lists = [object.__getattribute__(binfo, attr) for attr in _dependency_attrs]
+        except AttributeError:
+            return None
+        counts = (len(lists[0]), len(lists[2]), len(lists[4]))
+        if counts != (len(lists[1]), len(lists[3]), len(lists[5])):
+            return None
+        kids = lists[0] + lists[2] + lists[4]
+        for kid in kids:
+            if type(kid) is not str:
+                return None
+        sigs = lists[1] + lists[3] + lists[5]
+
+        self = cls()
+        self.counts = counts
+        self.others = None
+        # The same NodeInfo objects recur across the targets in a build
+        # (or a .sconsign file), so their records are cached, checking
+        # that the NodeInfo has not changed since.
+        cache = _dependency_record_cache
+        keys = list(zip(kids, map(id, sigs)))
+        hits = map(cache.get, keys)
+        try:
+            fields = list(map(_ninfo_fields, sigs))
+        except AttributeError:
+            ids = [-1] * len(keys)
+        else:
+            ids = [hit[2] if hit is not None and hit[0] is ni and hit[1] == f else -1
+                   for hit, ni, f in zip(hits, sigs, fields)]
+        if len(cache) > 100000:
+            cache.clear()
+        others = {}
+        for i, record_id in enumerate(ids):
+            if record_id >= 0:
+                continue
+            path, ni = kids[i], sigs[i]
+            record = cls.record(path, ni)
+            if record is None:
+                others[i] = ni
+                record_id = _dependency_record_id((path, 0, None, None, None))
+            else:
+                record_id = _dependency_record_id(record)
+                _cache_record(keys[i], ni, record_id)
+            ids[i] = record_id
+        self.ids = array('I', ids)
+        self.others = others or None
+        return self
+
+    @classmethod
+    def record(cls, path: str, ni) -> tuple | None:
+        """Return the record for a dependency, or None if *ni* does not fit."""
+        if type(ni) is not FileNodeInfo:
+            return None
+        fields = 0
+        csig = timestamp = size = None
+        if hasattr(ni, 'csig'):
+            try:
+                csig = bytes.fromhex(ni.csig)
+            except (TypeError, ValueError):
+                return None
+            if csig.hex() != ni.csig:
+                return None
+            fields |= cls.CSIG
+        if hasattr(ni, 'timestamp'):
+            timestamp = ni.timestamp
+            fields |= cls.TIMESTAMP
+        if hasattr(ni, 'size'):
+            size = ni.size
+            fields |= cls.SIZE
+        try:
+            hash((timestamp, size))
+        except TypeError:
+            return None
+        return (sys.intern(path), fields, csig, timestamp, size)
+
+    def __getstate__(self):
+        # The table is local to this process; store the records.
+        records = _dependency_records
+        return (self.counts, [records[i] for i in self.ids], self.others)
+
+    def __setstate__(self, state) -> None:
+        self.counts, records, self.others = state
+        self.ids = array('I', map(_dependency_record_id, records))
+
+    @classmethod
+    def from_ids(cls, counts: tuple, ids: array) -> PackedDependencies:
+        """Return packed lists of the dependencies with record *ids*."""
+        self = cls()
+        self.counts = counts
+        self.ids = ids
+        self.others = None
+        return self
+
+    # The record table is shared with the binary .sconsign encoding.
+    record_id = staticmethod(_dependency_record_id)
+
+    @staticmethod
+    def get_record(i: int) -> tuple:
+        return _dependency_records[i]
+
+    def kids(self) -> list[str]:
+        records = _dependency_records
+        return [records[i][0] for i in self.ids]
+
+    def sigs(self) -> list[SCons.Node.NodeInfoBase]:
+        ninfos = _dependency_ninfos
+        try:
+            result = [ninfos[i] for i in self.ids]
+        except KeyError:
+            result = [ninfos.get(i) or self.ninfo(i) for i in self.ids]
+        if self.others:
+            for n, ni in self.others.items():
+                result[n] = ni
+        return result
+
+    @classmethod
+    def ninfo(cls, i: int) -> FileNodeInfo:
+        """Return the NodeInfo for record *i*, making it if needed."""
+        path, fields, csig, timestamp, size = _dependency_records[i]
+        ni = FileNodeInfo()
+        if fields & cls.CSIG:
+            ni.csig = csig.hex()
+        if fields & cls.TIMESTAMP:
+            ni.timestamp = timestamp
+        if fields & cls.SIZE:
+            ni.size = size
+        _dependency_ninfos[i] = ni
+        _cache_record((path, id(ni)), ni, i)
+        return ni
+
+    def lists(self) -> list[list]:
+        """Return the six dependency lists, in ``_dependency_attrs`` order."""
+        kids = self.kids()
+        sigs = self.sigs()
+        result = []
+        start = 0
+        for count in self.counts:
+            result.append(kids[start:start + count])
+            result.append(sigs[start:start + count])
+            start += count
+        return result
+
+
 class FileBuildInfo(SCons.Node.BuildInfoBase):
     """
     This is info loaded from sconsign.
@@ -2578,9 +2806,19 @@ class FileBuildInfo(SCons.Node.BuildInfoBase):
             by order they appeared in bdepends, bsources, or bimplicit,
             and so a change in order or count of any of these could
             yield writing wrong csig, and then false positive rebuilds
+        packed : The dependency lists (bsources, bsourcesigs, and so on)
+            in compact form, see PackedDependencies.  Build info is kept
+            packed from being read until the lists themselves are used,
+            which expands them; up-to-date checks work from the packed
+            form through get_bkids() and get_bkidsigs().
     """
-    __slots__ = ['dependency_map', ]
-    current_version_id = 2
+    __slots__ = ['dependency_map', 'packed']
+    current_version_id = 3
+
+    def __init__(self) -> None:
+        object.__setattr__(self, 'dependency_map', None)
+        object.__setattr__(self, 'packed', None)
+        super().__init__()
 
     def __setattr__(self, key: str, value: Any | None) -> None:
 
@@ -2588,11 +2826,95 @@ class FileBuildInfo(SCons.Node.BuildInfoBase):
         # invalidate the cached map of file name to content signature
         # heald in dependency_map. Currently only used with
         # MD5-timestamp decider
-        if key != 'dependency_map' and hasattr(self, 'dependency_map'):
-            del self.dependency_map
+        if key != 'dependency_map':
+            object.__setattr__(self, 'dependency_map', None)
+
+            # Changing one dependency list means the others must be
+            # real lists too.
+            if key in _dependency_attrs and self.packed is not None:
+                self.unpack()
 
         return super().__setattr__(key, value)
 
+    def __getattr__(self, name: str):
+        # Only called for attributes which are not set: expand packed
+        # dependency lists on first use.
+        if name in _dependency_attrs and self.packed is not None:
+            self.unpack()
+            return object.__getattribute__(self, name)
+        raise AttributeError(
+            "'%s' object has no attribute '%s'" % (type(self).__name__, name)
+        )
+
+    def unpack(self) -> None:
+        """Expand the packed dependency lists into real lists."""
+        packed = self.packed
+        object.__setattr__(self, 'packed', None)
+        for attr, value in zip(_dependency_attrs, packed.lists()):
+            object.__setattr__(self, attr, value)
+
+    def get_bkids(self) -> list:
+        if self.packed is None:
+            return super().get_bkids()
+        return self.packed.kids()
+
+    def get_bkidsigs(self) -> list[SCons.Node.NodeInfoBase]:
+        if self.packed is None:
+            return super().get_bkidsigs()
+        return self.packed.sigs()
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Return the fields to pickle, with the dependency lists packed.
+
+        Lists which can not be packed (they hold Nodes) are returned as
+        they are.
+        """
+        packed = self.packed
+        if packed is None:
+            packed = PackedDependencies.pack(self)
+        state = {}
+        for obj in type(self).mro():
+            for name in getattr(obj, '__slots__', ()):
+                if name in ('__weakref__', 'dependency_map', 'packed'):
+                    continue
+                if packed is not None and name in _dependency_attrs:
+                    continue
+                try:
+                    state[name] = object.__getattribute__(self, name)
+                except AttributeError:
+                    pass
+        if packed is not None:
+            state['packed'] = packed
+        state['_version_id'] = self.current_version_id
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        object.__setattr__(self, 'dependency_map', None)
+        # The state replaces the dependency lists in whichever form
+        # they are held now.
+        object.__setattr__(self, 'packed', None)
+        for attr in _dependency_attrs:
+            if attr in state:
+                break
+        else:
+            packed = state.pop('packed', None)
+            if packed is not None:
+                for attr in _dependency_attrs:
+                    try:
+                        object.__delattr__(self, attr)
+                    except AttributeError:
+                        pass
+                object.__setattr__(self, 'packed', packed)
+            super().__setstate__(state)
+            return
+        super().__setstate__(state)
+        # Build info in the older format is packed once it is read.
+        packed = PackedDependencies.pack(self)
+        if packed is not None:
+            for attr in _dependency_attrs:
+                object.__delattr__(self, attr)
+            object.__setattr__(self, 'packed', packed)
+
     def convert_to_sconsign(self) -> None:
         """
         Converts this FileBuildInfo object for writing to a .sconsign file
@@ -2601,6 +2923,9 @@ class FileBuildInfo(SCons.Node.BuildInfoBase):
         usual string representation: relative to the top-level SConstruct
         directory, or an absolute path if it's outside.
         """
+        if self.packed is not None:
+            # Read from .sconsign and not changed since: already strings.
+            return
         if os_sep_is_slash:
             node_to_str = str
         else:
@@ -3163,7 +3488,8 @@ class File(Base):
             # exists or is a link (which would mean it's a dangling
             # link) then we should remove it as appropriate.
             if self.exists() or self.islink():
-                if self.is_derived() and not self.precious:
+                # A target already retrieved from cache is left alone.
+                if self.is_derived() and not self.precious and not self.cached:
                     self._rmv_existing()
             else:
                 try:
@@ -3357,12 +3683,11 @@ class File(Base):
 
         # For an "empty" binfo properties like bsources
         # do not exist: check this to avoid exception.
-        if (len(binfo.bsourcesigs) + len(binfo.bdependsigs) +
-            len(binfo.bimplicitsigs)) == 0:
+        signatures = binfo.get_bkidsigs()
+        if len(signatures) == 0:
             return {}
 
-        binfo.dependency_map = { child:signature for child, signature in zip(chain(binfo.bsources, binfo.bdepends, binfo.bimplicit),
-                                     chain(binfo.bsourcesigs, binfo.bdependsigs, binfo.bimplicitsigs))}
+        binfo.dependency_map = dict(zip(binfo.get_bkids(), signatures))
 
         return binfo.dependency_map
 
@@ -3486,9 +3811,8 @@ class File(Base):
         # Now get sconsign name -> csig map and then get proper prev_ni if possible
         bi = node.get_stored_info().binfo
         rebuilt = False
-        try:
-            dependency_map = bi.dependency_map
-        except AttributeError:
+        dependency_map = getattr(bi, 'dependency_map', None)
+        if dependency_map is None:
             dependency_map = self._build_dependency_map(bi)
             rebuilt = True
 
@@ -3547,6 +3871,11 @@ class File(Base):
         """
         T = False
         if T: Trace('is_up_to_date(%s):' % self)
+        if self.cached:
+            # Retrieved from cache before the build (see
+            # SCons.CacheDir.prefetch), but not yet recorded as built.
+            if T: Trace(' self.cached\n')
+            return False
         if not self.exists():
             if T: Trace(' not self.exists():')
             # The file (always a target) doesn't exist locally...
@@ -3655,8 +3984,8 @@ class File(Base):
             pass
 
         cache = self.get_build_env().get_CacheDir()
-        cachedir, cachefile = cache.cachepath(self)
-        if not self.exists() and cachefile and os.path.exists(cachefile):
+        tier, cachefile = cache.lookup(self)
+        if not self.exists() and cachefile:
             self.cachedir_csig = cache.get_cachedir_csig(self)
         else:
             self.cachedir_csig = self.get_csig()
@@ -3824,6 +4153,141 @@ class FileFinder:
 find_file = FileFinder().find_file
 
 
+# How much hashing the prefetch pass does for a source file, by the
+# Decider of the targets depending on it.
+_PREFETCH_NONE, _PREFETCH_STAT, _PREFETCH_CHANGED, _PREFETCH_CONTENT = range(4)
+
+
+def _prefetch_policy(env) -> int:
+    import SCons.Defaults
+    import SCons.Environment
+
+    decide = getattr(env, 'decide_source', None)
+    if decide is SCons.Environment.default_decide_source:
+        decide = SCons.Defaults.DefaultEnvironment().decide_source
+    # The built-in deciders are methods of the environment; compare the
+    # functions, as a user-supplied one may have the same name.
+    func = getattr(decide, '__func__', None)
+    Base = SCons.Environment.Base
+    if func is Base._changed_content:
+        # Needs the content signature, unless a stored one is still good.
+        return _PREFETCH_CONTENT
+    if func is Base._changed_timestamp_newer or func is Base._changed_timestamp_match:
+        return _PREFETCH_STAT
+    if func is Base._changed_journal:
+        # The change journal decides which files need looking at.
+        return _PREFETCH_NONE
+    # content-timestamp, or a user-supplied function: hash the files
+    # whose timestamp or size changed.
+    return _PREFETCH_CHANGED
+
+
+def _source_files(targets) -> dict[Dir, dict[File, int]]:
+    """Collect the source files below *targets*, grouped by directory.
+
+    Only the dependencies already known are followed (no scanning), and
+    only plain local source files are returned: Files without a builder
+    which are their own source node, so looking at them can not trigger
+    a variant-directory copy or a repository search.  Each is mapped to
+    the prefetch policy of the targets depending on it.
+    """
+    by_dir = {}
+    policies = {}
+    seen = set()
+    stack = [(node, _PREFETCH_CHANGED) for node in targets]
+    while stack:
+        node, policy = stack.pop()
+        if isinstance(node, File) and not node.has_builder() \
+                and node.srcnode() is node:
+            if policy != _PREFETCH_NONE:
+                files = by_dir.setdefault(node.dir, {})
+                files[node] = max(policy, files.get(node, _PREFETCH_STAT))
+            continue
+        if node in seen:
+            continue
+        seen.add(node)
+        if isinstance(node, Dir):
+            # A directory's contents are only its children once scanned.
+            stack.extend((child, policy) for name, child in node.entries.items()
+                         if name not in ('.', '..'))
+            continue
+        if node.has_builder():
+            try:
+                env = node.get_build_env()
+            except Exception:
+                pass
+            else:
+                try:
+                    policy = policies[id(env)]
+                except KeyError:
+                    policy = policies[id(env)] = _prefetch_policy(env)
+        stack.extend((child, policy) for child in node.children(scan=0))
+    return by_dir
+
+
+def prefetch_signatures(targets, num_workers: int) -> None:
+    """Stat and hash the source files below *targets* ahead of a build.
+
+    The Taskmaster otherwise stats and hashes the source files one at a
+    time on the scheduling thread as it visits them.  This pre-pass
+    stats them a directory at a time with :func:`os.scandir`, and hashes
+    the ones the Decider will need a new content signature for, in a
+    pool of *num_workers* threads; reading and hashing release the GIL,
+    so the I/O overlaps.  The results are left in the usual memoized
+    values, so the build proceeds exactly as it would have otherwise.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    by_dir = _source_files(targets)
+    if not by_dir:
+        return
+
+    # Reading .sconsign data is not thread-safe; do it up front.
+    for files in by_dir.values():
+        for node in files:
+            node.get_stored_info()
+
+    def scan_dir(d, files):
+        """Stat *files* in *d*; return the ones that need hashing."""
+        try:
+            with d.fs.scandir(d.get_abspath()) as it:
+                entries = {e.name: e for e in it}
+        except OSError:
+            return []
+        changed = []
+        for node, policy in files.items():
+            st = node._memo.get('stat')
+            if st is None:
+                entry = entries.get(node.name)
+                if entry is None:
+                    # Leave it to the normal lookup: it may be in a
+                    # repository, or differ only in case.
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+            if not stat.S_ISREG(st.st_mode):
+                continue
+            node._memo['stat'] = st
+            if policy == _PREFETCH_CONTENT:
+                if not node.get_max_drift_csig():
+                    changed.append(node)
+            elif policy == _PREFETCH_CHANGED:
+                ninfo = node.get_stored_info().ninfo
+                if (getattr(ninfo, 'timestamp', None) != st[stat.ST_MTIME]
+                        or getattr(ninfo, 'size', None) != st.st_size):
+                    changed.append(node)
+        return changed
+
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        scans = [pool.submit(scan_dir, d, files) for d, files in by_dir.items()]
+        hashes = [pool.submit(node.get_csig)
+                  for scan in scans for node in scan.result()]
+        for h in hashes:
+            h.result()
+
+
 def invalidate_node_memos(targets: list[Base | str]) -> None:
     """
     Invalidate the memoized values of all Nodes (files or directories)
@@ -26,6 +26,7 @@ from __future__ import annotations
 import SCons.compat
 import os
 import os.path
+import pickle
 import sys
 import time
 import unittest
@@ -855,6 +856,59 @@ class FileBuildInfoTestCase(_tempdirTestCase):
         format = bi1.format()
         assert format == expect, (repr(expect), repr(format))
 
+    def test_packed(self) -> None:
+        """Test packing the dependency lists"""
+        def ninfo(csig, timestamp, size):
+            ni = SCons.Node.FS.FileNodeInfo()
+            ni.csig = csig
+            ni.timestamp = timestamp
+            ni.size = size
+            return ni
+
+        s1sig = ninfo('0123456789abcdef', 1, 10)
+        d1sig = ninfo('fedcba9876543210', 2, 20)
+        odd = ninfo('not hex', 3, 30)
+        bi = SCons.Node.FS.FileBuildInfo()
+        bi.bsources = ['s1']
+        bi.bsourcesigs = [s1sig]
+        bi.bdepends = ['d1', 'd2']
+        bi.bdependsigs = [d1sig, odd]
+        bi.bimplicit = []
+        bi.bimplicitsigs = []
+        bi.bactsig = 'actionsig'
+
+        bi2 = pickle.loads(pickle.dumps(bi))
+        assert bi2.packed is not None
+        assert bi2.bactsig == 'actionsig', bi2.bactsig
+        assert bi2.get_bkids() == ['s1', 'd1', 'd2'], bi2.get_bkids()
+        sigs = bi2.get_bkidsigs()
+        assert [(s.csig, s.timestamp, s.size) for s in sigs] == [
+            ('0123456789abcdef', 1, 10),
+            ('fedcba9876543210', 2, 20),
+            ('not hex', 3, 30),
+        ], sigs
+
+        # The lists are expanded when one is asked for, and the build
+        # info repacks the same way.
+        assert bi2.bdepends == ['d1', 'd2'], bi2.bdepends
+        assert bi2.packed is None
+        assert bi2.bimplicit == [], bi2.bimplicit
+        bi3 = pickle.loads(pickle.dumps(bi2))
+        assert bi3.packed.ids == bi2.__getstate__()['packed'].ids
+
+        # Setting a list drops the packed form.
+        bi3.bsources = ['s3']
+        assert bi3.packed is None
+        assert bi3.get_bkids() == ['s3', 'd1', 'd2'], bi3.get_bkids()
+
+        # Lists of Nodes are not packed.
+        bi4 = SCons.Node.FS.FileBuildInfo()
+        bi4.merge(bi2)
+        bi4.bsources = [self.fs.File('s4')]
+        state = bi4.__getstate__()
+        assert 'packed' not in state, state
+        assert state['bsources'] == bi4.bsources
+
 
 class FSTestCase(_tempdirTestCase):
     def test_needs_normpath(self) -> None:
@@ -1869,6 +1923,26 @@ class FSTestCase(_tempdirTestCase):
         d = root._lookup_abs('/tmp/foo-nonexistent/nonexistent-dir', SCons.Node.FS.Dir)
         assert d.__class__ == SCons.Node.FS.Dir, str(d.__class__)
 
+        # Files are found through their directory, not by full path.
+        f = root._lookup_abs('/tmp/foo-nonexistent/f1', SCons.Node.FS.File)
+        assert f.dir is d.dir, f.dir
+        assert '/tmp/foo-nonexistent/f1' not in root._lookupDict
+        assert root._lookup_abs('/tmp/foo-nonexistent/f1', SCons.Node.FS.File) is f
+        assert root._lookup_abs('/tmp/foo-nonexistent/f1', SCons.Node.FS.Entry,
+                                create=False) is f
+
+        # An Entry looked up as a Dir becomes one.
+        e = root._lookup_abs('/tmp/foo-nonexistent/e1', SCons.Node.FS.Entry)
+        assert root._lookup_abs('/tmp/foo-nonexistent/e1', SCons.Node.FS.Dir) is e
+        assert e.__class__ == SCons.Node.FS.Dir, str(e.__class__)
+        assert root._lookup_abs('/tmp/foo-nonexistent/e1/f2', SCons.Node.FS.File).dir is e
+
+        with self.assertRaises(SCons.Errors.UserError):
+            root._lookup_abs('/tmp/foo-nonexistent/f3', SCons.Node.FS.File, create=False)
+        with self.assertRaises(SCons.Errors.UserError):
+            root._lookup_abs('/tmp/other-nonexistent/f3', SCons.Node.FS.File, create=False)
+        assert '/tmp/other-nonexistent' not in root._lookupDict
+
     @unittest.skipUnless(IS_WINDOWS, "requires Windows")
     def test_lookup_uncpath(self) -> None:
         """Testing looking up a UNC path on Windows"""
@@ -2716,6 +2790,83 @@ class FileTestCase(_tempdirTestCase):
         )
 
 
+class prefetch_signaturesTestCase(_tempdirTestCase):
+
+    def test_prefetch(self) -> None:
+        """Test prefetching the signatures of source files"""
+        import SCons.SConsign
+
+        test = self.test
+        fs = self.fs
+        test.subdir('sub')
+        test.write(['sub', 'a.in'], "a.in\n")
+        test.write(['sub', 'b.in'], "b.in\n")
+        test.write('c.in', "c.in\n")
+
+        a = fs.File('sub/a.in')
+        b = fs.File('sub/b.in')
+        c = fs.File('c.in')
+        missing = fs.File('missing.in')
+        out = fs.File('out')
+        out.builder_set(Builder(fs.File))
+        out.add_source([a, b, missing])
+        top = fs.File('top')
+        top.builder_set(Builder(fs.File))
+        top.add_source([out, c])
+
+        # b.in is unchanged since the "last build"
+        st = os.stat(test.workpath('sub', 'b.in'))
+        entry = SCons.SConsign.SConsignEntry()
+        entry.binfo = b.new_binfo()
+        entry.ninfo = b.new_ninfo()
+        entry.ninfo.timestamp = int(st.st_mtime)
+        entry.ninfo.size = st.st_size
+        entry.ninfo.csig = 'b.in csig'
+        b._memo['get_stored_info'] = entry
+
+        SCons.Node.FS.prefetch_signatures([top], 4)
+
+        assert a._memo['stat'].st_size == 5, a._memo.get('stat')
+        assert a.get_ninfo().csig == SCons.Util.hash_signature("a.in\n")
+        assert c.get_ninfo().csig == SCons.Util.hash_signature("c.in\n")
+        assert b._memo['stat'].st_size == 5, b._memo.get('stat')
+        assert not hasattr(b.get_ninfo(), 'csig')
+        assert 'stat' not in missing._memo, missing._memo
+        assert 'stat' not in out._memo, out._memo
+        assert 'stat' not in top._memo, top._memo
+
+        # Nothing to do is fine, too.
+        SCons.Node.FS.prefetch_signatures([], 4)
+
+    def test_prefetch_policy(self) -> None:
+        """Test the prefetch policy chosen for each Decider"""
+        import functools
+        from SCons.Node.FS import _prefetch_policy
+
+        env = SCons.Environment.Environment(tools=[])
+        for decider, policy in [
+            ('content', SCons.Node.FS._PREFETCH_CONTENT),
+            ('timestamp-newer', SCons.Node.FS._PREFETCH_STAT),
+            ('timestamp-match', SCons.Node.FS._PREFETCH_STAT),
+            ('content-timestamp', SCons.Node.FS._PREFETCH_CHANGED),
+        ]:
+            env.Decider(decider)
+            assert _prefetch_policy(env) == policy, (decider, _prefetch_policy(env))
+
+        class Env:
+            decide_source = env._changed_journal
+        assert _prefetch_policy(Env()) == SCons.Node.FS._PREFETCH_NONE
+
+        # A function of the user's is not taken for a built-in one
+        # because of its name.
+        def _changed_journal(dependency, target, prev_ni, repo_node=None) -> bool:
+            return True
+        env.Decider(_changed_journal)
+        assert _prefetch_policy(env) == SCons.Node.FS._PREFETCH_CHANGED
+        env.Decider(functools.partial(_changed_journal))
+        assert _prefetch_policy(env) == SCons.Node.FS._PREFETCH_CHANGED
+
+
 class GlobTestCase(_tempdirTestCase):
     def setUp(self) -> None:
         _tempdirTestCase.setUp(self)
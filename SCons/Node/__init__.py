@@ -456,10 +456,12 @@ class BuildInfoBase:
     It contains a NodeInfo instance for this node (signature information
     that's specific to the type of Node) and direct attributes for the
     generic build stuff we have to track:  sources, explicit dependencies,
-    implicit dependencies, and action information.
+    implicit dependencies, action information, and the time the last
+    build of the node took (``bduration``, only present once built).
     """
     __slots__ = ("bsourcesigs", "bdependsigs", "bimplicitsigs", "bactsig",
-                 "bsources", "bdepends", "bact", "bimplicit", "__weakref__")
+                 "bsources", "bdepends", "bact", "bimplicit", "bduration",
+                 "__weakref__")
     current_version_id = 2
 
     def __init__(self) -> None:
@@ -480,6 +482,14 @@ class BuildInfoBase:
         state = other.__getstate__()
         self.__setstate__(state)
 
+    def get_bkids(self) -> list:
+        """Return the recorded sources, depends and implicit dependencies."""
+        return self.bsources + self.bdepends + self.bimplicit
+
+    def get_bkidsigs(self) -> list[NodeInfoBase]:
+        """Return the NodeInfo of each dependency, in :meth:`get_bkids` order."""
+        return self.bsourcesigs + self.bdependsigs + self.bimplicitsigs
+
     def __getstate__(self) -> dict[str, Any]:
         """
         Return all fields that shall be pickled. Walk the slots in the class
@@ -547,6 +557,7 @@ class Node(metaclass=NoSlotsPyPy):
                  'binfo',
                  'ninfo',
                  'builder',
+                 'build_duration',
                  'is_explicit',
                  'implicit_set',
                  'changed_since_last_build',
@@ -1219,6 +1230,11 @@ class Node(metaclass=NoSlotsPyPy):
             binfo.bimplicit = [i for i in self.implicit if i not in ignore_set]
             binfo.bimplicitsigs = [i.get_ninfo() for i in binfo.bimplicit]
 
+        try:
+            binfo.bduration = self.build_duration
+        except AttributeError:
+            pass
+
         return binfo
 
     def del_binfo(self) -> None:
@@ -1499,7 +1515,7 @@ class Node(metaclass=NoSlotsPyPy):
         result = False
 
         bi = node.get_stored_info().binfo
-        then = bi.bsourcesigs + bi.bdependsigs + bi.bimplicitsigs
+        then = bi.get_bkidsigs()
         children = self.children()
 
         diff = len(children) - len(then)
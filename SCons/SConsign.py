@@ -27,7 +27,11 @@ import SCons.compat  # pylint: disable=wrong-import-order
 
 import os
 import pickle
+import struct
+import sys
+import threading
 import time
+from array import array
 
 import SCons.dblite
 import SCons.Warnings
@@ -56,6 +60,14 @@ sig_files = []
 DataBase = {}
 DB_Module = SCons.dblite
 DB_Name = None
+
+# Held while signature entries are stored, merged or written, so that
+# a checkpoint written from a background thread sees a consistent state.
+_lock = threading.RLock()
+
+# The default number of seconds between checkpoints, see checkpoint().
+default_checkpoint_interval = 60
+_checkpointer = None
 DB_sync_list = []
 
 def current_sconsign_filename():
@@ -116,7 +128,70 @@ def Reset() -> None:
 normcase = os.path.normcase
 
 
+def checkpoint() -> None:
+    """Write the signatures stored so far to the databases.
+
+    Unlike :func:`write`, the databases are not closed and the build
+    can go on storing signatures, so this can be called during a long
+    build to keep its results if it is killed.  Only the directories
+    with signatures stored since the last checkpoint are written.
+    """
+    for sig_file in list(sig_files):
+        if isinstance(sig_file, DB):
+            with _lock:
+                sig_file.write(sync=0)
+    with _lock:
+        for db in DB_sync_list:
+            try:
+                syncmethod = db.sync
+            except AttributeError:
+                pass # Not all dbm modules have sync() methods.
+            else:
+                syncmethod()
+
+
+class Checkpointer(threading.Thread):
+    """Thread calling :func:`checkpoint` every *interval* seconds."""
+
+    def __init__(self, interval) -> None:
+        super().__init__(name="SConsign checkpointer", daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            try:
+                checkpoint()
+            except Exception as e:
+                # Not fatal: the signatures are still written at the
+                # end of the build, which reports any error.
+                SCons.Warnings.warn(
+                    SCons.Warnings.SConsignCheckpointWarning,
+                    "Stopped writing sconsign checkpoints: %s" % e,
+                )
+                return
+
+
+def start_checkpoints(interval=default_checkpoint_interval) -> None:
+    """Start writing checkpoints in the background during the build."""
+    global _checkpointer
+    if interval > 0 and _checkpointer is None:
+        _checkpointer = Checkpointer(interval)
+        _checkpointer.start()
+
+
+def stop_checkpoints() -> None:
+    """Stop the checkpoints, waiting for one being written to finish."""
+    global _checkpointer
+    if _checkpointer is not None:
+        _checkpointer.stopped.set()
+        _checkpointer.join()
+        _checkpointer = None
+
+
 def write() -> None:
+    stop_checkpoints()
+
     if print_time():
         start_time = time.perf_counter()
 
@@ -184,6 +259,280 @@ class SConsignEntry:
                 setattr(self, key, value)
 
 
+# Directory entries in the binary encoding start with these bytes, which
+# can not start a pickle, followed by a byte with the encoding version.
+BINARY_MAGIC = b"\0SConsign"
+BINARY_VERSION = 1
+
+# The entries of a directory are encoded as columns: arrays of fixed-size
+# fields, variable-length fields concatenated, and a table of the
+# strings used.  A uint32 header gives the length of each column.
+_COLUMNS = 21
+_header = struct.Struct('<%dI' % _COLUMNS)
+# Index into the string table meaning None.
+_NO_STRING = 0xFFFFFFFF
+# Flags of a record, beyond the field flags of PackedDependencies
+# (csig 1, timestamp 2, size 4): the timestamp is an int.
+_TIMESTAMP_INT = 8
+# Flags of an entry: which of the optional build info fields are set,
+# or that the entry is pickled instead.
+_BACT, _BACTSIG, _BDURATION, _PICKLED = 1, 2, 4, 128
+
+
+class _NotEncodable(Exception):
+    """An entry which must be pickled instead."""
+
+
+class _Records:
+    """Columns of NodeInfo records: (path, fields, csig, timestamp, size)."""
+
+    def __init__(self) -> None:
+        self.path = array('I')
+        self.fields = array('B')
+        self.csig_len = array('B')
+        self.csig = bytearray()
+        self.timestamp = array('d')
+        self.size = array('q')
+
+    def add(self, record, string_id) -> None:
+        path, fields, csig, timestamp, size = record
+        path_id = string_id(path)
+        csig_len = 0
+        if fields & 1:
+            csig_len = len(csig)
+            if csig_len > 255:
+                raise _NotEncodable
+        if fields & 2:
+            if type(timestamp) is int:
+                if float(timestamp) != timestamp:
+                    raise _NotEncodable
+                fields |= _TIMESTAMP_INT
+            elif type(timestamp) is not float:
+                raise _NotEncodable
+        else:
+            timestamp = 0.0
+        if fields & 4:
+            if type(size) is not int:
+                raise _NotEncodable
+        else:
+            size = 0
+        try:
+            self.size.append(size)
+        except OverflowError:
+            raise _NotEncodable from None
+        self.timestamp.append(timestamp)
+        self.path.append(path_id)
+        self.fields.append(fields)
+        self.csig_len.append(csig_len)
+        if csig_len:
+            self.csig += csig
+
+    def columns(self) -> list:
+        return [self.path, self.fields, self.csig_len, self.csig,
+                self.timestamp, self.size]
+
+    @staticmethod
+    def read(columns, strings) -> list[tuple]:
+        path, fields, csig_len, csig, timestamp, size = columns
+        records = []
+        pos = 0
+        for i, f in enumerate(fields):
+            c = t = s = None
+            if f & 1:
+                end = pos + csig_len[i]
+                c = csig[pos:end]
+                pos = end
+            if f & 2:
+                t = timestamp[i]
+                if f & _TIMESTAMP_INT:
+                    t = int(t)
+            if f & 4:
+                s = size[i]
+            records.append((sys.intern(strings[path[i]]), f & 7, c, t, s))
+        return records
+
+
+def encode_entries(entries) -> bytes:
+    """Return the signature entries of a directory, encoded.
+
+    The file entries which SCons makes are stored in a binary encoding,
+    which is faster to read and write than pickling them and takes less
+    space.  Other entries, such as those of SConf or with NodeInfo or
+    BuildInfo classes of an extension, are pickled in the encoding.
+    """
+    from SCons.Node.FS import FileBuildInfo, FileNodeInfo, PackedDependencies
+
+    strings = {}
+
+    def string_id(s) -> int:
+        if s is None:
+            return _NO_STRING
+        try:
+            return strings[s]
+        except KeyError:
+            if type(s) is not str or '\0' in s:
+                raise _NotEncodable from None
+            i = strings[s] = len(strings)
+            return i
+
+    records = _Records()
+    record_ids = {}
+    own = _Records()
+    name_id = array('I')
+    flags = array('B')
+    bact = array('I')
+    bactsig = array('I')
+    bduration = array('d')
+    counts = array('I')
+    deps = array('I')
+    pickled = {}
+    get_record = PackedDependencies.get_record
+    missing = object()
+
+    for name, entry in entries.items():
+        try:
+            if type(entry) is not SConsignEntry:
+                raise _NotEncodable
+            try:
+                ninfo = entry.ninfo
+                binfo = entry.binfo
+            except AttributeError:
+                raise _NotEncodable from None
+            if type(ninfo) is not FileNodeInfo or type(binfo) is not FileBuildInfo:
+                raise _NotEncodable
+            record = PackedDependencies.record('', ninfo)
+            packed = binfo.packed
+            if packed is None:
+                packed = PackedDependencies.pack(binfo)
+            if record is None or packed is None or packed.others:
+                raise _NotEncodable
+            f = 0
+            act = getattr(binfo, 'bact', missing)
+            if act is not missing:
+                f |= _BACT
+                act_id = string_id(act)
+            actsig = getattr(binfo, 'bactsig', missing)
+            if actsig is not missing:
+                f |= _BACTSIG
+                actsig_id = string_id(actsig)
+            duration = getattr(binfo, 'bduration', missing)
+            if duration is not missing:
+                if type(duration) is not float:
+                    raise _NotEncodable
+                f |= _BDURATION
+            ids = []
+            for gid in packed.ids:
+                try:
+                    ids.append(record_ids[gid])
+                except KeyError:
+                    records.add(get_record(gid), string_id)
+                    ids.append(record_ids.setdefault(gid, len(record_ids)))
+            own.add(record, string_id)
+        except _NotEncodable:
+            f = _PICKLED
+            pickled[name] = entry
+        else:
+            bact.append(act_id if f & _BACT else _NO_STRING)
+            bactsig.append(actsig_id if f & _BACTSIG else _NO_STRING)
+            bduration.append(duration if f & _BDURATION else 0.0)
+            counts.extend(packed.counts)
+            deps.extend(ids)
+        name_id.append(string_id(name))
+        flags.append(f)
+
+    columns = [
+        '\0'.join(strings).encode('utf-8', 'surrogateescape'),
+        *records.columns(),
+        *own.columns(),
+        name_id, flags, bact, bactsig, bduration, counts, deps,
+        pickle.dumps(pickled, PICKLE_PROTOCOL) if pickled else b'',
+    ]
+    data = []
+    for column in columns:
+        if isinstance(column, array):
+            if sys.byteorder == 'big':
+                column.byteswap()
+            column = column.tobytes()
+        data.append(column)
+    return b''.join([BINARY_MAGIC, bytes([BINARY_VERSION]),
+                     _header.pack(*map(len, data))] + data)
+
+
+def decode_entries(data) -> dict:
+    """Return the signature entries of a directory from their encoding.
+
+    Also reads entries which were pickled, as SCons did before.
+    """
+    if data[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+        entries = pickle.loads(data)
+        if not isinstance(entries, dict):
+            raise TypeError("not a dict of entries")
+        return entries
+    from SCons.Node.FS import FileBuildInfo, FileNodeInfo, PackedDependencies
+
+    pos = len(BINARY_MAGIC)
+    if data[pos] != BINARY_VERSION:
+        raise ValueError("unknown .sconsign encoding version %d" % data[pos])
+    pos += 1
+    lengths = _header.unpack_from(data, pos)
+    pos += _header.size
+    columns = []
+    typecodes = 'sIBBsdqIBBsdqIBIIdIIs'
+    for typecode, length in zip(typecodes, lengths):
+        column = data[pos:pos + length]
+        if len(column) != length:
+            raise ValueError("truncated .sconsign entries")
+        pos += length
+        if typecode != 's':
+            column = array(typecode, column)
+            if sys.byteorder == 'big':
+                column.byteswap()
+        columns.append(column)
+    strings = columns[0].decode('utf-8', 'surrogateescape').split('\0')
+    gids = list(map(PackedDependencies.record_id, _Records.read(columns[1:7], strings)))
+    own = _Records.read(columns[7:13], strings)
+    name_id, flags, bact, bactsig, bduration, counts, deps, pickled = columns[13:]
+    pickled = pickle.loads(pickled) if pickled else {}
+
+    entries = {}
+    n = 0
+    dep = 0
+    for i, f in enumerate(flags):
+        name = strings[name_id[i]]
+        if f & _PICKLED:
+            entries[name] = pickled[name]
+            continue
+        _, fields, csig, timestamp, size = own[n]
+        ninfo = FileNodeInfo()
+        if fields & 1:
+            ninfo.csig = csig.hex()
+        if fields & 2:
+            ninfo.timestamp = timestamp
+        if fields & 4:
+            ninfo.size = size
+        c = tuple(counts[3 * n:3 * n + 3])
+        end = dep + sum(c)
+        packed = PackedDependencies.from_ids(
+            c, array('I', map(gids.__getitem__, deps[dep:end]))
+        )
+        dep = end
+        binfo = FileBuildInfo.__new__(FileBuildInfo)
+        object.__setattr__(binfo, 'dependency_map', None)
+        object.__setattr__(binfo, 'packed', packed)
+        if f & _BACT:
+            object.__setattr__(binfo, 'bact', None if bact[n] == _NO_STRING else strings[bact[n]])
+        if f & _BACTSIG:
+            object.__setattr__(binfo, 'bactsig', None if bactsig[n] == _NO_STRING else strings[bactsig[n]])
+        if f & _BDURATION:
+            object.__setattr__(binfo, 'bduration', bduration[n])
+        entry = SConsignEntry()
+        entry.binfo = binfo
+        entry.ninfo = ninfo
+        entries[name] = entry
+        n += 1
+    return entries
+
+
 class Base:
     """
     This is the controlling class for the signatures for the collection of
@@ -208,17 +557,19 @@ class Base:
         """
         Set the entry.
         """
-        self.entries[filename] = obj
-        self.dirty = True
+        with _lock:
+            self.entries[filename] = obj
+            self.dirty = True
 
     def do_not_set_entry(self, filename, obj) -> None:
         pass
 
     def store_info(self, filename, node) -> None:
-        entry = node.get_stored_info()
-        entry.binfo.merge(node.get_binfo())
-        self.to_be_merged[filename] = node
-        self.dirty = True
+        with _lock:
+            entry = node.get_stored_info()
+            entry.binfo.merge(node.get_binfo())
+            self.to_be_merged[filename] = node
+            self.dirty = True
 
     def do_not_store_info(self, filename, node) -> None:
         pass
@@ -250,22 +601,19 @@ class DB(Base):
 
         self.dir = dir
 
-        db, mode = Get_DataBase(dir)
-
         # Read using the path relative to the top of the Repository
         # (self.dir.tpath) from which we're fetching the signature
         # information.
         path = normcase(dir.get_tpath())
         try:
-            rawentries = db[path]
+            with _lock:
+                db, mode = Get_DataBase(dir)
+                rawentries = db[path]
         except KeyError:
             pass
         else:
             try:
-                self.entries = pickle.loads(rawentries)
-                if not isinstance(self.entries, dict):
-                    self.entries = {}
-                    raise TypeError
+                self.entries = decode_entries(rawentries)
             except KeyboardInterrupt:
                 raise
             except Exception as e:
@@ -299,7 +647,8 @@ class DB(Base):
         path = normcase(self.dir.get_internal_path())
         for key, entry in self.entries.items():
             entry.convert_to_sconsign()
-        db[path] = pickle.dumps(self.entries, PICKLE_PROTOCOL)
+        db[path] = encode_entries(self.entries)
+        self.dirty = False
 
         if sync:
             try:
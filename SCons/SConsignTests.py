@@ -22,12 +22,16 @@
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 import os
+import pickle
+import threading
 import unittest
 
 import TestCmd
 
 import SCons.dblite
+import SCons.Node.FS
 import SCons.SConsign
+import SCons.Warnings
 from SCons.Util import get_hash_format, get_current_hash_algorithm_used
 
 class BuildInfo:
@@ -341,6 +345,110 @@ class SConsignFileTestCase(SConsignTestCase):
         assert fake_dbm.mode == "c", fake_dbm.mode
 
 
+class ExtendedBuildInfo(SCons.Node.FS.FileBuildInfo):
+    __slots__ = ('extra',)
+
+
+class encodeTestCase(unittest.TestCase):
+
+    @staticmethod
+    def ninfo(csig, timestamp, size):
+        ni = SCons.Node.FS.FileNodeInfo()
+        ni.csig = csig
+        ni.timestamp = timestamp
+        ni.size = size
+        return ni
+
+    def entry(self, binfo_class=SCons.Node.FS.FileBuildInfo):
+        bi = binfo_class()
+        bi.bsources = ['s1']
+        bi.bsourcesigs = [self.ninfo('0123456789abcdef', 1.5, 10)]
+        bi.bdepends = ['d1', 'd2']
+        bi.bdependsigs = [self.ninfo('fedcba9876543210', 2, 20),
+                          self.ninfo('0123456789abcdef', 1.5, 10)]
+        bi.bimplicit = ['s1']
+        bi.bimplicitsigs = [self.ninfo('0123456789abcdef', 1.5, 10)]
+        bi.bact = 'cp $SOURCE $TARGET'
+        bi.bactsig = 'aabbccdd'
+        entry = SCons.SConsign.SConsignEntry()
+        entry.binfo = bi
+        entry.ninfo = self.ninfo('00ff', 3.25, 30)
+        return entry
+
+    def assert_entry(self, entry) -> None:
+        bi = entry.binfo
+        assert bi.packed is not None
+        assert bi.bsources == ['s1'], bi.bsources
+        assert bi.bdepends == ['d1', 'd2'], bi.bdepends
+        assert bi.bimplicit == ['s1'], bi.bimplicit
+        sigs = bi.bsourcesigs + bi.bdependsigs + bi.bimplicitsigs
+        assert [(s.csig, s.timestamp, s.size) for s in sigs] == [
+            ('0123456789abcdef', 1.5, 10),
+            ('fedcba9876543210', 2, 20),
+            ('0123456789abcdef', 1.5, 10),
+            ('0123456789abcdef', 1.5, 10),
+        ], sigs
+        assert type(sigs[1].timestamp) is int
+        assert bi.bact == 'cp $SOURCE $TARGET', bi.bact
+        assert bi.bactsig == 'aabbccdd', bi.bactsig
+        assert not hasattr(bi, 'bduration')
+        ni = entry.ninfo
+        assert (ni.csig, ni.timestamp, ni.size) == ('00ff', 3.25, 30)
+
+    def test_encode(self) -> None:
+        """Test the binary encoding of directory entries"""
+        entries = {'foo': self.entry(), 'bar': self.entry()}
+        entries['bar'].binfo.bduration = 0.5
+        del entries['bar'].ninfo.size
+        data = SCons.SConsign.encode_entries(entries)
+        assert data.startswith(SCons.SConsign.BINARY_MAGIC)
+        assert len(data) < len(pickle.dumps(entries)), len(data)
+
+        result = SCons.SConsign.decode_entries(data)
+        assert list(result) == ['foo', 'bar'], list(result)
+        self.assert_entry(result['foo'])
+        assert result['bar'].binfo.bduration == 0.5
+        assert not hasattr(result['bar'].ninfo, 'size')
+        # Encoding again gives the same result.
+        assert SCons.SConsign.encode_entries(result) == data
+
+    def test_fallback(self) -> None:
+        """Test entries which are pickled in the encoding"""
+        odd = self.entry()
+        odd.ninfo.csig = 'not hex'
+        entries = {
+            'foo': self.entry(),
+            'odd': odd,
+            'ext': self.entry(ExtendedBuildInfo),
+            'bar': self.entry(),
+        }
+        entries['ext'].binfo.extra = 'extra'
+        data = SCons.SConsign.encode_entries(entries)
+        result = SCons.SConsign.decode_entries(data)
+        assert list(result) == ['foo', 'odd', 'ext', 'bar'], list(result)
+        self.assert_entry(result['foo'])
+        self.assert_entry(result['bar'])
+        assert result['odd'].ninfo.csig == 'not hex'
+        assert type(result['ext'].binfo) is ExtendedBuildInfo
+        assert result['ext'].binfo.extra == 'extra'
+
+    def test_decode_pickle(self) -> None:
+        """Test reading entries which were pickled"""
+        entries = {'foo': self.entry()}
+        result = SCons.SConsign.decode_entries(pickle.dumps(entries))
+        self.assert_entry(result['foo'])
+
+        with self.assertRaises(TypeError):
+            SCons.SConsign.decode_entries(pickle.dumps(['foo']))
+        data = SCons.SConsign.encode_entries(entries)
+        with self.assertRaises(ValueError):
+            SCons.SConsign.decode_entries(data[:-5])
+        data = bytearray(data)
+        data[len(SCons.SConsign.BINARY_MAGIC)] = 99
+        with self.assertRaises(ValueError):
+            SCons.SConsign.decode_entries(bytes(data))
+
+
 class writeTestCase(SConsignTestCase):
 
     def test_write(self) -> None:
@@ -378,6 +486,92 @@ class writeTestCase(SConsignTestCase):
 
         assert fake_dbm.sync_count == 1, fake_dbm.sync_count
 
+    def test_checkpoint(self) -> None:
+
+        test = self.test
+        file = test.workpath('sconsign_file')
+
+        class Fake_DBM:
+            def __getitem__(self, key):
+                raise KeyError(key)
+            def __setitem__(self, key, value) -> None:
+                self.stored.append(key)
+            def open(self, name, mode):
+                self.stored = []
+                self.sync_count = 0
+                self.synced = threading.Event()
+                return self
+            def sync(self) -> None:
+                self.sync_count = self.sync_count + 1
+                self.synced.set()
+
+        fake_dbm = Fake_DBM()
+
+        SCons.SConsign.DataBase = {}
+        SCons.SConsign.File(file, fake_dbm)
+
+        f = SCons.SConsign.DB(DummyNode())
+        f.set_entry('foo', DummySConsignEntry('foo'))
+
+        SCons.SConsign.checkpoint()
+        assert fake_dbm.stored == ['not_a_valid_path'], fake_dbm.stored
+        assert fake_dbm.sync_count == 1, fake_dbm.sync_count
+
+        # Only directories stored into since are written again.
+        SCons.SConsign.checkpoint()
+        assert fake_dbm.stored == ['not_a_valid_path'], fake_dbm.stored
+        assert fake_dbm.sync_count == 2, fake_dbm.sync_count
+
+        f.set_entry('bar', DummySConsignEntry('bar'))
+        fake_dbm.synced.clear()
+        SCons.SConsign.start_checkpoints(0.01)
+        try:
+            assert fake_dbm.synced.wait(10)
+        finally:
+            SCons.SConsign.stop_checkpoints()
+        assert fake_dbm.stored == ['not_a_valid_path'] * 2, fake_dbm.stored
+
+        # write() stops the checkpoints.
+        SCons.SConsign.start_checkpoints(60)
+        SCons.SConsign.write()
+        assert SCons.SConsign._checkpointer is None
+
+    def test_checkpoint_error(self) -> None:
+        """Test that a failing checkpoint warns and stops the checkpoints"""
+        test = self.test
+        file = test.workpath('sconsign_file')
+
+        class Fake_DBM:
+            def __getitem__(self, key):
+                raise KeyError(key)
+            def __setitem__(self, key, value) -> None:
+                raise OSError("cannot write")
+            def open(self, name, mode):
+                return self
+
+        SCons.SConsign.DataBase = {}
+        SCons.SConsign.File(file, Fake_DBM())
+
+        f = SCons.SConsign.DB(DummyNode())
+        f.set_entry('foo', DummySConsignEntry('foo'))
+
+        warnings = []
+        save_out = SCons.Warnings._warningOut
+        save_enabled = SCons.Warnings._enabled[:]
+        SCons.Warnings._warningOut = warnings.append
+        SCons.Warnings.enableWarningClass(SCons.Warnings.SConsignCheckpointWarning)
+        SCons.SConsign.start_checkpoints(0.01)
+        try:
+            SCons.SConsign._checkpointer.join(10)
+            assert not SCons.SConsign._checkpointer.is_alive()
+        finally:
+            SCons.SConsign.stop_checkpoints()
+            SCons.Warnings._warningOut = save_out
+            SCons.Warnings._enabled[:] = save_enabled
+        assert len(warnings) == 1, warnings
+        assert isinstance(warnings[0], SCons.Warnings.SConsignCheckpointWarning)
+        assert "cannot write" in str(warnings[0]), warnings[0]
+
 
 
 if __name__ == "__main__":
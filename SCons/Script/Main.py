@@ -50,6 +50,7 @@ import SCons.Debug
 import SCons.Defaults
 import SCons.Environment
 import SCons.Errors
+import SCons.Journal
 import SCons.Taskmaster.Job
 import SCons.Node
 import SCons.Node.FS
@@ -61,6 +62,7 @@ import SCons.Taskmaster
 import SCons.Util
 import SCons.Warnings
 import SCons.Script.Interactive
+import SCons.Script.Snapshot
 from .SConsOptions import SConsOption
 from SCons.Util.stats import count_stats, memory_stats, time_stats, ENABLE_JSON, write_scons_stats_file, JSON_OUTPUT_FILE
 
@@ -784,6 +786,9 @@ def _create_path(plist):
             path = path + '/' + d
     return path
 
+# The site_init.py files which were loaded.
+site_init_files = []
+
 def _load_site_scons_dir(topdir, site_dir_name=None):
     """Load the site directory under topdir.
 
@@ -858,6 +863,7 @@ def _load_site_scons_dir(topdir, site_dir_name=None):
             for k, v in site_m.items():
                 if not re_dunder.match(k):
                     m.__dict__[k] = v
+            site_init_files.append(site_init_file)
     except KeyboardInterrupt:
         raise
     except Exception:
@@ -1106,6 +1112,40 @@ def _main(parser):
     if not hasattr(sys.stderr, 'isatty') or not sys.stderr.isatty():
         sys.stderr = SCons.Util.Unbuffered(sys.stderr)
 
+    # With --watch-daemon, record changes to the project until
+    # interrupted, instead of building anything.
+    if options.watch_daemon:
+        progress_display("scons: Watching %s for changes (interrupt to stop) ..."
+                         % d.get_abspath())
+        SCons.Journal.watch(d.get_abspath())
+        return
+
+    # If the journal Decider is selected, it reads the change journal
+    # kept by a watch daemon for the project.
+    SCons.Journal.set_top(d.get_abspath())
+
+    # With --graph-snapshot, a build known to be a null build can skip
+    # reading the SConscript files altogether.
+    snapshot_file = snapshot_key = None
+    if options.graph_snapshot and scripts[0] != "-" and not (
+        options.clean or options.help or options.interactive
+        or options.no_exec or options.question
+        or options.debug or options.tree_printers
+    ):
+        snapshot_file = os.path.join(d.get_abspath(),
+                                     SCons.Script.Snapshot.SNAPSHOT_FILE)
+        snapshot_key = SCons.Script.Snapshot.run_key()
+        up_to_date = SCons.Script.Snapshot.load(snapshot_file, snapshot_key)
+        if up_to_date is not None:
+            progress_display("scons: SConscript files unchanged, using graph snapshot.")
+            progress_display("scons: Building targets ...")
+            if not options.silent:
+                for target in up_to_date:
+                    display("scons: `%s' is up to date." % target)
+            progress_display("scons: done building targets.")
+            exit_status = 0
+            return
+
     memory_stats.append('before reading SConscript files:')
     count_stats.append(('pre-', 'read'))
 
@@ -1133,6 +1173,10 @@ def _main(parser):
 
     progress_display("scons: done reading SConscript files.")
 
+    # From here on the signatures of command lines can be kept as
+    # templates, the environments are no longer being set up.
+    SCons.Environment.sig_templates = True
+
     memory_stats.append('after reading SConscript files:')
     count_stats.append(('post-', 'read'))
 
@@ -1226,6 +1270,15 @@ def _main(parser):
             print('Found nothing to build')
             exit_status = 2
 
+        if snapshot_file:
+            if nodes and not exit_status:
+                sources = SCons.Script.Snapshot.python_sources(
+                    SCons.Node.SConscriptNodes, site_init_files)
+                SCons.Script.Snapshot.save(snapshot_file, snapshot_key,
+                                           sources, fs, nodes)
+            else:
+                SCons.Script.Snapshot.remove(snapshot_file)
+
 def _build_targets(fs, options, targets, target_top):
 
     global this_build_status
@@ -1382,6 +1435,17 @@ def _build_targets(fs, options, targets, target_top):
         if msg:
             SCons.Warnings.warn(SCons.Warnings.NoParallelSupportWarning, msg)
 
+    # In a parallel build, stat and hash the source files up front in
+    # parallel, rather than one at a time as the Taskmaster reaches them.
+    if num_jobs > 1 and not options.clean:
+        SCons.Node.FS.prefetch_signatures(nodes, num_jobs)
+
+    # Retrieve the targets which are in the cache before scheduling,
+    # rather than probing for each one as the Taskmaster reaches it.
+    if (SCons.CacheDir.cache_enabled and not options.clean
+            and not options.no_exec and not options.question):
+        SCons.CacheDir.prefetch(nodes, num_jobs)
+
     memory_stats.append('before building targets:')
     count_stats.append(('pre-', 'build'))
 
@@ -1407,6 +1471,15 @@ def _build_targets(fs, options, targets, target_top):
             if jobs.were_interrupted():
                 progress_display("scons: writing .sconsign file.")
             SCons.SConsign.write()
+            SCons.Journal.save()
+
+    # Checkpoint the signatures during the build, so that a build which
+    # is killed does not lose all of its results.
+    if not options.no_exec:
+        interval = options.sconsign_checkpoint
+        if interval is None:
+            interval = SCons.SConsign.default_checkpoint_interval
+        SCons.SConsign.start_checkpoints(interval)
 
     progress_display("scons: " + opening_message)
     jobs.run(postfunc = jobs_postfunc)
@@ -42,7 +42,7 @@ SUPPRESS_HELP = optparse.SUPPRESS_HELP
 
 diskcheck_all = SCons.Node.FS.diskcheck_types()
 
-experimental_features = {'warp_speed', 'transporter', 'ninja', 'legacy_sched'}
+experimental_features = {'warp_speed', 'transporter', 'ninja', 'legacy_sched', 'process_pool'}
 
 
 def diskcheck_convert(value):
@@ -134,6 +134,7 @@ class SConsValues(optparse.Values):
         'implicit_cache',
         'implicit_deps_changed',
         'implicit_deps_unchanged',
+        'load_average',
         'max_drift',
         'md5_chunksize',
         'no_exec',
@@ -171,6 +172,12 @@ class SConsValues(optparse.Values):
                     raise ValueError
             except ValueError:
                 raise SCons.Errors.UserError("A positive integer is required: %s" % repr(value))
+        elif name == 'load_average':
+            try:
+                value = float(value)
+            except ValueError:
+                raise SCons.Errors.UserError(
+                    "A number is required: %s" % repr(value))
         elif name == 'max_drift':
             try:
                 value = int(value)
@@ -970,6 +977,12 @@ def Parser(version):
                   action="append",
                   help="Read FILE as the top-level SConstruct file")
 
+    op.add_option('--graph-snapshot',
+                  dest='graph_snapshot', default=False,
+                  action="store_true",
+                  help="Skip reading SConscript files if a snapshot "
+                       "shows the build is a null build")
+
     op.add_option('-h', '--help',
                   dest="help", default=False,
                   action="store_true",
@@ -1053,6 +1066,14 @@ def Parser(version):
                   action="store_true",
                   help="Keep going when a target can't be made")
 
+    op.add_option('-l', '--load-average', '--max-load',
+                  nargs=1, type="float",
+                  dest="load_average", default=0,
+                  action="store",
+                  help="Don't start multiple jobs unless load is below "
+                       "LOAD-AVERAGE",
+                  metavar="LOAD-AVERAGE")
+
     op.add_option('--max-drift',
                   nargs=1, type="int",
                   dest='max_drift', default=SCons.Node.FS.default_max_drift,
@@ -1097,6 +1118,31 @@ def Parser(version):
                   action="store_true",
                   help="Don't print commands")
 
+    schedule_options = ["default", "critical-path"]
+
+    def opt_schedule(option, opt, value, parser, schedule_options=schedule_options) -> None:
+        if value not in schedule_options:
+            raise OptionValueError(opt_invalid('schedule', value, schedule_options))
+        setattr(parser.values, option.dest, value)
+
+    opt_schedule_help = "Set the order in which ready targets are built [%s]" \
+                        % ", ".join(schedule_options)
+
+    op.add_option('--schedule',
+                  nargs=1, type="string",
+                  dest="schedule", default="default",
+                  action="callback", callback=opt_schedule,
+                  help=opt_schedule_help,
+                  metavar="MODE")
+
+    op.add_option('--sconsign-checkpoint',
+                  nargs=1, type="int",
+                  dest='sconsign_checkpoint', default=None,
+                  action="store",
+                  help="Write the signatures stored so far every N seconds "
+                       "during the build, 0 to disable",
+                  metavar="N")
+
     op.add_option('--site-dir',
                   nargs=1,
                   dest='site_dir', default=None,
@@ -1179,6 +1225,12 @@ def Parser(version):
                   help="Enable or disable warnings",
                   metavar="WARNING-SPEC")
 
+    op.add_option('--watch-daemon',
+                  dest='watch_daemon', default=False,
+                  action="store_true",
+                  help="Record changes to files in the project until "
+                       "interrupted, for the journal Decider")
+
     op.add_option('-Y', '--repository', '--srcdir',
                   nargs=1,
                   dest="repository", default=[],
@@ -1194,14 +1246,6 @@ def Parser(version):
         msg = "Warning:  the %s option is not yet implemented\n" % opt
         sys.stderr.write(msg)
 
-    op.add_option('-l', '--load-average', '--max-load',
-                  nargs=1, type="float",
-                  dest="load_average", default=0,
-                  action="callback", callback=opt_not_yet,
-                  # action="store",
-                  # help="Don't start multiple jobs unless load is below "
-                  #      "LOAD-AVERAGE"
-                  help=SUPPRESS_HELP)
     op.add_option('--list-actions',
                   dest="list_actions",
                   action="callback", callback=opt_not_yet,
@@ -0,0 +1,302 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Graph snapshots, for the ``--graph-snapshot`` option.
+
+After a successful build, a snapshot of the evaluated build is written:
+the content signatures of the SConscript files and Python modules that
+were read, a signature of the command line and process environment,
+and the state on disk of every file and directory node that was known,
+along with the top-level targets which would be reported as up to date.
+
+A later run with the same command line checks the snapshot before
+reading any SConscript files.  If the Python sources have the same
+content and no file or directory on disk has changed since the snapshot
+was written, the build would be a null build: the SConscript files are
+not read and the targets are reported as up to date right away.  Any
+mismatch just means a normal build, after which a new snapshot is
+written.
+
+Live nodes, builders and environments are not saved, since they hold
+functions and other objects which cannot be pickled in general; the
+snapshot records what is needed to prove that nothing would be built.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import site
+import sys
+import sysconfig
+
+import SCons
+import SCons.Journal
+import SCons.Node
+import SCons.Node.Alias
+import SCons.Node.FS
+import SCons.Util
+
+SNAPSHOT_FILE = '.scons_snapshot'
+
+# Bumped when the layout of the saved data changes.
+SNAPSHOT_VERSION = 1
+
+# The snapshot is checked before the SConscript files could select a
+# hash format, so it always uses the same one.
+HASH_FORMAT = 'sha256'
+
+
+def _dirs(dirs) -> tuple[str, ...]:
+    return tuple(os.path.join(os.path.normcase(os.path.abspath(d)), '')
+                 for d in dirs if d)
+
+
+# Python modules which are part of SCons or of the standard library are
+# covered by the version strings in the key.  The standard library
+# directory may hold the site directories, where installed packages
+# go, which are not covered.
+_paths = sysconfig.get_paths()
+_scons_dirs = _dirs({os.path.dirname(SCons.__file__)})
+_stdlib_dirs = _dirs({_paths.get('stdlib'), _paths.get('platstdlib')})
+_site_dirs = _dirs({_paths.get('purelib'), _paths.get('platlib')}
+                   | set(getattr(site, 'getsitepackages', list)())
+                   | {getattr(site, 'USER_SITE', None)})
+del _paths
+
+
+def run_key(argv=None, environ=None, cwd=None) -> str:
+    """Return a signature of the settings a build was run with.
+
+    Covers the command line, the process environment (which the
+    SConscript files may consult), the working directory and the
+    SCons and Python versions.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if environ is None:
+        environ = os.environ
+    if cwd is None:
+        cwd = os.getcwd()
+    parts = [SCons.__version__, sys.version, cwd, repr(list(argv)),
+             repr(sorted(environ.items()))]
+    return SCons.Util.hash_signature('\0'.join(parts), HASH_FORMAT)
+
+
+def python_sources(sconscripts, extra=()) -> list[str]:
+    """Return the paths of the Python files a build read.
+
+    *sconscripts* are the SConscript file nodes that were read and
+    *extra* any other files, such as ``site_init.py``.  Also includes
+    the modules imported from outside SCons and the Python standard
+    library, such as those in ``site_scons``, tool modules on a toolpath
+    and installed packages.
+    """
+    paths = set()
+    for node in sconscripts:
+        # An optional SConscript file which does not exist is covered
+        # by the state of its node.
+        for f in (node.rfile(), node.srcnode().rfile()):
+            if f.exists():
+                paths.add(f.get_abspath())
+                break
+    paths.update(os.path.abspath(p) for p in extra)
+    for module in list(sys.modules.values()):
+        path = getattr(module, '__file__', None)
+        if not path or not os.path.isfile(path):
+            continue
+        path = os.path.abspath(path)
+        normpath = os.path.normcase(path)
+        if normpath.startswith(_scons_dirs):
+            continue
+        if (normpath.startswith(_stdlib_dirs)
+                and not normpath.startswith(_site_dirs)):
+            continue
+        paths.add(path)
+    return sorted(paths)
+
+
+def _file_state(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _dir_state(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _fs_nodes(fs):
+    """Yield every node in the file system tree of *fs*."""
+    dirs = list(fs.Root.values())
+    seen = set()
+    while dirs:
+        d = dirs.pop()
+        if d in seen:
+            continue
+        seen.add(d)
+        yield d
+        for name, node in d.entries.items():
+            if name in ('.', '..'):
+                continue
+            if isinstance(node, SCons.Node.FS.Dir):
+                dirs.append(node)
+            else:
+                yield node
+
+
+def _walk(nodes):
+    """Yield the nodes of the dependency graph below *nodes*."""
+    stack = list(nodes)
+    seen = set()
+    while stack:
+        node = stack.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+        yield node
+        stack.extend(node.children(scan=0))
+        if node.prerequisites is not None:
+            stack.extend(node.prerequisites)
+
+
+def null_build_safe(nodes) -> bool:
+    """Return whether an unchanged tree would build nothing below *nodes*.
+
+    That is not the case if a node is always built, an Alias has
+    actions, or a file target is missing after the build.
+    """
+    for node in _walk(nodes):
+        if node.always_build:
+            return False
+        if isinstance(node, SCons.Node.Alias.Alias):
+            if node.has_builder() and node.get_executor().get_action_list():
+                return False
+        elif isinstance(node, SCons.Node.FS.Base):
+            if node.has_builder() and not node.isdir() and not node.exists():
+                return False
+    return True
+
+
+def up_to_date_targets(nodes) -> list[str]:
+    """Return the top-level targets a null build reports as up to date."""
+    return [str(node) for node in nodes if node.has_builder()]
+
+
+def save(path, key, sources, fs, nodes) -> bool:
+    """Write a snapshot of a successful build of *nodes* to *path*.
+
+    Returns whether a snapshot was written; if the build could not be
+    skipped next time, any old snapshot is removed instead.
+    """
+    if not null_build_safe(nodes):
+        remove(path)
+        return False
+    # Create the file before recording the directories, and then write
+    # it in place: adding it would change the mtime of its directory.
+    try:
+        open(path, 'ab').close()
+    except OSError:
+        return False
+    # Directories above the top of the project are only passed through;
+    # their other entries come and go without affecting the build.
+    ancestors = set()
+    d = fs.Top.up()
+    while d is not None:
+        ancestors.add(d)
+        d = d.up()
+    # The files of the change journal come and go during every build.
+    journal_dir = fs.Top.entry_abspath(SCons.Journal.JOURNAL_DIR)
+    files = {}
+    dirs = {}
+    for node in _fs_nodes(fs):
+        abspath = node.get_abspath()
+        if isinstance(node, SCons.Node.FS.Dir):
+            if node not in ancestors and abspath != journal_dir:
+                dirs[abspath] = _dir_state(abspath)
+        else:
+            files[abspath] = _file_state(abspath)
+    data = {
+        'version': SNAPSHOT_VERSION,
+        'key': key,
+        'sources': {p: SCons.Util.hash_file_signature(p, hash_format=HASH_FORMAT)
+                    for p in sources},
+        'files': files,
+        'dirs': dirs,
+        'up_to_date': up_to_date_targets(nodes),
+    }
+    try:
+        with open(path, 'wb') as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        remove(path)
+        return False
+    return True
+
+
+def load(path, key):
+    """Return the up-to-date targets if the snapshot at *path* is valid.
+
+    Returns ``None`` if there is no valid snapshot for *key*, that is,
+    if a normal build is needed.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(data, dict) or data.get('version') != SNAPSHOT_VERSION:
+        return None
+    if data['key'] != key:
+        return None
+    for p, state in data['dirs'].items():
+        if _dir_state(p) != state:
+            return None
+    for p, state in data['files'].items():
+        if _file_state(p) != state:
+            return None
+    for p, csig in data['sources'].items():
+        try:
+            if SCons.Util.hash_file_signature(p, hash_format=HASH_FORMAT) != csig:
+                return None
+        except OSError:
+            return None
+    return data['up_to_date']
+
+
+def remove(path) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
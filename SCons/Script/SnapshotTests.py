@@ -0,0 +1,154 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+import sys
+import time
+import unittest
+
+import TestCmd
+
+import SCons.Node.FS
+import SCons.Script.Snapshot as Snapshot
+from SCons.Builder import Builder
+
+
+class RunKeyTestCase(unittest.TestCase):
+
+    def test_run_key(self) -> None:
+        """Test that the run key covers arguments, environment and cwd"""
+        key = Snapshot.run_key(['-j4', '.'], {'PATH': '/bin'}, '/top')
+        self.assertEqual(key, Snapshot.run_key(['-j4', '.'], {'PATH': '/bin'}, '/top'))
+        self.assertNotEqual(key, Snapshot.run_key(['-j4', 'X=1', '.'], {'PATH': '/bin'}, '/top'))
+        self.assertNotEqual(key, Snapshot.run_key(['-j4', '.'], {'PATH': '/usr/bin'}, '/top'))
+        self.assertNotEqual(key, Snapshot.run_key(['-j4', '.'], {'PATH': '/bin'}, '/other'))
+
+
+class SaveLoadTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.save_cwd = os.getcwd()
+        self.test = TestCmd.TestCmd(workdir='')
+        os.chdir(self.test.workpath(''))
+        self.test.write('SConstruct', "# SConstruct\n")
+        self.test.write('in', "in\n")
+        self.test.write('out', "out\n")
+        self.fs = SCons.Node.FS.FS(self.test.workpath(''))
+        builder = Builder(action='cp $SOURCE $TARGET')
+        self.target = self.fs.File('out')
+        self.target.builder_set(builder)
+        self.target.add_source([self.fs.File('in')])
+        self.sconstruct = self.fs.File('SConstruct')
+        self.path = self.test.workpath(Snapshot.SNAPSHOT_FILE)
+
+    def tearDown(self) -> None:
+        self.test.cleanup()
+        os.chdir(self.save_cwd)
+
+    def save(self) -> bool:
+        sources = Snapshot.python_sources([self.sconstruct])
+        return Snapshot.save(self.path, 'key', sources, self.fs, [self.target])
+
+    def test_python_sources(self) -> None:
+        """Test collecting the Python sources of a build"""
+        sources = Snapshot.python_sources([self.sconstruct, self.fs.File('missing')])
+        self.assertIn(self.test.workpath('SConstruct'), sources)
+        self.assertNotIn(self.test.workpath('missing'), sources)
+        self.assertNotIn(os.path.abspath(Snapshot.__file__), sources)
+        self.assertNotIn(os.path.abspath(unittest.__file__), sources)
+
+    def test_installed_modules(self) -> None:
+        """Test that imported modules of installed packages are covered"""
+        self.test.subdir('lib', ['lib', 'site-packages'])
+        stdlib = self.test.workpath('lib', 'stdmod.py')
+        installed = self.test.workpath('lib', 'site-packages', 'sitemod.py')
+        self.test.write(stdlib, "x = 1\n")
+        self.test.write(installed, "x = 1\n")
+        save = Snapshot._stdlib_dirs, Snapshot._site_dirs
+        Snapshot._stdlib_dirs = Snapshot._dirs([self.test.workpath('lib')])
+        Snapshot._site_dirs = Snapshot._dirs([self.test.workpath('lib', 'site-packages')])
+        modules = {}
+        for name, path in (('stdmod', stdlib), ('sitemod', installed)):
+            modules[name] = type(sys)(name)
+            modules[name].__file__ = path
+        sys.modules.update(modules)
+        try:
+            sources = Snapshot.python_sources([self.sconstruct])
+            self.assertIn(installed, sources)
+            self.assertNotIn(stdlib, sources)
+            self.assertTrue(Snapshot.save(self.path, 'key', sources,
+                                          self.fs, [self.target]))
+            self.assertIsNotNone(Snapshot.load(self.path, 'key'))
+            self.test.write(installed, "x = 2\n")
+            self.assertIsNone(Snapshot.load(self.path, 'key'))
+        finally:
+            Snapshot._stdlib_dirs, Snapshot._site_dirs = save
+            for name in modules:
+                del sys.modules[name]
+
+    def test_round_trip(self) -> None:
+        """Test loading a snapshot, and its invalidation"""
+        self.assertTrue(self.save())
+        self.assertEqual(Snapshot.load(self.path, 'key'), ['out'])
+        self.assertIsNone(Snapshot.load(self.path, 'other key'))
+
+        time.sleep(0.01)
+        self.test.write('in', "in 2\n")
+        self.assertIsNone(Snapshot.load(self.path, 'key'))
+        self.assertTrue(self.save())
+        self.assertEqual(Snapshot.load(self.path, 'key'), ['out'])
+
+        # Same size and restored mtime, but different content.
+        st = os.stat('SConstruct')
+        self.test.write('SConstruct', "# SConstrucT\n")
+        os.utime('SConstruct', ns=(st.st_atime_ns, st.st_mtime_ns))
+        self.assertIsNone(Snapshot.load(self.path, 'key'))
+
+    def test_new_file(self) -> None:
+        """Test that a new file in a known directory invalidates"""
+        self.assertTrue(self.save())
+        time.sleep(0.01)
+        self.test.write('new', "new\n")
+        self.assertIsNone(Snapshot.load(self.path, 'key'))
+
+    def test_not_null_build(self) -> None:
+        """Test that builds which always do work are not snapshotted"""
+        self.test.write(self.path, "stale")
+        self.test.unlink('out')
+        self.assertFalse(self.save())
+        self.assertFalse(os.path.exists(self.path))
+
+        self.test.write('out', "out\n")
+        self.target.set_always_build()
+        self.assertFalse(self.save())
+
+    def test_corrupt(self) -> None:
+        """Test that an unreadable snapshot is ignored"""
+        self.test.write(self.path, "not a pickle")
+        self.assertIsNone(Snapshot.load(self.path, 'key'))
+        self.assertIsNone(Snapshot.load(self.test.workpath('nonexistent'), 'key'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -462,20 +462,24 @@ class StringSubber:
         This serves as a wrapper for splitting up a string into
         separate tokens.
         """
-        def sub_match(match):
-            return self.conv(self.expand(match.group(1), lvars))
-
         if is_String(args) and not isinstance(args, CmdStringHolder):
             args = str(args)        # In case it's a UserString.
+            template = string_template(args)
+            if len(template) == 1:
+                return args
+            expand, conv = self.expand, self.conv
             try:
-                result = _dollar_exps.sub(sub_match, args)
+                # The $-tokens are at the odd indexes of the template.
+                result = ''.join([
+                    conv(expand(part, lvars)) if i & 1 else part
+                    for i, part in enumerate(template)
+                ])
             except TypeError:
                 # If the internal conversion routine doesn't return
                 # strings (it could be overridden to return Nodes, for
-                # example), then the 1.5.2 re module will throw this
-                # exception.  Back off to a slower, general-purpose
-                # algorithm that works for all data types.
-                args = _separate_args.findall(args)
+                # example), joining them fails.  Back off to a slower,
+                # general-purpose algorithm that works for all data types.
+                args = list_template(args)
                 result = []
                 for a in args:
                     result.append(self.conv(self.expand(a, lvars)))
@@ -531,7 +535,7 @@ class ListSubber(UserList):
             return False
 
         s = str(s)  # in case it's a UserString
-        return _separate_args.findall(s) is None
+        return list_template(s) is None
 
     def expand(self, s, lvars, within_list):
         """Expand a single "token" as necessary, appending the
@@ -644,7 +648,7 @@ class ListSubber(UserList):
 
         if is_String(args) and not isinstance(args, CmdStringHolder):
             args = str(args)        # In case it's a UserString.
-            args = _separate_args.findall(args)
+            args = list_template(args)
             for a in args:
                 if a[0] in ' \t\n\r\f\v':
                     if '\n' in a:
@@ -819,6 +823,62 @@ _separate_args = re.compile(r'(%s|\s+|[^\s$]+|\$)' % _dollar_exps_str)
 # space characters in the string result from the scons_subst() function.
 _space_sep = re.compile(r'[\t ]+(?![^{]*})')
 
+# Strings substituted are compiled once into templates: the pieces the
+# expressions above split them into.  The same few strings, the values
+# of construction variables like $CCCOM, are substituted over and over
+# for every target, through whichever environment or override of it.
+# The templates are keyed by the string itself, so giving a variable a
+# new value naturally compiles a new template.  Strings which are unique
+# to a target, such as expanded flags, are substituted once, so a string
+# is only kept in the table the second time it is seen, and the table
+# is cleared when it grows to TEMPLATE_CACHE_SIZE entries all the same.
+TEMPLATE_CACHE_SIZE = 10000
+_string_templates: dict[str, tuple[str, ...]] = {}
+_list_templates: dict[str, tuple[str, ...]] = {}
+# The strings seen once so far.
+_string_seen: set[str] = set()
+_list_seen: set[str] = set()
+
+
+def _compile_template(s: str, templates: dict, seen: set, split) -> tuple[str, ...]:
+    """Return *s* split by *split*, kept in *templates* if seen before."""
+    if s not in seen:
+        if len(seen) >= TEMPLATE_CACHE_SIZE:
+            seen.clear()
+        seen.add(s)
+        return tuple(split(s))
+    seen.discard(s)
+    if len(templates) >= TEMPLATE_CACHE_SIZE:
+        templates.clear()
+    template = templates[s] = tuple(split(s))
+    return template
+
+
+def string_template(s: str) -> tuple[str, ...]:
+    """Return the template of *s* for :func:`scons_subst`.
+
+    That is *s* split around its $-tokens, which are at the odd indexes.
+    """
+    try:
+        return _string_templates[s]
+    except KeyError:
+        return _compile_template(s, _string_templates, _string_seen,
+                                 _dollar_exps.split)
+
+
+def list_template(s: str) -> tuple[str, ...]:
+    """Return the template of *s* for :func:`scons_subst_list`.
+
+    That is *s* split into $-tokens, runs of white space and the
+    words between them.
+    """
+    try:
+        return _list_templates[s]
+    except KeyError:
+        return _compile_template(s, _list_templates, _list_seen,
+                                 _separate_args.findall)
+
+
 
 def scons_subst(strSubst, env, mode=SUBST_RAW, target=None, source=None, gvars={}, lvars={}, conv=None, overrides: dict | None = None):
     """Expand a string or list containing construction variable
@@ -870,6 +930,10 @@ def scons_subst(strSubst, env, mode=SUBST_RAW, target=None, source=None, gvars={
     except KeyError:
         pass
 
+    return _finish_subst(result, mode)
+
+def _finish_subst(result, mode):
+    """Finish the result of a :func:`scons_subst` in *mode*."""
     res = result
     if is_String(result):
         # Remove $(-$) pairs and any stuff in between,
@@ -902,6 +966,157 @@ def scons_subst(strSubst, env, mode=SUBST_RAW, target=None, source=None, gvars={
 
     return result
 
+# The variables which differ from one target of an action to the next.
+_sig_vars = (
+    'TARGET', 'TARGETS', 'SOURCE', 'SOURCES',
+    'CHANGED_TARGETS', 'CHANGED_SOURCES',
+    'UNCHANGED_TARGETS', 'UNCHANGED_SOURCES',
+)
+
+# The markers the stand-ins for them leave in a signature template.
+_sig_marker = re.compile('\0(%s)\0' % '|'.join(_sig_vars))
+
+# What the expansion of one of the variables must look like for it to
+# be put in place of its marker: text the final pass of scons_subst()
+# over the result--stripping $( $), squeezing white space--leaves
+# alone wherever it lands.
+_sig_piece = re.compile(r'[^\s$(){}\0][^\s${}\0]*(?: [^\s${}\0]+)*\Z')
+
+
+def _no_nodes(*args, **kw):
+    return []
+
+
+class _SigStandIn:
+    """A stand-in for $TARGET, $SOURCES and the like in a signature template.
+
+    Converted for the signature it gives a marker, which the expansion
+    of the variable for each target is put in place of.  It is true,
+    as the variable is for the targets the template is filled for.
+    Anything else done with it is counted as a use, which would make
+    the template depend on the targets and sources, and gives an empty
+    result.
+    """
+
+    def __init__(self, name, subber) -> None:
+        self.name = name
+        self.subber = subber
+
+    def for_signature(self) -> str:
+        return '\0%s\0' % self.name
+
+    def _use(self) -> None:
+        self.subber.uses += 1
+
+    def __getattr__(self, attr):
+        self._use()
+        return _no_nodes
+
+    def __getitem__(self, i):
+        self._use()
+        return SCons.Util.NullSeq()
+
+    def __iter__(self):
+        self._use()
+        return iter(())
+
+    def __len__(self) -> int:
+        self._use()
+        return 0
+
+    def __bool__(self) -> bool:
+        self.subber.tested.add(self.name)
+        return True
+
+    def __str__(self) -> str:
+        self._use()
+        return ''
+
+    __repr__ = __str__
+
+
+class _SigTemplateSubber(StringSubber):
+    """A StringSubber counting the uses of the target and source stand-ins.
+
+    A use while expanding something which ends up entirely between
+    $( and $), like the ``TARGET.RDirs`` looking up $_CPPINCFLAGS,
+    is forgiven, since it is stripped from the signature.
+    """
+
+    def __init__(self, env, gvars) -> None:
+        super().__init__(env, SUBST_SIG, _strconv[SUBST_SIG], gvars)
+        self.uses = 0
+        self.tested = set()
+
+    def expand(self, s, lvars):
+        uses = self.uses
+        result = super().expand(s, lvars)
+        if self.uses > uses and is_Sequence(result) and result \
+                and _remove_list(list(result)) == []:
+            self.uses = uses
+        return result
+
+
+def subst_sig_template(strSubst, env, gvars={}, lvars={}):
+    """Compile a string into a signature template.
+
+    The string is substituted as :func:`scons_subst` does in
+    ``SUBST_SIG`` mode, but with stand-ins for the variables of
+    the targets and sources.  Returns a pair, for
+    :func:`fill_sig_template`: the result split around the markers
+    the stand-ins leave, with the names of the variables at the odd
+    indexes, and the names of those tested for truth.  Returns None
+    if the signature depends on the targets and sources in any other
+    way, or the substitution fails.
+    """
+    if (isinstance(strSubst, str) and '$' not in strSubst) or isinstance(strSubst, CmdStringHolder):
+        return (strSubst,), ()
+
+    ss = _SigTemplateSubber(env, gvars)
+    lvars = lvars.copy()
+    for name in _sig_vars:
+        lvars[name] = _SigStandIn(name, ss)
+    gvars['__builtins__'] = __builtins__
+    try:
+        result = _finish_subst(ss.substitute(strSubst, lvars), SUBST_SIG)
+    except Exception:
+        return None
+    finally:
+        # A nested substitution may have taken it out already.
+        gvars.pop('__builtins__', None)
+    if ss.uses or not is_String(result):
+        return None
+    return tuple(_sig_marker.split(result)), tuple(ss.tested)
+
+
+def fill_sig_template(template, env, target=None, source=None, gvars={}, lvars={}):
+    """Put the targets and sources into a signature template.
+
+    Returns what ``scons_subst(strSubst, env, SUBST_SIG, ...)`` would,
+    for the string the template was compiled from, or None if one of
+    their variables tested for truth is false, or the expansion of
+    one is not simple enough to put in place of its marker.
+    """
+    pieces, tested = template
+    if len(pieces) == 1 and not tested:
+        return pieces[0]
+    if 'TARGET' not in lvars:
+        lvars = lvars.copy()
+        lvars.update(subst_dict(target, source))
+    for name in tested:
+        if not lvars[name]:
+            return None
+    conv = _strconv[SUBST_SIG]
+    ss = StringSubber(env, SUBST_SIG, conv, gvars)
+    result = list(pieces)
+    for i in range(1, len(result), 2):
+        piece = conv(ss.expand('$' + result[i], lvars))
+        if not is_String(piece) or not _sig_piece.match(piece):
+            return None
+        result[i] = piece
+    return ''.join(result)
+
+
 def scons_subst_list(strSubst, env, mode=SUBST_RAW, target=None, source=None, gvars={}, lvars={}, conv=None, overrides: dict | None = None):
     """Substitute construction variables in a string (or list or other
     object) and separate the arguments into a command list.
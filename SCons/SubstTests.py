@@ -29,6 +29,7 @@ from collections import UserString
 from functools import partial
 
 import SCons.Errors
+import SCons.Subst
 
 from SCons.Subst import (
     Literal,
@@ -1194,6 +1195,127 @@ class scons_subst_once_TestCase(unittest.TestCase):
             del cases[:3]
         assert failed == 0, "%d subst() cases failed" % failed
 
+class template_TestCase(unittest.TestCase):
+
+    def tearDown(self) -> None:
+        SCons.Subst.TEMPLATE_CACHE_SIZE = 10000
+
+    def test_string_template(self) -> None:
+        """Test compiling strings for scons_subst()"""
+        t = SCons.Subst.string_template('$CC -o ${TARGET} $$x')
+        assert t == ('', '$CC', ' -o ', '${TARGET}', ' ', '$$', 'x'), t
+        # Kept from the second time on.
+        t = SCons.Subst.string_template('$CC -o ${TARGET} $$x')
+        assert SCons.Subst.string_template('$CC -o ${TARGET} $$x') is t
+        assert SCons.Subst.string_template('no tokens') == ('no tokens',)
+
+    def test_list_template(self) -> None:
+        """Test compiling strings for scons_subst_list()"""
+        t = SCons.Subst.list_template('$CC  -o ${TARGET}\n$(x$)')
+        assert t == ('$CC', '  ', '-o', ' ', '${TARGET}', '\n', '$(', 'x', '$)'), t
+        t = SCons.Subst.list_template('$CC  -o ${TARGET}\n$(x$)')
+        assert SCons.Subst.list_template('$CC  -o ${TARGET}\n$(x$)') is t
+
+    def test_cache_size(self) -> None:
+        """Test that the template cache is bounded"""
+        SCons.Subst.TEMPLATE_CACHE_SIZE = 3
+        for i in range(10):
+            SCons.Subst.string_template('$X%d' % i)
+            SCons.Subst.string_template('$X%d' % i)
+            assert len(SCons.Subst._string_templates) <= 3
+            assert len(SCons.Subst._string_seen) <= 3
+
+    def test_seen_once(self) -> None:
+        """Test that strings seen once do not push out the others"""
+        SCons.Subst.TEMPLATE_CACHE_SIZE = 3
+        SCons.Subst._string_templates.clear()
+        SCons.Subst.string_template('$HOT')
+        hot = SCons.Subst.string_template('$HOT')
+        for i in range(10):
+            SCons.Subst.string_template('$ONCE%d' % i)
+        assert SCons.Subst.string_template('$HOT') is hot
+        assert list(SCons.Subst._string_templates) == ['$HOT']
+
+    def test_new_value(self) -> None:
+        """Test that a variable given a new value is compiled again"""
+        gvars = {'CCCOM': '$CC -c', 'CC': 'cc'}
+        env = DummyEnv(gvars)
+        assert scons_subst('$CCCOM', env, gvars=gvars) == 'cc -c'
+        assert scons_subst_list('$CCCOM', env, gvars=gvars) == [['cc', '-c']]
+        gvars['CCCOM'] = '$CC -E'
+        assert scons_subst('$CCCOM', env, gvars=gvars) == 'cc -E'
+        assert scons_subst_list('$CCCOM', env, gvars=gvars) == [['cc', '-E']]
+
+class RDirsNode(DummyNode):
+    def RDirs(self, pathlist):
+        return pathlist
+
+def RDirsFlags(target):
+    # Like _concat() with affect_signature=False.
+    return ['$(', '-I' + str(target.RDirs(['inc'])), '$)']
+
+def IfSources(target, source, env, for_signature) -> str:
+    return 'x' if source else 'y'
+
+class sig_template_TestCase(unittest.TestCase):
+
+    gvars = {
+        'CC': 'cc',
+        'CCCOM': '$CC -o $TARGET -c $_CCCOMCOM  $SOURCES',
+        '_CCCOMCOM': '-DX ${RDIRSFLAGS(TARGET)}',
+        'RDIRSFLAGS': RDirsFlags,
+        'ABSPATH': '$TARGET.abspath',
+        'FIRST': '${SOURCES[0]}',
+        'IFSOURCES': IfSources,
+        'CHANGED': '$CHANGED_SOURCES',
+    }
+
+    def compile(self, s):
+        env = DummyEnv(self.gvars)
+        return SCons.Subst.subst_sig_template(s, env, gvars=self.gvars)
+
+    def fill(self, template, t, s):
+        env = DummyEnv(self.gvars)
+        target = [RDirsNode(x) for x in t]
+        source = [RDirsNode(x) for x in s]
+        return SCons.Subst.fill_sig_template(template, env, target, source, gvars=self.gvars)
+
+    def test_sig_template(self) -> None:
+        """Test compiling and filling signature templates"""
+        template = self.compile('$CCCOM')
+        pieces, tested = template
+        assert pieces == ('cc -o ', 'TARGET', ' -c -DX ', 'SOURCES', ''), pieces
+        for t, s in ((['a.o'], ['a.c']), (['b c.o'], ['b.c', 'c.c'])):
+            r = self.fill(template, t, s)
+            expect = scons_subst('$CCCOM', DummyEnv(self.gvars), SUBST_SIG,
+                                 [RDirsNode(x) for x in t],
+                                 [RDirsNode(x) for x in s], gvars=self.gvars)
+            assert r == expect, (r, expect)
+
+        assert self.compile('no dollars  here') == (('no dollars  here',), ())
+        assert self.fill(self.compile('cc'), ['a.o'], ['a.c']) == 'cc'
+        template = self.compile('$CHANGED')
+        assert self.fill(template, ['a.o'], ['a.c', 'b.c']) == 'a.c b.c'
+
+    def test_depends(self) -> None:
+        """Test strings depending on the targets and sources otherwise"""
+        assert self.compile('$ABSPATH') is None
+        assert self.compile('$FIRST') is None
+        assert self.compile('$( $) $)') is None
+
+        # Testing the sources for truth is fine, as long as they are.
+        template = self.compile('$IFSOURCES')
+        assert template == (('x',), ('SOURCES',)), template
+        assert self.fill(template, ['a.o'], ['a.c']) == 'x'
+        assert self.fill(template, ['a.o'], []) is None
+
+    def test_unfit(self) -> None:
+        """Test names which cannot be put into a template"""
+        template = self.compile('$CCCOM')
+        for name in ('d  d.o', 'd\td.o', ' d.o', '$d.o', '(d.o', 'd{}.o'):
+            assert self.fill(template, [name], ['d.c']) is None, name
+        assert self.fill(template, ['a.o'], []) is None
+
 class quote_spaces_TestCase(unittest.TestCase):
     def test_quote_spaces(self) -> None:
         """Test the quote_spaces() method..."""
@@ -29,6 +29,7 @@ stop, and wait on jobs.
 
 import SCons.compat
 
+import collections
 import logging
 import os
 import queue
@@ -38,7 +39,9 @@ import threading
 
 from enum import Enum
 
+import SCons.Action
 import SCons.Errors
+import SCons.Taskmaster
 import SCons.Warnings
 
 
@@ -66,6 +69,108 @@ class InterruptState:
         return self.interrupted
 
 
+class Throttle:
+    """Hold back the start of jobs while the machine is overloaded.
+
+    A parallel build asks the throttle before executing each task.
+    While at least one job is running, a new one is only started if
+    the 1-minute load average is below *max_load* (if set), and if the
+    memory the task is expected to need, its *memory weight*, fits in
+    the available memory reported in ``/proc/meminfo``.  Weights come
+    from the ``$JOB_MEMORY`` construction variable in the target's
+    build environment, in MiB: either a number, or a dict mapping
+    builder names to numbers.  The weights of jobs already running are
+    subtracted from the available memory, as they may not have reached
+    their peak yet.  A job held back keeps its worker thread waiting,
+    which lowers the active parallelism until the machine recovers.
+
+    The first job is never held back, so the build always progresses.
+    Where load average or memory information is unavailable, that
+    check is skipped.
+    """
+
+    # Seconds between re-checks while a job is held back. Running jobs
+    # finishing also wake up held-back ones.
+    poll_interval = 0.5
+
+    def __init__(self, max_load: float = 0.0) -> None:
+        self.max_load = max_load
+        self.cv = threading.Condition()
+        self.running = 0
+        self.reserved = 0
+
+    @staticmethod
+    def load_average():
+        """Return the 1-minute system load average, or None."""
+        try:
+            return os.getloadavg()[0]
+        except (AttributeError, OSError):
+            return None
+
+    @staticmethod
+    def memory_available():
+        """Return the available memory in MiB, or None."""
+        try:
+            with open('/proc/meminfo') as f:
+                for line in f:
+                    if line.startswith('MemAvailable:'):
+                        return int(line.split()[1]) // 1024
+        except (OSError, ValueError, IndexError):
+            pass
+        return None
+
+    @staticmethod
+    def memory_weight(task) -> int:
+        """Return the memory weight of *task*, from ``$JOB_MEMORY``."""
+        try:
+            node = task.targets[0]
+            if not node.has_builder():
+                return 0
+            env = node.get_build_env()
+        except Exception:
+            return 0
+        weight = env.get('JOB_MEMORY')
+        if isinstance(weight, dict):
+            # A builder may be registered under several names
+            # (Object and StaticObject, for instance); use any of them.
+            builders = env.get('BUILDERS', {})
+            weight = next((weight[name] for name in builders
+                           if name in weight and builders[name] == node.builder),
+                          None)
+        try:
+            return max(0, int(weight or 0))
+        except (TypeError, ValueError):
+            return 0
+
+    def overloaded(self, weight) -> bool:
+        if self.max_load:
+            load = self.load_average()
+            if load is not None and load >= self.max_load:
+                return True
+        if weight:
+            available = self.memory_available()
+            if available is not None and available - self.reserved < weight:
+                return True
+        return False
+
+    def acquire(self, task) -> int:
+        """Wait until *task* may start; returns the token for :meth:`release`."""
+        weight = self.memory_weight(task)
+        with self.cv:
+            while self.running and self.overloaded(weight):
+                self.cv.wait(self.poll_interval)
+            self.running += 1
+            self.reserved += weight
+        return weight
+
+    def release(self, weight) -> None:
+        """Note that a task started by :meth:`acquire` has finished."""
+        with self.cv:
+            self.running -= 1
+            self.reserved -= weight
+            self.cv.notify_all()
+
+
 class Jobs:
     """An instance of this class initializes N jobs, and provides
     methods for starting, stopping, and waiting on all N jobs.
@@ -74,8 +179,14 @@ class Jobs:
     def __init__(self, num, taskmaster) -> None:
         """
         Create 'num' jobs using the given taskmaster. The exact implementation
-        used varies with the number of jobs requested and the state of the `legacy_sched` flag
-        to `--experimental`.
+        used varies with the number of jobs requested and the state of the
+        `legacy_sched` flag to `--experimental`; the `process_pool` flag
+        sets up worker processes for Python function actions created with
+        ``process_pool=True``.  For parallel builds,
+        ``--schedule=critical-path`` makes the taskmaster hand out the
+        ready nodes with the longest estimated remaining build time first.
+        Parallel jobs are held back by a :class:`Throttle` while the system
+        is overloaded.
         """
 
         # Importing GetOption here instead of at top of file to avoid
@@ -87,14 +198,28 @@ class Jobs:
         if stack_size is None:
             stack_size = default_stack_size
 
+        # Parallel jobs are started only while the machine has the
+        # load and memory headroom for them.
+        throttle = None
+        if num > 1:
+            throttle = Throttle(GetOption('load_average') or 0.0)
+
         experimental_option = GetOption('experimental') or []
         if 'legacy_sched' in experimental_option:
             if num > 1:
-                self.job = LegacyParallel(taskmaster, num, stack_size)
+                self.job = LegacyParallel(taskmaster, num, stack_size, throttle)
             else:
                 self.job = Serial(taskmaster)
         else:
-            self.job = NewParallel(taskmaster, num, stack_size)
+            self.job = NewParallel(taskmaster, num, stack_size, throttle)
+
+        if num > 1 and GetOption('schedule') == 'critical-path':
+            taskmaster.set_priority(SCons.Taskmaster.CriticalPathPriority())
+
+        # Python function actions which opt in can run in worker
+        # processes instead of holding the GIL in a job thread.
+        if num > 1 and 'process_pool' in experimental_option:
+            SCons.Action.process_pool = SCons.Action.ProcessPool(num)
 
         self.num_jobs = num
 
@@ -113,6 +238,9 @@ class Jobs:
         finally:
             postfunc()
             self._reset_sig_handler()
+            if SCons.Action.process_pool is not None:
+                SCons.Action.process_pool.shutdown()
+                SCons.Action.process_pool = None
 
     def were_interrupted(self):
         """Returns whether the jobs were interrupted by a signal."""
@@ -233,12 +361,13 @@ class Worker(threading.Thread):
     dequeues the task, executes it, and posts a tuple including the task
     and a boolean indicating whether the task executed successfully. """
 
-    def __init__(self, requestQueue, resultsQueue, interrupted) -> None:
+    def __init__(self, requestQueue, resultsQueue, interrupted, throttle=None) -> None:
         super().__init__()
         self.daemon = True
         self.requestQueue = requestQueue
         self.resultsQueue = resultsQueue
         self.interrupted = interrupted
+        self.throttle = throttle
         self.start()
 
     def run(self):
@@ -251,6 +380,8 @@ class Worker(threading.Thread):
                 # are no more tasks, so we should quit.
                 break
 
+            if self.throttle is not None:
+                weight = self.throttle.acquire(task)
             try:
                 if self.interrupted():
                     raise SCons.Errors.BuildError(
@@ -261,13 +392,15 @@ class Worker(threading.Thread):
                 ok = False
             else:
                 ok = True
+            if self.throttle is not None:
+                self.throttle.release(weight)
 
             self.resultsQueue.put((task, ok))
 
 class ThreadPool:
     """This class is responsible for spawning and managing worker threads."""
 
-    def __init__(self, num, stack_size, interrupted) -> None:
+    def __init__(self, num, stack_size, interrupted, throttle=None) -> None:
         """Create the request and reply queues, and 'num' worker threads.
 
         One must specify the stack size of the worker threads. The
@@ -291,7 +424,7 @@ class ThreadPool:
         # Create worker threads
         self.workers = []
         for _ in range(num):
-            worker = Worker(self.requestQueue, self.resultsQueue, interrupted)
+            worker = Worker(self.requestQueue, self.resultsQueue, interrupted, throttle)
             self.workers.append(worker)
 
         if 'prev_size' in locals():
@@ -344,7 +477,7 @@ class LegacyParallel:
     This class is thread safe.
     """
 
-    def __init__(self, taskmaster, num, stack_size) -> None:
+    def __init__(self, taskmaster, num, stack_size, throttle=None) -> None:
         """Create a new parallel job given a taskmaster.
 
         The taskmaster's next_task() method should return the next
@@ -361,7 +494,7 @@ class LegacyParallel:
 
         self.taskmaster = taskmaster
         self.interrupted = InterruptState()
-        self.tp = ThreadPool(num, stack_size, self.interrupted)
+        self.tp = ThreadPool(num, stack_size, self.interrupted, throttle)
 
         self.maxjobs = num
 
@@ -462,7 +595,7 @@ class NewParallel:
             pass
         def wait(self):
             fatal();
-        def notify(self):
+        def notify(self, n=1):
             pass
         def notify_all(self):
             pass
@@ -471,10 +604,11 @@ class NewParallel:
         def __exit__(self, *args):
             pass
 
-    def __init__(self, taskmaster, num, stack_size) -> None:
+    def __init__(self, taskmaster, num, stack_size, throttle=None) -> None:
         self.taskmaster = taskmaster
         self.max_workers = num
         self.stack_size = stack_size
+        self.throttle = throttle
         self.interrupted = InterruptState()
         self.workers = []
 
@@ -485,9 +619,11 @@ class NewParallel:
         # this mutex.
         self.tm_lock = (threading.Lock if self.max_workers > 1 else NewParallel.FakeLock)()
 
-        # Guarded under `tm_lock`.
+        # Guarded under `tm_lock`. `jobs` counts the tasks that are
+        # executing or waiting in `ready_tasks` to be picked up.
         self.jobs = 0
         self.state = NewParallel.State.READY
+        self.ready_tasks = collections.deque()
 
         # The `can_search_cv` is used to manage a leader /
         # follower pattern for access to the taskmaster, and to
@@ -593,140 +729,171 @@ class NewParallel:
                         self.trace_message("Detected stall with completed task, bypassing wait")
                     self.state = NewParallel.State.READY
 
-                # Wait until we are neither searching nor stalled.
-                while self.state == NewParallel.State.SEARCHING or self.state == NewParallel.State.STALLED:
+                # Wait until we are neither searching nor stalled,
+                # or until a searcher has left a task for us.
+                while (self.state == NewParallel.State.SEARCHING or self.state == NewParallel.State.STALLED) \
+                        and not self.ready_tasks:
                     if self.trace:
                         self.trace_message("Search already in progress, waiting")
                     self.can_search_cv.wait()
 
+                # If a searcher found more tasks than it could execute
+                # itself, take one of those. We don't need to turn
+                # the taskmaster crank for it.
+                if self.ready_tasks:
+                    if self.trace:
+                        self.trace_message("Taking a task handed out by the searcher")
+                    task = self.ready_tasks.popleft()
+
                 # If someone set the completed flag, bail.
-                if self.state == NewParallel.State.COMPLETED:
+                elif self.state == NewParallel.State.COMPLETED:
                     if self.trace:
                         self.trace_message("Completion detected, breaking from main loop")
                     break
 
-                # Set the searching flag to indicate that a thread
-                # is currently in the critical section for
-                # taskmaster work.
-                #
-                if self.trace:
-                    self.trace_message("Starting search")
-                self.state = NewParallel.State.SEARCHING
-
-                # Bulk acquire the tasks in the results queue
-                # under the result queue lock, then process them
-                # all outside that lock. We need to process the
-                # tasks in the results queue before looking for
-                # new work because we might be unable to find new
-                # work if we don't.
-                results_queue = []
-                with self.results_queue_lock:
-                    results_queue, self.results_queue = self.results_queue, results_queue
+                else:
+                    # Turn the taskmaster crank. Rather than stopping
+                    # at the first task that needs execution, keep
+                    # searching while there are idle worker slots, so
+                    # one acquisition of `tm_lock` hands out a batch
+                    # of tasks. The extras go on `ready_tasks`, where
+                    # waiting workers take them without searching.
+                    # Set the searching flag to indicate that a thread
+                    # is currently in the critical section for
+                    # taskmaster work.
+                    #
+                    if self.trace:
+                        self.trace_message("Starting search")
+                    self.state = NewParallel.State.SEARCHING
+
+                    # Bulk acquire the tasks in the results queue
+                    # under the result queue lock, then process them
+                    # all outside that lock. We need to process the
+                    # tasks in the results queue before looking for
+                    # new work because we might be unable to find new
+                    # work if we don't.
+                    results_queue = []
+                    with self.results_queue_lock:
+                        results_queue, self.results_queue = self.results_queue, results_queue
 
-                if self.trace:
-                    self.trace_message(f"Found {len(results_queue)} completed tasks to process")
-                for (rtask, rresult) in results_queue:
-                    if rresult:
-                        rtask.executed()
-                    else:
-                        if self.interrupted():
+                    if self.trace:
+                        self.trace_message(f"Found {len(results_queue)} completed tasks to process")
+                    for (rtask, rresult) in results_queue:
+                        if rresult:
+                            rtask.executed()
+                        else:
+                            if self.interrupted():
+                                try:
+                                    raise SCons.Errors.BuildError(
+                                        rtask.targets[0], errstr=interrupt_msg)
+                                except Exception:
+                                    rtask.exception_set()
+
+                            # Let the failed() callback function arrange
+                            # for the build to stop if that's appropriate.
+                            rtask.failed()
+
+                        rtask.postprocess()
+                        self.jobs -= 1
+
+                    # We are done with any task objects that were in
+                    # the results queue.
+                    results_queue.clear()
+
+                    # Now, turn the crank on the taskmaster until we
+                    # either run out of tasks, or have found a task that
+                    # needs execution for every free worker slot. If we
+                    # run out of tasks without finding any, go idle until
+                    # results arrive if jobs are pending, or mark the walk
+                    # as complete if not.
+                    while self.state == NewParallel.State.SEARCHING:
+                        if self.trace:
+                            self.trace_message("Searching for new tasks")
+                        task = self.taskmaster.next_task()
+
+                        if task:
+                            # We found a task. Walk it through the
+                            # task lifecycle. If it does not need
+                            # execution, just complete the task and
+                            # look for the next one. Otherwise, queue it
+                            # and keep searching while there is room for
+                            # more jobs.
                             try:
-                                raise SCons.Errors.BuildError(
-                                    rtask.targets[0], errstr=interrupt_msg)
+                                task.prepare()
                             except Exception:
-                                rtask.exception_set()
-
-                        # Let the failed() callback function arrange
-                        # for the build to stop if that's appropriate.
-                        rtask.failed()
-
-                    rtask.postprocess()
-                    self.jobs -= 1
-
-                # We are done with any task objects that were in
-                # the results queue.
-                results_queue.clear()
+                                task.exception_set()
+                                task.failed()
+                                task.postprocess()
+                            else:
+                                if not task.needs_execute():
+                                    if self.trace:
+                                        self.trace_message("Found internal task")
+                                    task.executed()
+                                    task.postprocess()
+                                else:
+                                    self.jobs += 1
+                                    if self.trace:
+                                        self.trace_message("Found task requiring execution")
+                                    self.ready_tasks.append(task)
+                                    # If we haven't reached the limit, spawn a
+                                    # new thread to pick up a queued task or turn
+                                    # the crank for the next one.
+                                    self._maybe_start_worker()
+                                    if self.jobs >= self.max_workers:
+                                        self.state = NewParallel.State.READY
+
+                        elif self.ready_tasks:
+                            # The walk has nothing more for now, but we did
+                            # find work on this pass.
+                            self.state = NewParallel.State.READY
 
-                # Now, turn the crank on the taskmaster until we
-                # either run out of tasks, or find a task that
-                # needs execution. If we run out of tasks, go idle
-                # until results arrive if jobs are pending, or
-                # mark the walk as complete if not.
-                while self.state == NewParallel.State.SEARCHING:
-                    if self.trace:
-                        self.trace_message("Searching for new tasks")
-                    task = self.taskmaster.next_task()
-
-                    if task:
-                        # We found a task. Walk it through the
-                        # task lifecycle. If it does not need
-                        # execution, just complete the task and
-                        # look for the next one. Otherwise,
-                        # indicate that we are no longer searching
-                        # so we can drop out of this loop, execute
-                        # the task outside the lock, and allow
-                        # another thread in to search.
-                        try:
-                            task.prepare()
-                        except Exception:
-                            task.exception_set()
-                            task.failed()
-                            task.postprocess()
                         else:
-                            if not task.needs_execute():
+                            # We failed to find a task, so this thread
+                            # cannot continue turning the taskmaster
+                            # crank. We must exit the loop.
+                            if self.jobs:
+                                # No task was found, but there are
+                                # outstanding jobs executing that
+                                # might unblock new tasks when they
+                                # complete. Transition to the stalled
+                                # state. We do not need a notify,
+                                # because we know there are threads
+                                # outstanding that will re-enter the
+                                # loop.
+                                #
                                 if self.trace:
-                                    self.trace_message("Found internal task")
-                                task.executed()
-                                task.postprocess()
+                                    self.trace_message("Found no task requiring execution, but have jobs: marking stalled")
+                                self.state = NewParallel.State.STALLED
                             else:
-                                self.jobs += 1
+                                # We didn't find a task and there are
+                                # no jobs outstanding, so there is
+                                # nothing that will ever return
+                                # results which might unblock new
+                                # tasks. We can conclude that the walk
+                                # is complete. Update our state to
+                                # note completion and awaken anyone
+                                # sleeping on the condvar.
+                                #
                                 if self.trace:
-                                    self.trace_message("Found task requiring execution")
-                                self.state = NewParallel.State.READY
-                                self.can_search_cv.notify()
-                                # This thread will be busy taking care of
-                                # `execute`ing this task. If we haven't
-                                # reached the limit, spawn a new thread to
-                                # turn the crank and find the next task.
-                                self._maybe_start_worker()
-
-                    else:
-                        # We failed to find a task, so this thread
-                        # cannot continue turning the taskmaster
-                        # crank. We must exit the loop.
-                        if self.jobs:
-                            # No task was found, but there are
-                            # outstanding jobs executing that
-                            # might unblock new tasks when they
-                            # complete. Transition to the stalled
-                            # state. We do not need a notify,
-                            # because we know there are threads
-                            # outstanding that will re-enter the
-                            # loop.
-                            #
-                            if self.trace:
-                                self.trace_message("Found no task requiring execution, but have jobs: marking stalled")
-                            self.state = NewParallel.State.STALLED
-                        else:
-                            # We didn't find a task and there are
-                            # no jobs outstanding, so there is
-                            # nothing that will ever return
-                            # results which might unblock new
-                            # tasks. We can conclude that the walk
-                            # is complete. Update our state to
-                            # note completion and awaken anyone
-                            # sleeping on the condvar.
-                            #
-                            if self.trace:
-                                self.trace_message("Found no task requiring execution, and have no jobs: marking complete")
-                            self.state = NewParallel.State.COMPLETED
-                            self.can_search_cv.notify_all()
+                                    self.trace_message("Found no task requiring execution, and have no jobs: marking complete")
+                                self.state = NewParallel.State.COMPLETED
+                                self.can_search_cv.notify_all()
+
+                    # Keep the first task we found for ourselves, and
+                    # wake up a waiting thread for each of the others,
+                    # plus one more to take over the search.
+                    task = None
+                    if self.ready_tasks:
+                        task = self.ready_tasks.popleft()
+                        self.can_search_cv.notify(len(self.ready_tasks) + 1)
 
             # We no longer hold `tm_lock` here. If we have a task,
             # we can now execute it. If there are threads waiting
             # to search, one of them can now begin turning the
             # taskmaster crank in NewParallel.
             if task:
+                if self.throttle is not None:
+                    weight = self.throttle.acquire(task)
                 if self.trace:
                     self.trace_message("Executing task")
                 ok = True
@@ -738,6 +905,8 @@ class NewParallel:
                 except Exception:
                     ok = False
                     task.exception_set()
+                if self.throttle is not None:
+                    self.throttle.release(weight)
 
                 # Grab the results queue lock and enqueue the
                 # executed task and state. The next thread into
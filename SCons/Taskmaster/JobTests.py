@@ -21,6 +21,7 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+import logging
 import unittest
 import random
 import math
@@ -331,6 +332,132 @@ class ParallelTestCase(JobTestCase):
         finally:
             SCons.Taskmaster.Job.ThreadPool = SaveThreadPool
 
+class TraceTestCase(JobTestCase):
+    """Test the trace of the NewParallel scheduler."""
+
+    def test_ready_tasks(self) -> None:
+        """Test tracing the hand-out of a batch of ready tasks"""
+
+        class Trace:
+            """Stand-in for the taskmaster trace, collecting messages."""
+            def __init__(self) -> None:
+                self.messages = []
+                self.log_handler = logging.Handler()
+                self.log_handler.emit = lambda record: self.messages.append(record.getMessage())
+
+        taskmaster = Taskmaster(4, self, Task)
+        taskmaster.trace = Trace()
+        jobs = SCons.Taskmaster.Job.Jobs(4, taskmaster)
+        try:
+            jobs.run()
+        finally:
+            logging.getLogger("Job").removeHandler(taskmaster.trace.log_handler)
+        self.assertTrue(taskmaster.all_tasks_are_executed())
+
+        # The first search finds all four tasks, the searcher keeps one
+        # and the other three workers take theirs without searching.
+        messages = taskmaster.trace.messages
+        found = [m for m in messages if m.endswith("] Found task requiring execution")]
+        taken = [m for m in messages if m.endswith("] Taking a task handed out by the searcher")]
+        self.assertEqual(len(found), 4, messages)
+        self.assertEqual(len(taken), 3, messages)
+        self.assertTrue(all(m.startswith("NewParallel._work(): [Thread:") for m in taken),
+                        taken)
+
+
+class ThrottleTestCase(JobTestCase):
+    """Test the Throttle class, with faked load and memory readings."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.throttle = SCons.Taskmaster.Job.Throttle()
+        self.throttle.poll_interval = 0.01
+        self.load = 0.0
+        self.memory = 1000
+        self.throttle.load_average = lambda: self.load
+        self.throttle.memory_available = lambda: self.memory
+
+    def weighted(self, weight):
+        throttle = self.throttle
+        throttle.memory_weight = lambda task: weight
+        return throttle
+
+    def test_first_job(self) -> None:
+        """The first job is always started"""
+        throttle = self.weighted(5000)
+        throttle.max_load = 1.0
+        self.load = 10.0
+        token = throttle.acquire(None)
+        self.assertEqual(throttle.running, 1)
+        throttle.release(token)
+        self.assertEqual(throttle.running, 0)
+        self.assertEqual(throttle.reserved, 0)
+
+    def test_overloaded(self) -> None:
+        """Load average and memory weights hold back jobs"""
+        throttle = self.throttle
+        self.assertFalse(throttle.overloaded(0))
+        throttle.max_load = 2.0
+        self.load = 2.5
+        self.assertTrue(throttle.overloaded(0))
+        self.load = 1.5
+        self.assertFalse(throttle.overloaded(0))
+        self.assertFalse(throttle.overloaded(1000))
+        self.assertTrue(throttle.overloaded(1001))
+        throttle.reserved = 600
+        self.assertTrue(throttle.overloaded(500))
+        self.assertFalse(throttle.overloaded(400))
+        self.memory = None
+        self.assertFalse(throttle.overloaded(5000))
+
+    def test_wait(self) -> None:
+        """A held back job starts when a running job finishes"""
+        import threading
+
+        throttle = self.weighted(600)
+        first = throttle.acquire(None)
+        started = threading.Event()
+
+        def second() -> None:
+            throttle.release(throttle.acquire(None))
+            started.set()
+
+        t = threading.Thread(target=second)
+        t.start()
+        self.assertFalse(started.wait(0.1), "second job was not held back")
+        throttle.release(first)
+        self.assertTrue(started.wait(5), "second job was not started")
+        t.join()
+
+    def test_memory_weight(self) -> None:
+        """Memory weights are looked up in JOB_MEMORY"""
+        import SCons.Builder
+        import SCons.Environment
+
+        b1 = SCons.Builder.Builder(action='b1')
+        b2 = SCons.Builder.Builder(action='b2')
+        env = SCons.Environment.Base(BUILDERS={'B1': b1, 'B1alias': b1, 'B2': b2})
+
+        class T:
+            def __init__(self, targets) -> None:
+                self.targets = targets
+
+        weight = SCons.Taskmaster.Job.Throttle.memory_weight
+        n1 = env.B1('t1', 's1')
+        n2 = env.B2('t2', 's2')
+        self.assertEqual(weight(T(n1)), 0)
+        env['JOB_MEMORY'] = 100
+        self.assertEqual(weight(T(n1)), 100)
+        self.assertEqual(weight(T(n2)), 100)
+        env['JOB_MEMORY'] = {'B1alias': 300}
+        self.assertEqual(weight(T(n1)), 300)
+        self.assertEqual(weight(T(n2)), 0)
+        env['JOB_MEMORY'] = 'bogus'
+        self.assertEqual(weight(T(n1)), 0)
+        self.assertEqual(weight(T(env.fs.File('s1'))), 0)
+        self.assertEqual(weight(T([])), 0)
+
+
 class SerialTestCase(unittest.TestCase):
     def runTest(self) -> None:
         """test a serial job"""
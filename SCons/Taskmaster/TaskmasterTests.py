@@ -736,6 +736,64 @@ class TaskmasterTestCase(unittest.TestCase):
         assert t.targets == [n3], list(map(str, t.targets))
         assert t.top == 1, t.top
 
+    def test_critical_path_priority(self) -> None:
+        """Test handing out ready nodes by estimated critical path
+        """
+        def graph():
+            b1 = Node("b1")
+            c1 = Node("c1")
+            c2 = Node("c2", [c1])
+            c3 = Node("c3", [c2])
+            top = Node("top", [b1, c3])
+            return b1, c1, c2, c3, top
+
+        # Without a priority, the DAG walk order wins.
+        b1, c1, c2, c3, top = graph()
+        tm = SCons.Taskmaster.Taskmaster([top])
+        t = tm.next_task()
+        assert t.targets == [b1], list(map(str, t.targets))
+
+        # With no recorded durations, the longest chain goes first.
+        b1, c1, c2, c3, top = graph()
+        tm = SCons.Taskmaster.Taskmaster([top])
+        tm.set_priority(SCons.Taskmaster.CriticalPathPriority())
+        t = tm.next_task()
+        assert t.targets == [c1], list(map(str, t.targets))
+        t = tm.next_task()
+        assert t.targets == [b1], list(map(str, t.targets))
+        assert tm.next_task() is None
+
+        # Recorded durations outweigh the length of the chain.
+        class StoredInfo:
+            class binfo:
+                bduration = 10.0
+
+        b1, c1, c2, c3, top = graph()
+        b1.get_stored_info = lambda: StoredInfo
+        tm = SCons.Taskmaster.Taskmaster([top])
+        tm.set_priority(SCons.Taskmaster.CriticalPathPriority())
+        order = []
+        while True:
+            t = tm.next_task()
+            if t is None:
+                break
+            t.prepare()
+            t.execute()
+            t.executed()
+            t.postprocess()
+            order.append(t.targets[0].name)
+        assert order == ["b1", "c1", "c2", "c3", "top"], order
+
+        # Stopping discards the nodes waiting in the ready heap.
+        b1, c1, c2, c3, top = graph()
+        tm = SCons.Taskmaster.Taskmaster([top])
+        tm.set_priority(SCons.Taskmaster.CriticalPathPriority())
+        t = tm.next_task()
+        assert tm.ready_nodes, tm.ready_nodes
+        tm.stop()
+        assert tm.next_task() is None
+        assert not tm.ready_nodes, tm.ready_nodes
+
     def test_stop(self) -> None:
         """Test the stop() method
 
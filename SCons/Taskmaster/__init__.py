@@ -46,10 +46,12 @@ Task
     The Taskmaster instantiates a Task object for each (set of)
     target(s) that it decides need to be evaluated and/or built.
 """
+import heapq
 import io
 import sys
+import time
 from abc import ABC, abstractmethod
-from itertools import chain
+from itertools import chain, count
 import logging
 
 import SCons.Errors
@@ -243,8 +245,14 @@ class Task(ABC):
                     except OSError as e:
                         SCons.Warnings.warn(SCons.Warnings.CacheCleanupErrorWarning,
                             "Failed copying all target files from cache, Error while attempting to remove file %s retrieved from cache: %s" % (t.get_internal_path(), e))
+                # Record how long the build took on every target, so it
+                # ends up in the stored build info for critical path
+                # estimates in later runs (see CriticalPathPriority).
+                start_time = time.perf_counter()
                 self.targets[0].build()
+                duration = time.perf_counter() - start_time
                 for t in self.targets:
+                    t.build_duration = duration
                     t.push_to_cache()
             else:
                 for t in cached_targets:
@@ -601,6 +609,68 @@ def find_cycle(stack, visited):
     return None
 
 
+class CriticalPathPriority:
+    """Rank ready Nodes by their estimated remaining critical path.
+
+    The estimate for a Node is the time its last build took (recorded
+    as ``bduration`` in the stored build info), plus the largest
+    estimate among the Nodes waiting on it, all the way up to the
+    top-level targets.  Nodes which have never been built count as
+    taking no time, but every Node with a builder adds one to the path
+    length, which breaks ties: on a fresh build the longest chains of
+    builder invocations are started first.
+
+    Instances are callables suitable for :meth:`Taskmaster.set_priority`.
+    """
+
+    def __init__(self) -> None:
+        self.memo = {}
+
+    @staticmethod
+    def duration(node) -> float:
+        """Return the recorded build time of *node*, or zero if unknown."""
+        try:
+            return node.get_stored_info().binfo.bduration
+        except AttributeError:
+            return 0.0
+
+    def __call__(self, node):
+        """Return the sort key for *node*; lower keys are handed out first."""
+        try:
+            path_time, path_length = self.memo[node]
+        except KeyError:
+            path_time, path_length = self._critical_path(node)
+        return -path_time, -path_length
+
+    def _critical_path(self, node):
+        # Iterative post-order walk up the waiting_parents links, so
+        # deep chains don't run into the recursion limit.  A parent
+        # that is already on the stack means we went around a cycle;
+        # it just contributes nothing to the estimate.
+        memo = self.memo
+        stack = [node]
+        in_progress = set()
+        while stack:
+            n = stack[-1]
+            if n in memo:
+                stack.pop()
+                continue
+            if n not in in_progress:
+                pending = [p for p in n.waiting_parents
+                           if p not in memo and p not in in_progress]
+                if pending:
+                    in_progress.add(n)
+                    stack.extend(pending)
+                    continue
+            best = max((memo.get(p, (0.0, 0)) for p in n.waiting_parents),
+                       default=(0.0, 0))
+            weight = 1 if n.has_builder() else 0
+            memo[n] = (best[0] + self.duration(n), best[1] + weight)
+            in_progress.discard(n)
+            stack.pop()
+        return memo[node]
+
+
 class Taskmaster:
     """
     The Taskmaster for walking the dependency DAG.
@@ -620,9 +690,23 @@ class Taskmaster:
         self.message = None
         self.next_candidate = self.find_next_candidate
         self.pending_children = set()
+        self.priority = None
+        self.ready_nodes = []
+        self.ready_set = set()
+        self.ready_count = count()
         self.trace = False
         self.configure_trace(trace)
 
+    def set_priority(self, priority=None) -> None:
+        """Select the order in which ready Nodes are handed out.
+
+        By default Nodes are returned in the order the DAG walk finds
+        them.  If *priority* is a callable, it is called with each ready
+        Node and must return a sort key; the Node with the lowest key is
+        returned first.  See :class:`CriticalPathPriority`.
+        """
+        self.priority = priority
+
     def configure_trace(self, trace=None) -> None:
         """
         This handles the command line option --taskmastertrace=
@@ -720,6 +804,10 @@ class Taskmaster:
         because the cycle detection depends on the fact all nodes have
         been processed somehow.
         """
+        if self.ready_nodes:
+            self.candidates.extend(entry[-1] for entry in self.ready_nodes)
+            self.ready_nodes = []
+            self.ready_set = set()
         while self.candidates:
             candidates = self.candidates
             self.candidates = []
@@ -1012,6 +1100,55 @@ class Taskmaster:
 
         return None
 
+    def _find_next_priority_node(self):
+        """
+        Finds the ready node that the priority function ranks first.
+
+        Unlike :meth:`_find_next_ready_node`, which hands out the first
+        ready node it comes across, this drains the candidate list so
+        that every node which can currently be evaluated is known (and
+        so are their waiting parents), and keeps them in a heap ordered
+        by :attr:`priority`.  Nodes which hit a problem during the walk
+        are returned right away so the exception can be raised.
+
+        Nodes waiting in the heap stay in the pending state, so they can
+        come up in the walk again (through another parent); only the
+        first sighting is kept.
+        """
+        found = []
+        problem = None
+        ready_set = self.ready_set
+        while True:
+            node = self._find_next_ready_node()
+            if node is None:
+                break
+            if node in ready_set:
+                continue
+            if self.ready_exc:
+                problem = node
+                break
+            ready_set.add(node)
+            found.append(node)
+
+        if problem is None and self.next_candidate == self.no_next_candidate:
+            # We were stopped while walking the DAG.
+            ready_set.difference_update(found)
+            self.will_not_build(found)
+            return None
+
+        ready = self.ready_nodes
+        for node in found:
+            heapq.heappush(ready, (self.priority(node), next(self.ready_count), node))
+
+        if problem is not None:
+            return problem
+        try:
+            node = heapq.heappop(ready)[-1]
+        except IndexError:
+            return None
+        ready_set.discard(node)
+        return node
+
     def next_task(self):
         """
         Returns the next task to be executed.
@@ -1019,7 +1156,10 @@ class Taskmaster:
         This simply asks for the next Node to be evaluated, and then wraps
         it in the specific Task subclass with which we were initialized.
         """
-        node = self._find_next_ready_node()
+        if self.priority is None:
+            node = self._find_next_ready_node()
+        else:
+            node = self._find_next_priority_node()
 
         if node is None:
             return None
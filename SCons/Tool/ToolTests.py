@@ -27,8 +27,13 @@ import unittest
 
 import TestUnit
 
+import SCons.Action
+import SCons.Defaults
+import SCons.Environment
 import SCons.Errors
 import SCons.Tool
+import SCons.Tool.cc
+import SCons.Tool.cxx
 
 
 class DummyEnvironment:
@@ -119,6 +124,103 @@ class ToolTestCase(unittest.TestCase):
         _ = SCons.Tool.find_program_path(env, 'no_tool', default_paths=PHONY_PATHS, add_path=True)
         assert env.PHONY_PATH in env['ENV']['PATH'], env['ENV']['PATH']
 
+    def test_BatchKey(self) -> None:
+        """Test the batching of compiles by BatchKey"""
+        env = SCons.Environment.Environment(tools=[])
+        batch = SCons.Tool.BatchKey('XBATCH', 'XBATCHSIZE', '.o')
+        action = SCons.Action.Action('$XCOM')
+        def key(obj, src, e=env):
+            return batch(action, e, [env.File(obj)], [env.File(src)])
+
+        assert key('build/a.o', 'src/a.c') is None
+        env['XBATCH'] = '$DISABLED'
+        env['DISABLED'] = False
+        assert key('build/a.o', 'src/a.c') is None
+
+        env['XBATCH'] = 1
+        k = key('build/a.o', 'src/a.c')
+        assert k == (id(action), id(env), env.Dir('build'), env.Dir('src')), k
+        assert key('build/b.o', 'src/b.c') == k
+        assert key('build/c.o', 'src/sub/c.c') != k
+        assert key('build/d.o', 'src/e.c') is None
+        assert key('build/f.os', 'src/f.c') is None
+        env2 = env.Clone()
+        assert key('build/g.o', 'src/g.c', env2) != k
+
+        env['XBATCHSIZE'] = 2
+        keys = [key(f'out/{n}.o', f'src/{n}.c') for n in 'abcde']
+        assert keys[0] == keys[1] != keys[2] == keys[3] != keys[4], keys
+
+        env['XBATCHSIZE'] = 'many'
+        with self.assertRaises(SCons.Errors.UserError):
+            key('build/h.o', 'src/h.c')
+
+        # without a suffix, only the base names have to match
+        batch = SCons.Tool.BatchKey('XBATCH')
+        assert batch(action, env, [env.File('a.obj')], [env.File('a.c')])
+        assert not batch(action, env, [env.File('a.obj')], [env.File('b.c')])
+
+    def test_createBatchAction(self) -> None:
+        """Test the choice of action by createBatchAction"""
+        env = SCons.Environment.Environment(tools=[], XCOM='x', XBATCHCOM='xb')
+        batch = SCons.Tool.BatchKey('XBATCH', suffix='.o')
+        action = SCons.Action.Action('$XCOM')
+        batch_action = SCons.Action.Action('$XBATCHCOM', targets='$CHANGED_TARGETS')
+        act = SCons.Tool.createBatchAction(action, batch_action, batch)
+        t = [env.File('a.o')]
+        s = [env.File('a.c')]
+        assert act.genstring(t, s, env) == 'x'
+        env['XBATCH'] = True
+        assert act.genstring(t, s, env) == 'xb'
+        assert act.genstring([env.File('a.os')], s, env) == 'x'
+        assert act.genstring([], [], env) == 'x'
+
+    def test_cc_batch_flags(self) -> None:
+        """Test that batched C compiles get the flags of the usual ones"""
+        for platform in ('posix', 'darwin'):
+            env = SCons.Environment.Environment(tools=[], PLATFORM=platform)
+            SCons.Tool.Tool('cc')(env)
+            expect = env['_CCCOMCOM'].replace('$_CPPINCFLAGS', '$_CCBATCHINCFLAGS')
+            assert env['_CCBATCHCOMCOM'] == expect, env['_CCBATCHCOMCOM']
+        assert '$_FRAMEWORKPATH' in env['_CCBATCHCOMCOM'], env['_CCBATCHCOMCOM']
+
+    def test_cc_batch_action(self) -> None:
+        """Test that only environments which batch get the batch action"""
+        env = SCons.Environment.Environment(tools=['cc', 'c++'])
+        static_obj, shared_obj = SCons.Tool.createObjBuilders(env)
+        assert static_obj.cmdgen['.c'] is SCons.Defaults.CAction
+        assert static_obj.cmdgen['.cpp'] is SCons.Defaults.CXXAction
+        assert shared_obj.cmdgen['.c'] is SCons.Defaults.ShCAction
+
+        env = SCons.Environment.Environment(tools=['cc', 'c++'], CCBATCH=1)
+        static_obj, shared_obj = SCons.Tool.createObjBuilders(env)
+        assert static_obj.cmdgen['.c'] is SCons.Tool.cc.CAction
+        assert static_obj.cmdgen['.cpp'] is SCons.Tool.cxx.CXXAction
+        assert shared_obj.cmdgen['.c'] is SCons.Defaults.ShCAction
+        assert shared_obj.cmdgen['.cpp'] is SCons.Defaults.ShCXXAction
+
+    def test_cc_batch_relative_flags(self) -> None:
+        """Test that compiles with relative paths in their flags are not batched"""
+        env = SCons.Environment.Environment(tools=['cc', 'c++'], CCBATCH=1)
+        t = [env.File('build/a.o')]
+        s = [env.File('src/a.c')]
+        batch = SCons.Tool.cc._cc_batch
+        assert batch.batches(env, t, s)
+        for flags in (['-include', 'config.h'], ['-includeconfig.h'],
+                      ['-Iinc'], ['-isystem', 'ext'], ['-fprofile-use=prof'],
+                      ['@args'], ['--sysroot=root']):
+            e = env.Clone(CCFLAGS=flags)
+            assert not batch.batches(e, t, s), flags
+        for flags in (['-include', '/abs/config.h'], ['-I/abs/inc'],
+                      ['-fprofile-use'], ['-std=c99', '-O2'], ['-x', 'c'],
+                      ['-fprofile-update=atomic']):
+            e = env.Clone(CCFLAGS=flags)
+            assert batch.batches(e, t, s), flags
+        # the C++ flags count for C++ compiles only
+        e = env.Clone(CXXFLAGS=['-include', 'config.h'])
+        assert batch.batches(e, t, s)
+        assert not SCons.Tool.cxx._cxx_batch.batches(e, t, [env.File('src/a.cpp')])
+
 
 if __name__ == "__main__":
     loader = unittest.TestLoader()
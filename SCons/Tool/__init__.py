@@ -40,6 +40,7 @@ import sys
 import os
 import importlib.util
 
+import SCons.Action
 import SCons.Builder
 import SCons.Errors
 import SCons.Node.FS
@@ -428,6 +429,98 @@ def createObjBuilders(env):
     return (static_obj, shared_obj)
 
 
+class BatchKey:
+    """Batching of the compiles done by the object Builders.
+
+    An instance is called as the *batch_key* of the action of a compiler
+    which can build several objects in one run, like ``cl /c a.c b.c``
+    or ``cc -c a.c b.c``.  Batching is enabled by setting the construction
+    variable named *batch_var* to a true value.  Target+source pairs
+    which use the same action and construction environment, and have the
+    same target and source directories, are then built in one batch, of
+    at most as many sources as the construction variable named *size_var*
+    says, if that is set.
+
+    A target not named as the compiler names the object it builds from
+    its source is built on its own: if *suffix* is given, the target
+    must be the base name of the source plus *suffix*, otherwise just
+    have the base name of the source.
+
+    Since a batch key is added as a method to its action, the instance
+    must be called from a plain function, see
+    :func:`SCons.Tool.msvc.msvc_batch_key`.
+    """
+
+    def __init__(self, batch_var: str, size_var: str | None = None, suffix: str | None = None) -> None:
+        self.batch_var = batch_var
+        self.size_var = size_var
+        self.suffix = suffix
+        self.counts = {}
+
+    def enabled(self, env) -> bool:
+        """Returns whether batching is enabled in *env*."""
+        # Note we need to do the env.subst so the variable can be a
+        # reference to another construction variable, which is why we
+        # test for False and 0 as strings.
+        if self.batch_var not in env:
+            return False
+        return env.subst('$' + self.batch_var) not in ('0', 'False', '', None)
+
+    def fits(self, target, source) -> bool:
+        """Returns whether *target* is named as the compiler names the
+        object it builds from *source*."""
+        base = os.path.splitext(source[0].name)[0]
+        if self.suffix is None:
+            return os.path.splitext(target[0].name)[0] == base
+        return target[0].name == base + self.suffix
+
+    def size(self, env) -> int:
+        """Returns the batch size set in *env*, 0 for no limit."""
+        if not self.size_var:
+            return 0
+        size = env.subst('$' + self.size_var)
+        if not size:
+            return 0
+        try:
+            return max(int(size), 0)
+        except ValueError:
+            msg = f"${self.size_var} must be a number, not {size!r}"
+            raise SCons.Errors.UserError(msg) from None
+
+    def batches(self, env, target, source) -> bool:
+        """Returns whether *target* is built from *source* in a batch."""
+        return self.enabled(env) and self.fits(target, source)
+
+    def __call__(self, action, env, target, source):
+        if not self.batches(env, target, source):
+            # Returning None specifies that the target+source should
+            # not be batched with other compilations.
+            return None
+        key = (id(action), id(env), target[0].dir, source[0].dir)
+        size = self.size(env)
+        if size:
+            # Start a new batch after every size target+source pairs.
+            count = self.counts.get(key, 0)
+            self.counts[key] = count + 1
+            key += (count // size,)
+        return key
+
+
+def createBatchAction(action, batch_action, batch_key: BatchKey):
+    """Returns an action for an object Builder which can batch compiles.
+
+    The returned action is *action* for a target+source pair which
+    *batch_key* does not batch, and *batch_action*, which runs
+    ``$CHANGED_SOURCES`` and has the batch key, for one which it does.
+    """
+    def generator(target, source, env, for_signature):
+        if source and batch_key.batches(env, target, source):
+            return batch_action
+        return action
+
+    return SCons.Action.Action(generator, generator=True)
+
+
 def createCFileBuilders(env):
     """This is a utility function that creates the CFile/CXXFile
     Builders in an Environment if they
@@ -31,6 +31,10 @@ It will usually be imported through the generic SCons.Tool.Tool()
 selection method.
 """
 
+import os.path
+
+import SCons.Action
+import SCons.PathList
 import SCons.Tool
 import SCons.Defaults
 import SCons.Util
@@ -39,6 +43,96 @@ CSuffixes = ['.c', '.m']
 if not SCons.Util.case_sensitive_suffixes('.c', '.C'):
     CSuffixes.append('.C')
 
+# Options of gcc and clang which take a path, which a batched compile
+# would look up in the directory of the objects.  The options not
+# starting with -f or -specs also take the path as the next argument.
+_PATH_OPTIONS = (
+    '-include', '-imacros', '-isystem', '-idirafter', '-iquote', '-iprefix',
+    '-iwithprefixbefore', '-iwithprefix', '-isysroot', '--sysroot',
+    '-fprofile-use', '-fprofile-generate', '-fprofile-dir',
+    '-fprofile-instr-use', '-fprofile-instr-generate', '-fprofile-sample-use',
+    '-specs', '-MF', '-I', '-F', '-B', '-L',
+)
+
+def _relative_path_flag(flags) -> bool:
+    """Returns whether the substituted *flags* name a relative path."""
+    words = iter(flags)
+    for word in words:
+        word = str(word)
+        if word.startswith('@'):
+            path = word[1:]
+        else:
+            for option in _PATH_OPTIONS:
+                if word.startswith(option):
+                    break
+            else:
+                continue
+            path = word[len(option):]
+            if path.startswith('='):
+                path = path[1:]
+            elif option.startswith(('-f', '-specs')):
+                # without a path, or some other option with the same start
+                continue
+            elif not path:
+                path = str(next(words, ''))
+        if path and not os.path.isabs(path):
+            return True
+    return False
+
+class CCBatchKey(SCons.Tool.BatchKey):
+    """Batching of compiles with $CCBATCH.
+
+    The compiler cannot be told where to put more than one object, so it
+    is run in the directory of the objects and names each after its
+    source plus ``.o``.  The paths of the sources and of $CPPPATH are
+    made absolute; a compile whose *flags* name any other relative
+    path is not batched.
+    """
+
+    def __init__(self, flags: str) -> None:
+        super().__init__('CCBATCH', 'CCBATCHSIZE', '.o')
+        self.flags = flags
+
+    def batches(self, env, target, source) -> bool:
+        return (super().batches(env, target, source)
+                and not _relative_path_flag(env.subst_list(self.flags)[0]))
+
+_cc_batch = CCBatchKey('$CFLAGS $CCFLAGS $_CCBATCHCOMCOM')
+
+def cc_batch_key(action, env, target, source):
+    """Returns a key to identify unique batches of sources for compilation."""
+    return _cc_batch(action, env, target, source)
+
+def _batch_incflags(target, source, env, for_signature):
+    """Returns the flags for $CPPPATH with absolute paths, for the
+    batched compiles which run in the directory of the objects.
+
+    Like $_CPPINCFLAGS, they are left out of the signature.
+    """
+    if for_signature or not target or not env.get('CPPPATH'):
+        return None
+    paths = SCons.PathList.PathList(env['CPPPATH']).subst_path(env, target, source)
+    dirs = [d.get_abspath() for d in target[0].RDirs(paths)]
+    return SCons.Defaults._concat_ixes('$INCPREFIX', dirs, '$INCSUFFIX', env)
+
+def _batch_sources(sources):
+    """Returns the absolute paths of the changed *sources* of a batched
+    compile, which runs in the directory of the objects.
+
+    Outside of a build, as for the signature, $CHANGED_SOURCES is just
+    a reference to $SOURCES, which is returned as is.
+    """
+    if SCons.Util.is_List(sources):
+        return [s.get_abspath() for s in sources]
+    return sources
+
+CAction = SCons.Tool.createBatchAction(
+    SCons.Defaults.CAction,
+    SCons.Action.Action("$CCBATCHCOM", "$CCCOMSTR",
+                        batch_key=cc_batch_key,
+                        targets='$CHANGED_TARGETS'),
+    _cc_batch)
+
 def add_common_cc_variables(env) -> None:
     """
     Add underlying common "C compiler" variables that
@@ -55,6 +149,15 @@ def add_common_cc_variables(env) -> None:
         if env['PLATFORM'] == 'darwin':
             env['_CCCOMCOM'] = env['_CCCOMCOM'] + ' $_FRAMEWORKPATH'
 
+    if '_CCBATCHCOMCOM' not in env:
+        env['_CCBATCHINCFLAGS'] = _batch_incflags
+        env['_cc_batch_sources'] = _batch_sources
+        env['_CCBATCHSOURCES'] = '${_cc_batch_sources(CHANGED_SOURCES)}'
+        # The same as $_CCCOMCOM (with $_FRAMEWORKPATH on darwin), but
+        # with the include flags of the batched compiles.
+        env['_CCBATCHCOMCOM'] = str(env['_CCCOMCOM']).replace(
+            '$_CPPINCFLAGS', '$_CCBATCHINCFLAGS')
+
     if 'CCFLAGS' not in env:
         env['CCFLAGS']   = SCons.Util.CLVar('')
 
@@ -69,8 +172,15 @@ def generate(env) -> None:
     """
     static_obj, shared_obj = SCons.Tool.createObjBuilders(env)
 
+    # Batching is chosen when the tool is set up, so that environments
+    # which do not batch keep the plain action.  Shared objects are not
+    # named as the compiler names them, so they are never batched.
+    if _cc_batch.enabled(env):
+        c_action = CAction
+    else:
+        c_action = SCons.Defaults.CAction
     for suffix in CSuffixes:
-        static_obj.add_action(suffix, SCons.Defaults.CAction)
+        static_obj.add_action(suffix, c_action)
         shared_obj.add_action(suffix, SCons.Defaults.ShCAction)
         static_obj.add_emitter(suffix, SCons.Defaults.StaticObjectEmitter)
         shared_obj.add_emitter(suffix, SCons.Defaults.SharedObjectEmitter)
@@ -84,6 +194,7 @@ def generate(env) -> None:
     env['SHCC']      = '$CC'
     env['SHCFLAGS'] = SCons.Util.CLVar('$CFLAGS')
     env['SHCCCOM']   = '$SHCC -o $TARGET -c $SHCFLAGS $SHCCFLAGS $_CCCOMCOM $SOURCES'
+    env['CCBATCHCOM'] = '$( cd ${TARGET.dir.abspath} && $) $CC -c $CFLAGS $CCFLAGS $_CCBATCHCOMCOM $_CCBATCHSOURCES'
 
     env['CPPDEFPREFIX']  = '-D'
     env['CPPDEFSUFFIX']  = ''
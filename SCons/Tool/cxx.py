@@ -31,7 +31,10 @@ selection method.
 
 import os.path
 
+import SCons.Action
 import SCons.Defaults
+import SCons.Tool
+import SCons.Tool.cc
 import SCons.Util
 
 compilers = ['CC', 'c++']
@@ -40,6 +43,19 @@ CXXSuffixes = ['.cpp', '.cc', '.cxx', '.c++', '.C++', '.mm']
 if SCons.Util.case_sensitive_suffixes('.c', '.C'):
     CXXSuffixes.append('.C')
 
+_cxx_batch = SCons.Tool.cc.CCBatchKey('$CXXFLAGS $CCFLAGS $_CCBATCHCOMCOM')
+
+def cxx_batch_key(action, env, target, source):
+    """Returns a key to identify unique batches of sources for compilation."""
+    return _cxx_batch(action, env, target, source)
+
+CXXAction = SCons.Tool.createBatchAction(
+    SCons.Defaults.CXXAction,
+    SCons.Action.Action("$CXXBATCHCOM", "$CXXCOMSTR",
+                        batch_key=cxx_batch_key,
+                        targets='$CHANGED_TARGETS'),
+    _cxx_batch)
+
 def iscplusplus(source) -> bool:
     if not source:
         # Source might be None for unusual cases like SConf.
@@ -56,12 +72,16 @@ def generate(env) -> None:
     Add Builders and construction variables for Visual Age C++ compilers
     to an Environment.
     """
-    import SCons.Tool
-    import SCons.Tool.cc
     static_obj, shared_obj = SCons.Tool.createObjBuilders(env)
 
+    # As in the cc tool, only environments which batch get the batching
+    # action, and only for static objects.
+    if _cxx_batch.enabled(env):
+        cxx_action = CXXAction
+    else:
+        cxx_action = SCons.Defaults.CXXAction
     for suffix in CXXSuffixes:
-        static_obj.add_action(suffix, SCons.Defaults.CXXAction)
+        static_obj.add_action(suffix, cxx_action)
         shared_obj.add_action(suffix, SCons.Defaults.ShCXXAction)
         static_obj.add_emitter(suffix, SCons.Defaults.StaticObjectEmitter)
         shared_obj.add_emitter(suffix, SCons.Defaults.SharedObjectEmitter)
@@ -75,6 +95,7 @@ def generate(env) -> None:
     env['SHCXX']      = '$CXX'
     env['SHCXXFLAGS'] = SCons.Util.CLVar('$CXXFLAGS')
     env['SHCXXCOM']   = '$SHCXX -o $TARGET -c $SHCXXFLAGS $SHCCFLAGS $_CCCOMCOM $SOURCES'
+    env['CXXBATCHCOM'] = '$( cd ${TARGET.dir.abspath} && $) $CXX -c $CXXFLAGS $CCFLAGS $_CCBATCHCOMCOM $_CCBATCHSOURCES'
 
     env['CPPDEFPREFIX']  = '-D'
     env['CPPDEFSUFFIX']  = ''
@@ -162,6 +162,9 @@ res_builder = SCons.Builder.Builder(action=res_action,
                                     src_builder=[],
                                     source_scanner=res_scanner)
 
+# Batching of the compiles of sources into objects, see msvc_batch_key.
+_msvc_batch = SCons.Tool.BatchKey('MSVC_BATCH', 'MSVC_BATCH_SIZE')
+
 def msvc_batch_key(action, env, target, source):
     """
     Returns a key to identify unique batches of sources for compilation.
@@ -169,27 +172,12 @@ def msvc_batch_key(action, env, target, source):
     If batching is enabled (via the $MSVC_BATCH setting), then all
     target+source pairs that use the same action, defined by the same
     environment, and have the same target and source directories, will
-    be batched.
+    be batched, up to $MSVC_BATCH_SIZE pairs to a batch if that is set.
 
     Returning None specifies that the specified target+source should not
     be batched with other compilations.
     """
-
-    # Fixing MSVC_BATCH mode. Previous if did not work when MSVC_BATCH
-    # was set to False. This new version should work better.
-    # Note we need to do the env.subst so $MSVC_BATCH can be a reference to
-    # another construction variable, which is why we test for False and 0
-    # as strings.
-    if 'MSVC_BATCH' not in env or env.subst('$MSVC_BATCH') in ('0', 'False', '', None):
-        # We're not using batching; return no key.
-        return None
-    t = target[0]
-    s = source[0]
-    if os.path.splitext(t.name)[0] != os.path.splitext(s.name)[0]:
-        # The base names are different, so this *must* be compiled
-        # separately; return no key.
-        return None
-    return (id(action), id(env), t.dir, s.dir)
+    return _msvc_batch(action, env, target, source)
 
 def msvc_output_flag(target, source, env, for_signature):
     """
@@ -206,7 +194,7 @@ def msvc_output_flag(target, source, env, for_signature):
     # len(source)==1 as batch mode can compile only one file
     # (and it also fixed problem with compiling only one changed file
     # with batch mode enabled)
-    if 'MSVC_BATCH' not in env or env.subst('$MSVC_BATCH') in ('0', 'False', '', None):
+    if not _msvc_batch.enabled(env):
         return '/Fo$TARGET'
     else:
         # The Visual C/C++ compiler requires a \ at the end of the /Fo
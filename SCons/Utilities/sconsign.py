@@ -43,14 +43,44 @@ import SCons.SConsign
 def my_whichdb(filename):
     if filename[-7:] == ".dblite":
         return "SCons.dblite"
+    if filename[-7:] == ".sqlite":
+        return "SCons.sqlitedb"
+    if filename[-7:] == ".shards":
+        return "SCons.shardeddb"
     try:
         with open(filename + ".dblite", "rb"):
             return "SCons.dblite"
     except OSError:
         pass
+    try:
+        with open(filename + ".sqlite", "rb"):
+            return "SCons.sqlitedb"
+    except OSError:
+        pass
+    if os.path.isdir(filename + ".shards"):
+        return "SCons.shardeddb"
     return whichdb(filename)
 
 
+# Maps the names of database formats to the modules which implement them.
+Format_Modules = {
+    'dblite': 'SCons.dblite',
+    'sqlite': 'SCons.sqlitedb',
+    'sharded': 'SCons.shardeddb',
+}
+
+
+def import_dbm(dbm_name):
+    """Import the database module *dbm_name*."""
+    if dbm_name != "SCons.dblite":
+        return importlib.import_module(dbm_name)
+    import SCons.dblite
+
+    # Ensure that we don't ignore corrupt DB files,
+    SCons.dblite.IGNORE_CORRUPT_DBFILES = False
+    return SCons.dblite
+
+
 class Flagger:
     default_value = 1
 
@@ -333,7 +363,40 @@ class Do_SConsignDB:
             print('=== ' + dir + ':')
         except TypeError:
             print('=== ' + dir.decode() + ':')
-        printentries(pickle.loads(val), dir)
+        printentries(SCons.SConsign.decode_entries(val), dir)
+
+
+def Do_Convert(fname, dbm, out_dbm) -> None:
+    """Copy the signature database *fname* into the format of *out_dbm*.
+
+    The new database is written next to the old one, with the base name
+    of *fname* (the new module adds its own suffix).
+    """
+    try:
+        db = dbm.open(fname, "r")
+    except OSError:
+        try:
+            db = dbm.open(os.path.splitext(fname)[0], "r")
+        except OSError as e:
+            sys.stderr.write("sconsign: %s\n" % e)
+            return
+    except KeyboardInterrupt:
+        raise
+    except Exception as e:
+        sys.stderr.write("sconsign: ignoring invalid file `%s': %s\n" % (fname, e))
+        return
+    base = os.path.splitext(fname)[0] if os.path.splitext(fname)[1] else fname
+    out = out_dbm.open(base, "n")
+    count = 0
+    for key in db.keys():
+        out[key] = db[key]
+        count += 1
+    out.sync()
+    try:
+        out.close()
+    except AttributeError:
+        pass
+    print("sconsign: copied %d directories from %s" % (count, fname))
 
 
 def Do_SConsignDir(name):
@@ -365,6 +428,7 @@ def main() -> None:
     global Verbose
     global Readable
 
+    out_dbm = None
     helpstr = """\
 Usage: sconsign [OPTIONS] [FILE ...]
 
@@ -372,6 +436,7 @@ Options:
   -a, --act, --action         Print build action information.
   -c, --csig                  Print content signature information.
   -d DIR, --dir=DIR           Print only info about DIR.
+  --convert=FORMAT            Copy each FILE to a new database in FORMAT.
   -e ENTRY, --entry=ENTRY     Print only info about ENTRY.
   -f FORMAT, --format=FORMAT  FILE is in the specified FORMAT.
   -h, --help                  Print this message and exit.
@@ -390,6 +455,7 @@ Options:
             [
                 'act',
                 'action',
+                'convert=',
                 'csig',
                 'dir=',
                 'entry=',
@@ -413,6 +479,13 @@ Options:
             Print_Flags['action'] = 1
         elif o in ('-c', '--csig'):
             Print_Flags['csig'] = 1
+        elif o in ('--convert',):
+            try:
+                out_dbm = import_dbm(Format_Modules[a])
+            except (KeyError, ImportError):
+                sys.stderr.write("sconsign: illegal file format `%s'\n" % a)
+                print(helpstr)
+                sys.exit(2)
         elif o in ('-d', '--dir'):
             Print_Directories.append(a)
         elif o in ('-e', '--entry'):
@@ -420,18 +493,11 @@ Options:
         elif o in ('-f', '--format'):
             # Try to map the given DB format to a known module
             # name, that we can then try to import...
-            Module_Map = {'dblite': 'SCons.dblite', 'sconsign': None}
+            Module_Map = dict(Format_Modules, sconsign=None)
             dbm_name = Module_Map.get(a, a)
             if dbm_name:
                 try:
-                    if dbm_name != "SCons.dblite":
-                        dbm = importlib.import_module(dbm_name)
-                    else:
-                        import SCons.dblite
-
-                        dbm = SCons.dblite
-                        # Ensure that we don't ignore corrupt DB files,
-                        SCons.dblite.IGNORE_CORRUPT_DBFILES = False
+                    dbm = import_dbm(dbm_name)
                 except ImportError:
                     sys.stderr.write("sconsign: illegal file format `%s'\n" % a)
                     print(helpstr)
@@ -455,7 +521,23 @@ Options:
         elif o in ('-v', '--verbose'):
             Verbose = 1
 
-    if Do_Call:
+    if out_dbm is not None:
+        if not args:
+            args = [".sconsign.dblite"]
+        for a in args:
+            if isinstance(Do_Call, Do_SConsignDB):
+                dbm = Do_Call.dbm
+            else:
+                dbm_name = my_whichdb(a)
+                if not dbm_name:
+                    sys.stderr.write("sconsign: can not convert `%s'\n" % a)
+                    continue
+                dbm = import_dbm(dbm_name)
+            if dbm is out_dbm:
+                sys.stderr.write("sconsign: `%s' is already in that format\n" % a)
+                continue
+            Do_Convert(a, dbm, out_dbm)
+    elif Do_Call:
         for a in args:
             Do_Call(a)
     else:
@@ -464,15 +546,8 @@ Options:
         for a in args:
             dbm_name = my_whichdb(a)
             if dbm_name:
-                Map_Module = {'SCons.dblite': 'dblite'}
-                if dbm_name != "SCons.dblite":
-                    dbm = importlib.import_module(dbm_name)
-                else:
-                    import SCons.dblite
-
-                    dbm = SCons.dblite
-                    # Ensure that we don't ignore corrupt DB files,
-                    SCons.dblite.IGNORE_CORRUPT_DBFILES = False
+                Map_Module = {v: k for k, v in Format_Modules.items()}
+                dbm = import_dbm(dbm_name)
                 Do_SConsignDB(Map_Module.get(dbm_name, dbm_name), dbm)(a)
             else:
                 Do_SConsignDir(a)
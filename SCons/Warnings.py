@@ -108,6 +108,9 @@ class CacheCleanupErrorWarning(SConsWarning):
 class CorruptSConsignWarning(WarningOnByDefault):
     """Problems decoding the contents of the sconsign database."""
 
+class SConsignCheckpointWarning(WarningOnByDefault):
+    """Problems writing a checkpoint of the sconsign database."""
+
 class DependencyWarning(SConsWarning):
     """A scanner identified a dependency but did not add it."""
 
@@ -28,9 +28,23 @@ Extended for Unicode by Steven Knight.
 This is a very simple-minded "database" used for saved signature
 information, with an interface modeled on the Python dbm database
 interface module.
+
+The file is an append-only journal: a header followed by records, one
+for each sync, holding the keys changed by it.  A record is the values,
+concatenated, followed by an index of them: a pickled tuple of a dict
+mapping each changed key to the ``(start, stop)`` offsets of its value
+in the file, and a list of the deleted keys.  Both parts are prefixed
+with their length.  Only the indexes are read when the database is
+opened; the file is memory-mapped and a value is read from it when it
+is asked for, so a build reads just the entries of the directories it
+visits.  The file is rewritten with a single record holding everything
+only once the journal has grown well past the size of the live data.
+Files in the older format, a single pickled dict, are still read, and
+are rewritten in the journal format on the first sync.
 """
 
 import io
+import mmap
 import os
 import pickle
 import shutil
@@ -54,12 +68,24 @@ def corruption_warning(filename) -> None:
 DBLITE_SUFFIX = ".dblite"
 TMP_SUFFIX = ".tmp"
 
+# Starts a file in the journal format.  A pickle never starts with a
+# NUL byte, so files in the older format can not be mistaken for one.
+JOURNAL_HEADER = b"\0SCons dblite journal 2\n"
+
+# The parts of a record are prefixed with their length in this many
+# bytes (big-endian).
+RECORD_LENGTH_SIZE = 8
+
+# The journal is compacted when it is more than this many times the
+# size of the live data.
+COMPACT_RATIO = 2.0
+
 
 class _Dblite:
     """Lightweight signature database class.
 
-    Behaves like a dict when in memory, loads from a pickled disk
-    file on open and writes back out to it on close.
+    Behaves like a dict when in memory, loads the index of a disk
+    file on open and writes the changes back out to it on close.
 
     Open the database file using a path derived from *file_base_name*.
     The optional *flag* argument can be:
@@ -91,6 +117,7 @@ class _Dblite:
     # teardown time (we call it from our __del__), and the global module
     # references themselves may already have been rebound to None.
     _pickle_dump = staticmethod(pickle.dump)
+    _pickle_dumps = staticmethod(pickle.dumps)
     _pickle_protocol = PICKLE_PROTOCOL
     try:
         _os_chown = staticmethod(os.chown)
@@ -98,6 +125,7 @@ class _Dblite:
         _os_chown = None
     _os_replace = staticmethod(os.replace)
     _os_chmod = staticmethod(os.chmod)
+    _os_seek_end = os.SEEK_END
     _shutil_copyfile = staticmethod(shutil.copyfile)
     _time_time = staticmethod(time.time)
 
@@ -115,8 +143,18 @@ class _Dblite:
 
         self._flag = flag
         self._mode = mode
+        # Values are either bytes, or the (start, stop) offsets of the
+        # value in self._map, the contents of the file.
         self._dict = {}
+        self._map = b""
         self._needs_sync = False
+        # Keys changed since the last sync, with None for deleted ones.
+        self._pending = {}
+        # Whether the file is in the journal format and ends with a
+        # complete record, that is, whether a sync can append to it.
+        self._journal = False
+        self._file_size = 0
+        self._data_size = 0
 
         if self._os_chown is not None and 0 in (os.geteuid(), os.getegid()):
             # running as root; chown back to current owner/group when done
@@ -137,20 +175,23 @@ class _Dblite:
             with io.open(self._file_name, "wb", opener=self.opener):
                 return  # just make sure it exists
         else:
-            # We only need the disk file to slurp in the data.  Updates are
-            # handled on close, db is mainained only in memory until then.
+            # Updates are handled on close, db is mainained only in
+            # memory until then.
             try:
-                with io.open(self._file_name, "rb") as f:
-                    p = f.read()
+                p = self._read_file()
             except OSError as e:
                 # an error for file not to exist, unless flag is create
                 if self._flag != "c":
                     raise e
                 with io.open(self._file_name, "wb", opener=self.opener):
                     return  # just make sure it exists
-            if len(p) > 0:
+            if p[:len(JOURNAL_HEADER)] == JOURNAL_HEADER:
+                self._map = p
+                self._replay()
+            elif len(p) > 0:
                 try:
                     self._dict = pickle.loads(p, encoding='bytes')
+                    self._data_size = sum(map(len, self._dict.values()))
                 except (
                     pickle.UnpicklingError,
                     # Python3 docs:
@@ -166,6 +207,65 @@ class _Dblite:
                         corruption_warning(self._file_name)
                     else:
                         raise
+                finally:
+                    self._close_map(p)
+
+    def _read_file(self):
+        """Return the contents of the database file.
+
+        The file is memory-mapped, so that only the parts of it which
+        are used are read.  Windows does not allow a mapped file to be
+        replaced, so there it is read instead.
+        """
+        with io.open(self._file_name, "rb") as f:
+            if os.name == 'nt' or os.fstat(f.fileno()).st_size == 0:
+                return f.read()
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def _close_map(p) -> None:
+        close = getattr(p, "close", None)
+        if close is not None:
+            close()
+
+    def _replay(self) -> None:
+        """Read the indexes of the records of the journal.
+
+        A record cut short, as by a crash while it was written, ends
+        the journal; it is compacted on the next sync.
+        """
+        p = self._map
+        size = len(p)
+        pos = len(JOURNAL_HEADER)
+        d = self._dict
+        while True:
+            start = pos + RECORD_LENGTH_SIZE
+            if start > size:
+                break
+            start += int.from_bytes(p[pos:start], 'big')
+            end = start + RECORD_LENGTH_SIZE
+            if end > size:
+                break
+            end += int.from_bytes(p[start:end], 'big')
+            if end > size:
+                break
+            try:
+                changed, deleted = pickle.loads(p[start + RECORD_LENGTH_SIZE:end])
+            except Exception:
+                break
+            d.update(changed)
+            for key in deleted:
+                d.pop(key, None)
+            pos = end
+        self._journal = pos == size
+        self._file_size = pos
+        self._data_size = sum(map(self._value_size, d.values()))
+
+    @staticmethod
+    def _value_size(value) -> int:
+        if isinstance(value, tuple):
+            return value[1] - value[0]
+        return len(value)
 
     def opener(self, path, flags):
         """Database open helper when creation may be needed.
@@ -192,8 +292,63 @@ class _Dblite:
         temporary file and then move it over with some error handling.
         """
         self._check_writable()
+        if self._journal:
+            if not self._pending:
+                self._needs_sync = False
+                return
+            if self._file_size <= COMPACT_RATIO * self._data_size:
+                self._append()
+                return
+        self._compact()
+
+    def _record(self, offset, changes):
+        """Return a record of *changes* to be written at *offset*.
+
+        Also returns the offsets of the values in the record.
+        """
+        values = []
+        index = {}
+        deleted = []
+        pos = offset + RECORD_LENGTH_SIZE
+        for key, value in changes:
+            if value is None:
+                deleted.append(key)
+            else:
+                values.append(value)
+                index[key] = (pos, pos + len(value))
+                pos += len(value)
+        values = b"".join(values)
+        record = self._pickle_dumps((index, deleted), self._pickle_protocol)
+        return b"".join((
+            len(values).to_bytes(RECORD_LENGTH_SIZE, 'big'),
+            values,
+            len(record).to_bytes(RECORD_LENGTH_SIZE, 'big'),
+            record,
+        )), index
+
+    def _append(self) -> None:
+        """Append the pending changes to the journal."""
+        with self._open(self._file_name, "ab") as f:
+            # Another process may have appended to the file since it
+            # was read: the offsets are those of its real end.
+            offset = f.seek(0, self._os_seek_end)
+            record, _ = self._record(offset, self._pending.items())
+            f.write(record)
+        self._file_size = offset + len(record)
+        self._pending = {}
+        self._needs_sync = False
+
+    def _compact(self) -> None:
+        """Write the whole database as a new journal, replacing the file."""
+        record, index = self._record(len(JOURNAL_HEADER), self.items())
+        data = JOURNAL_HEADER + record
         with self._open(self._tmp_name, "wb", opener=self.opener) as f:
-            self._pickle_dump(self._dict, f, self._pickle_protocol)
+            f.write(data)
+        # Until the new file is mapped, the values are read from the
+        # new contents.
+        self._close_map(self._map)
+        self._map = data
+        self._dict = index
 
         try:
             self._os_replace(self._tmp_name, self._file_name)
@@ -217,6 +372,16 @@ class _Dblite:
             except OSError:
                 pass
 
+        # Map the new file, so as not to keep another copy of the
+        # whole database in memory.
+        try:
+            self._map = self._read_file()
+        except Exception:
+            # As at Python teardown: the contents at hand will do.
+            pass
+        self._journal = True
+        self._file_size = len(data)
+        self._pending = {}
         self._needs_sync = False
         if KEEP_ALL_FILES:
             self._shutil_copyfile(
@@ -228,7 +393,10 @@ class _Dblite:
             raise OSError(f"Read-only database: {self._file_name}")
 
     def __getitem__(self, key):
-        return self._dict[key]
+        value = self._dict[key]
+        if isinstance(value, tuple):
+            return self._map[value[0]:value[1]]
+        return value
 
     def __setitem__(self, key, value):
         self._check_writable()
@@ -239,20 +407,31 @@ class _Dblite:
         if not isinstance(value, bytes):
             raise TypeError(f"value `{value}' must be bytes but is {type(value)}")
 
+        old = self._dict.get(key)
+        if old is not None:
+            if self[key] == value:
+                return
+            self._data_size -= self._value_size(old)
         self._dict[key] = value
+        self._pending[key] = value
+        self._data_size += len(value)
         self._needs_sync = True
 
     def __delitem__(self, key):
-        del self._dict[key]
+        self._check_writable()
+        value = self._dict.pop(key)
+        self._pending[key] = None
+        self._data_size -= self._value_size(value)
+        self._needs_sync = True
 
     def keys(self):
         return self._dict.keys()
 
     def items(self):
-        return self._dict.items()
+        return [(key, self[key]) for key in self._dict]
 
     def values(self):
-        return self._dict.values()
+        return [self[key] for key in self._dict]
 
     __iter__ = keys
 
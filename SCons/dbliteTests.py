@@ -0,0 +1,177 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import mmap
+import os
+import pickle
+import unittest
+
+import TestCmd
+
+import SCons.dblite
+
+
+class DbliteTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd.TestCmd(workdir='')
+        self.base = self.test.workpath('tmp')
+        self.file = self.base + SCons.dblite.DBLITE_SUFFIX
+
+    def size(self) -> int:
+        return os.path.getsize(self.file)
+
+    def test_exercise(self) -> None:
+        """Run the module self-test"""
+        save_cwd = os.getcwd()
+        os.chdir(self.test.workpath(''))
+        try:
+            SCons.dblite._exercise()
+        finally:
+            os.chdir(save_cwd)
+            SCons.dblite.IGNORE_CORRUPT_DBFILES = False
+
+    def test_append(self) -> None:
+        """Test that a sync appends only the changed keys"""
+        db = SCons.dblite.open(self.base, "n")
+        db["a"] = b"a" * 1000
+        db["b"] = b"b" * 1000
+        db["c"] = b"c" * 1000
+        db.sync()
+        with open(self.file, "rb") as f:
+            assert f.read().startswith(SCons.dblite.JOURNAL_HEADER)
+        size = self.size()
+
+        # Nothing changed: nothing is written.
+        db = SCons.dblite.open(self.base, "w")
+        db["a"] = b"a" * 1000
+        db.sync()
+        assert self.size() == size
+
+        db["a"] = b"x" * 1000
+        del db["b"]
+        db.sync()
+        appended = self.size() - size
+        assert 1000 < appended < 1100, appended
+
+        db = SCons.dblite.open(self.base, "r")
+        assert dict(db.items()) == {"a": b"x" * 1000, "c": b"c" * 1000}
+
+    def test_compact(self) -> None:
+        """Test that the journal is compacted as it grows"""
+        db = SCons.dblite.open(self.base, "c")
+        for i in range(20):
+            value = b"%d" % i * 1000
+            db["a"] = value
+            db.sync()
+            assert self.size() <= 3 * len(value) + 100, (i, self.size())
+        db = SCons.dblite.open(self.base, "r")
+        assert db["a"] == b"19" * 1000
+
+    def test_compact_mapped(self) -> None:
+        """Test that a compacted database reads its values from the file"""
+        db = SCons.dblite.open(self.base, "n")
+        db["a"] = b"a" * 1000
+        db.sync()
+        assert all(isinstance(v, tuple) for v in db._dict.values())
+        if os.name != 'nt':
+            assert isinstance(db._map, mmap.mmap), type(db._map)
+        assert db["a"] == b"a" * 1000
+
+    def test_concurrent_append(self) -> None:
+        """Test appending after another process appended to the file"""
+        db = SCons.dblite.open(self.base, "n")
+        db["a"] = b"a" * 1000
+        db.sync()
+
+        one = SCons.dblite.open(self.base, "w")
+        two = SCons.dblite.open(self.base, "w")
+        one["b"] = b"b" * 1000
+        one.sync()
+        two["c"] = b"c" * 1000
+        two.sync()
+        assert two["c"] == b"c" * 1000
+
+        db = SCons.dblite.open(self.base, "r")
+        assert dict(db.items()) == {
+            "a": b"a" * 1000, "b": b"b" * 1000, "c": b"c" * 1000,
+        }, dict(db.items())
+
+    def test_lazy(self) -> None:
+        """Test that values are read from the file when asked for"""
+        db = SCons.dblite.open(self.base, "n")
+        db["a"] = b"a" * 1000
+        db["b"] = b"b" * 1000
+        db.sync()
+
+        db = SCons.dblite.open(self.base, "w")
+        assert all(isinstance(v, tuple) for v in db._dict.values())
+        assert db["a"] == b"a" * 1000
+        assert db.values() == [b"a" * 1000, b"b" * 1000]
+        # Compacting keeps the values which were not read.
+        db["a"] = b"x" * 5000
+        db.sync()
+        assert db["b"] == b"b" * 1000
+
+        db = SCons.dblite.open(self.base, "r")
+        assert db.items() == [("a", b"x" * 5000), ("b", b"b" * 1000)]
+
+    def test_old_format(self) -> None:
+        """Test reading a database in the older format"""
+        with open(self.file, "wb") as f:
+            pickle.dump({"a": b"1"}, f)
+        db = SCons.dblite.open(self.base, "w")
+        assert db["a"] == b"1"
+        db["b"] = b"2"
+        db.sync()
+        with open(self.file, "rb") as f:
+            assert f.read().startswith(SCons.dblite.JOURNAL_HEADER)
+        db = SCons.dblite.open(self.base, "r")
+        assert dict(db.items()) == {"a": b"1", "b": b"2"}
+
+    def test_torn_record(self) -> None:
+        """Test that a record cut short is ignored"""
+        db = SCons.dblite.open(self.base, "n")
+        db["a"] = b"1" * 100
+        db.sync()
+        db["b"] = b"2" * 100
+        db.sync()
+        with open(self.file, "r+b") as f:
+            f.truncate(self.size() - 3)
+
+        db = SCons.dblite.open(self.base, "w")
+        assert list(db.keys()) == ["a"], list(db.keys())
+        db["c"] = b"3"
+        db.sync()
+        db = SCons.dblite.open(self.base, "r")
+        assert sorted(db.keys()) == ["a", "c"], list(db.keys())
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
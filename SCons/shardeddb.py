@@ -0,0 +1,203 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Sharded signature database, with the same interface as :mod:`SCons.dblite`.
+
+The keys are spread by a hash over a number of :mod:`SCons.dblite`
+files, the shards, kept in a directory.  The shards are opened and
+synced in parallel threads, and only the shards holding changed keys
+are synced.  With ``--debug=time`` the time taken to sync each shard
+is reported.
+
+Use it with::
+
+    import SCons.shardeddb
+    SConsignFile(dbm_module=SCons.shardeddb)
+
+The number of shards of a new database is set by :data:`SHARDS`; an
+existing database keeps the number it was created with.
+"""
+
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import SCons.dblite
+from SCons.Util import print_time
+
+SHARDS_SUFFIX = ".shards"
+
+# The number of shards of a new database.
+SHARDS = 16
+
+
+def shard_index(key: str, count: int) -> int:
+    """Return the index of the shard of *count* which holds *key*."""
+    return zlib.crc32(key.encode('utf-8', 'surrogateescape')) % count
+
+
+class _ShardedDB:
+    """Signature database class spreading the keys over dblite files.
+
+    Open the database directory using a path derived from
+    *file_base_name*.  The optional *flag* and *mode* arguments have
+    the same meaning as for :func:`SCons.dblite.open`; *mode* applies
+    to the shard files.
+    """
+
+    def __init__(self, file_base_name, flag='r', mode=0o666) -> None:
+        assert flag in ("r", "w", "c", "n")
+
+        if os.path.splitext(file_base_name)[1] == SHARDS_SUFFIX:
+            # There's already a suffix on the directory name, don't add one.
+            self._dir_name = file_base_name
+        else:
+            self._dir_name = file_base_name + SHARDS_SUFFIX
+
+        self._flag = flag
+        # Indexes of the shards holding keys changed since the last sync.
+        self._dirty = set()
+
+        if not os.path.isdir(self._dir_name):
+            if flag in ("r", "w"):
+                # an error for the database not to exist, unless flag is create
+                raise FileNotFoundError(
+                    2, "No such file or directory", self._dir_name
+                )
+            os.makedirs(self._dir_name, exist_ok=True)
+
+        count = self._shard_count()
+        if flag == "n":
+            # Shards beyond the new number would be counted on next open.
+            for i in range(SHARDS, count):
+                os.unlink(os.path.join(
+                    self._dir_name, str(i) + SCons.dblite.DBLITE_SUFFIX
+                ))
+            count = 0
+        if count == 0:
+            count = SHARDS
+
+        def open_shard(i):
+            path = os.path.join(self._dir_name, str(i))
+            if flag == "r" and not os.path.exists(path + SCons.dblite.DBLITE_SUFFIX):
+                # A shard which was never written holds no keys.
+                return {}
+            return SCons.dblite.open(path, "c" if flag == "w" else flag, mode)
+
+        with ThreadPoolExecutor(max_workers=self._workers(count)) as pool:
+            self._shards = list(pool.map(open_shard, range(count)))
+
+    def _shard_count(self) -> int:
+        """Return the number of shards of an existing database."""
+        count = 0
+        while os.path.exists(os.path.join(
+            self._dir_name, str(count) + SCons.dblite.DBLITE_SUFFIX
+        )):
+            count += 1
+        return count
+
+    @staticmethod
+    def _workers(count) -> int:
+        return min(count, os.cpu_count() or 1)
+
+    def _shard(self, key):
+        return self._shards[shard_index(key, len(self._shards))]
+
+    def close(self) -> None:
+        if self._dirty:
+            self.sync()
+
+    def sync(self) -> None:
+        """Sync the shards holding changed keys, in parallel."""
+        if self._flag == "r":
+            raise OSError(f"Read-only database: {self._dir_name}")
+        dirty = sorted(self._dirty)
+        if not dirty:
+            return
+
+        def sync_shard(i):
+            start_time = time.perf_counter()
+            self._shards[i].sync()
+            return time.perf_counter() - start_time
+
+        with ThreadPoolExecutor(max_workers=self._workers(len(dirty))) as pool:
+            elapsed = list(pool.map(sync_shard, dirty))
+        self._dirty = set()
+
+        if print_time():
+            for i, t in zip(dirty, elapsed):
+                path = os.path.join(self._dir_name, str(i) + SCons.dblite.DBLITE_SUFFIX)
+                print('SConsign shard sync time: %s: %f seconds' % (path, t))
+
+    def __getitem__(self, key):
+        return self._shard(key)[key]
+
+    def __setitem__(self, key, value):
+        if self._flag == "r":
+            raise OSError(f"Read-only database: {self._dir_name}")
+        if not isinstance(key, str):
+            raise TypeError(f"key `{key}' must be a string but is {type(key)}")
+        i = shard_index(key, len(self._shards))
+        shard = self._shards[i]
+        if key in shard and shard[key] == value:
+            # Storing an unchanged value leaves the shard clean.
+            return
+        shard[key] = value
+        self._dirty.add(i)
+
+    def __delitem__(self, key):
+        if self._flag == "r":
+            raise OSError(f"Read-only database: {self._dir_name}")
+        i = shard_index(key, len(self._shards))
+        del self._shards[i][key]
+        self._dirty.add(i)
+
+    def keys(self):
+        return [key for shard in self._shards for key in shard.keys()]
+
+    def items(self):
+        return [item for shard in self._shards for item in shard.items()]
+
+    def values(self):
+        return [value for shard in self._shards for value in shard.values()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, key) -> bool:
+        return key in self._shard(key)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+
+def open(file, flag="r", mode: int = 0o666):  # pylint: disable=redefined-builtin
+    return _ShardedDB(file, flag, mode)
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,122 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import unittest
+
+import TestCmd
+
+import SCons.shardeddb
+
+
+class ShardedDBTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd.TestCmd(workdir='')
+        self.base = self.test.workpath('tmp')
+        self.dir = self.base + '.shards'
+
+    def tearDown(self) -> None:
+        SCons.shardeddb.SHARDS = 16
+
+    def shard_file(self, i) -> str:
+        return os.path.join(self.dir, '%d.dblite' % i)
+
+    def test_open(self) -> None:
+        """Test opening with the different flags"""
+        with self.assertRaises(OSError):
+            SCons.shardeddb.open(self.base, "r")
+        with self.assertRaises(OSError):
+            SCons.shardeddb.open(self.base, "w")
+
+        SCons.shardeddb.SHARDS = 4
+        db = SCons.shardeddb.open(self.base, "c")
+        assert len(db) == 0
+        db["foo"] = b"bar"
+        db.close()
+        assert sorted(os.listdir(self.dir)) == \
+            ['0.dblite', '1.dblite', '2.dblite', '3.dblite']
+
+        # The existing number of shards is kept, and the suffix is
+        # not added twice.
+        SCons.shardeddb.SHARDS = 2
+        db = SCons.shardeddb.open(self.dir, "r")
+        assert len(db._shards) == 4
+        assert db["foo"] == b"bar"
+        assert "foo" in db
+        assert "bar" not in db
+        with self.assertRaises(KeyError):
+            db["bar"]
+        with self.assertRaises(OSError):
+            db["bar"] = b"foo"
+
+        db = SCons.shardeddb.open(self.base, "n")
+        assert len(db) == 0, len(db)
+        assert sorted(os.listdir(self.dir)) == ['0.dblite', '1.dblite']
+
+    def test_items(self) -> None:
+        """Test storing and reading back values across the shards"""
+        db = SCons.shardeddb.open(self.base, "c")
+        expect = {}
+        for i in range(100):
+            key = 'dir%d' % i
+            db[key] = expect[key] = b"%d" % i
+        del db['dir0']
+        del expect['dir0']
+        db.sync()
+
+        db = SCons.shardeddb.open(self.base, "r")
+        assert len(db) == 99, len(db)
+        assert sorted(db.keys()) == sorted(expect)
+        assert dict(db.items()) == expect
+        assert sorted(db.values()) == sorted(expect.values())
+        assert sum(1 for shard in db._shards if len(shard)) > 1
+
+    def test_dirty(self) -> None:
+        """Test that only the shards with changed keys are written"""
+        db = SCons.shardeddb.open(self.base, "c")
+        for i in range(100):
+            db['dir%d' % i] = b"%d" % i
+        db.sync()
+        mtimes = {i: os.stat(self.shard_file(i)).st_mtime_ns for i in range(16)}
+        sizes = {i: os.path.getsize(self.shard_file(i)) for i in range(16)}
+
+        db = SCons.shardeddb.open(self.base, "w")
+        db['dir1'] = b"new"
+        assert db._dirty == {SCons.shardeddb.shard_index('dir1', 16)}
+        db.sync()
+        assert not db._dirty
+        changed = [i for i in range(16)
+                   if os.path.getsize(self.shard_file(i)) != sizes[i]
+                   or os.stat(self.shard_file(i)).st_mtime_ns != mtimes[i]]
+        assert changed == [SCons.shardeddb.shard_index('dir1', 16)], changed
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
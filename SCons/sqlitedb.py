@@ -0,0 +1,246 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+SQLite signature database, with the same interface as :mod:`SCons.dblite`.
+
+Unlike dblite, which reads the whole database into memory when opened
+and writes all of it back on close, each key is read from the database
+file when it is asked for, and only the keys which were given new
+values are written back, all in one transaction when the database is
+synced.  The database is kept in write-ahead-log mode, so one build can
+read it while another one writes.
+
+Use it with::
+
+    import SCons.sqlitedb
+    SConsignFile(dbm_module=SCons.sqlitedb)
+"""
+
+import hashlib
+import os
+import pathlib
+import sqlite3
+
+import SCons.dblite
+
+SQLITE_SUFFIX = ".sqlite"
+
+# How long to wait for another process to finish writing, in seconds.
+BUSY_TIMEOUT = 60.0
+
+
+def _digest(value: bytes) -> bytes:
+    return hashlib.blake2b(value, digest_size=16).digest()
+
+
+class _SQLiteDB:
+    """Signature database class using SQLite.
+
+    Open the database file using a path derived from *file_base_name*.
+    The optional *flag* argument has the same meaning as for
+    :func:`SCons.dblite.open`: ``'r'`` (the default) for reading only,
+    ``'w'`` for reading and writing, ``'c'`` to also create the
+    database if needed and ``'n'`` to always start with an empty one.
+
+    The optional *mode* argument is the POSIX mode of the file, used only
+    when the database has to be created.  It defaults to octal ``0o666``.
+    """
+
+    def __init__(self, file_base_name, flag='r', mode=0o666) -> None:
+        assert flag in ("r", "w", "c", "n")
+
+        if os.path.splitext(file_base_name)[1] == SQLITE_SUFFIX:
+            # There's already a suffix on the file name, don't add one.
+            self._file_name = file_base_name
+        else:
+            self._file_name = file_base_name + SQLITE_SUFFIX
+
+        self._flag = flag
+        self._conn = None
+        # Digests of the values known to be in the database file, so
+        # that storing an unchanged value does not write anything.
+        self._digests = {}
+
+        if os.name == 'posix' and 0 in (os.geteuid(), os.getegid()):
+            # running as root; chown back to the owner when done
+            try:
+                statinfo = os.stat(self._file_name)
+                self._chown_to = statinfo.st_uid
+                self._chgrp_to = statinfo.st_gid
+            except OSError:
+                self._chown_to = int(os.environ.get('SUDO_UID', -1))
+                self._chgrp_to = int(os.environ.get('SUDO_GID', -1))
+        else:
+            self._chown_to = -1  # don't chown
+            self._chgrp_to = -1  # don't chgrp
+
+        if flag in ("r", "w") and not os.path.exists(self._file_name):
+            # an error for file not to exist, unless flag is create
+            raise FileNotFoundError(
+                2, "No such file or directory", self._file_name
+            )
+        if flag in ("c", "n") and not os.path.exists(self._file_name):
+            # Create the file with the requested mode; SQLite would
+            # otherwise use its own default.
+            os.close(os.open(self._file_name, os.O_WRONLY | os.O_CREAT, mode))
+
+        try:
+            self._connect()
+        except sqlite3.DatabaseError:
+            self._close_connection()
+            # Corrupt files are treated as set up for dblite.
+            if SCons.dblite.IGNORE_CORRUPT_DBFILES and flag != "r":
+                SCons.dblite.corruption_warning(self._file_name)
+                os.unlink(self._file_name)
+                os.close(os.open(self._file_name, os.O_WRONLY | os.O_CREAT, mode))
+                self._connect()
+            else:
+                raise
+
+    def _connect(self) -> None:
+        uri = pathlib.Path(os.path.abspath(self._file_name)).as_uri()
+        if self._flag == "r":
+            uri += '?mode=ro'
+        else:
+            uri += '?mode=rw'
+        # The connection is also used by the thread writing checkpoints
+        # (see SCons.SConsign.checkpoint), which serializes all uses of
+        # it with SCons.SConsign._lock.
+        self._conn = sqlite3.connect(
+            uri, uri=True, timeout=BUSY_TIMEOUT, check_same_thread=False
+        )
+        if self._flag == "r":
+            # Fails here for a file which is not a database.
+            self._conn.execute("SELECT name FROM sqlite_master").fetchall()
+            return
+        self._conn.execute("PRAGMA journal_mode=WAL").fetchall()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sconsign "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+        )
+        if self._flag == "n":
+            self._conn.execute("DELETE FROM sconsign")
+        self._conn.commit()
+
+    def _close_connection(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        if self._conn.in_transaction:
+            self.sync()
+        self._close_connection()
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except sqlite3.Error:
+            pass
+
+    def sync(self) -> None:
+        """Commit the values stored since the last sync, if any."""
+        self._check_writable()
+        if not self._conn.in_transaction:
+            return
+        self._conn.commit()
+        if self._chown_to > 0:  # don't chown to root or -1
+            try:
+                os.chown(self._file_name, self._chown_to, self._chgrp_to)
+            except OSError:
+                pass
+
+    def _check_writable(self):
+        if self._flag == "r":
+            raise OSError(f"Read-only database: {self._file_name}")
+
+    def __getitem__(self, key):
+        row = self._conn.execute(
+            "SELECT value FROM sconsign WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        value = bytes(row[0])
+        if self._flag != "r":
+            self._digests[key] = _digest(value)
+        return value
+
+    def __setitem__(self, key, value):
+        self._check_writable()
+
+        if not isinstance(key, str):
+            raise TypeError(f"key `{key}' must be a string but is {type(key)}")
+
+        if not isinstance(value, bytes):
+            raise TypeError(f"value `{value}' must be bytes but is {type(value)}")
+
+        digest = _digest(value)
+        if self._digests.get(key) == digest:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sconsign (key, value) VALUES (?, ?)",
+            (key, value),
+        )
+        self._digests[key] = digest
+
+    def __delitem__(self, key):
+        self._check_writable()
+        cursor = self._conn.execute("DELETE FROM sconsign WHERE key = ?", (key,))
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+        self._digests.pop(key, None)
+
+    def keys(self):
+        return [row[0] for row in self._conn.execute("SELECT key FROM sconsign")]
+
+    def items(self):
+        return [(key, bytes(value)) for key, value in
+                self._conn.execute("SELECT key, value FROM sconsign")]
+
+    def values(self):
+        return [bytes(row[0]) for row in
+                self._conn.execute("SELECT value FROM sconsign")]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, key) -> bool:
+        return self._conn.execute(
+            "SELECT 1 FROM sconsign WHERE key = ?", (key,)
+        ).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM sconsign").fetchone()[0]
+
+
+def open(file, flag="r", mode: int = 0o666):  # pylint: disable=redefined-builtin
+    return _SQLiteDB(file, flag, mode)
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
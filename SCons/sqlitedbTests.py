@@ -0,0 +1,161 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import threading
+import unittest
+
+import TestCmd
+
+import SCons.dblite
+import SCons.sqlitedb
+
+
+class SQLiteDBTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd.TestCmd(workdir='')
+        self.base = self.test.workpath('tmp')
+
+    def tearDown(self) -> None:
+        SCons.dblite.IGNORE_CORRUPT_DBFILES = False
+
+    def test_open(self) -> None:
+        """Test opening with the different flags"""
+        with self.assertRaises(OSError):
+            SCons.sqlitedb.open(self.base, "r")
+        with self.assertRaises(OSError):
+            SCons.sqlitedb.open(self.base, "w")
+
+        db = SCons.sqlitedb.open(self.base, "c")
+        assert len(db) == 0
+        db["foo"] = b"bar"
+        db.close()
+        assert os.path.exists(self.base + '.sqlite')
+
+        # The suffix is not added twice.
+        db = SCons.sqlitedb.open(self.base + '.sqlite', "r")
+        assert db["foo"] == b"bar"
+        assert "foo" in db
+        assert "bar" not in db
+        with self.assertRaises(KeyError):
+            db["bar"]
+        with self.assertRaises(OSError):
+            db["bar"] = b"foo"
+        db.close()
+
+        db = SCons.sqlitedb.open(self.base, "n")
+        assert len(db) == 0, len(db)
+        db.close()
+
+    def test_items(self) -> None:
+        """Test storing and reading back values"""
+        db = SCons.sqlitedb.open(self.base, "c")
+        db["foo"] = b"bar"
+        db["bar"] = b"foo"
+        db["foo"] = b"baz"
+        del db["bar"]
+        with self.assertRaises(KeyError):
+            del db["bar"]
+        db.sync()
+
+        db = SCons.sqlitedb.open(self.base, "w")
+        assert len(db) == 1, len(db)
+        assert list(db.keys()) == ["foo"]
+        assert list(db.items()) == [("foo", b"baz")]
+        assert list(db.values()) == [b"baz"]
+
+        with self.assertRaises(TypeError):
+            db[(1, 2)] = b"tuple"
+        with self.assertRaises(TypeError):
+            db["list"] = [1, 2]
+
+    def test_transaction(self) -> None:
+        """Test that values are only written when synced, and only if changed"""
+        db = SCons.sqlitedb.open(self.base, "c")
+        db["foo"] = b"bar"
+        other = SCons.sqlitedb.open(self.base, "r")
+        assert "foo" not in other
+        db.sync()
+        assert other["foo"] == b"bar"
+
+        # Storing the value just read starts no transaction.
+        db = SCons.sqlitedb.open(self.base, "w")
+        value = db["foo"]
+        db["foo"] = value
+        assert not db._conn.in_transaction
+        db["foo"] = b"new"
+        assert db._conn.in_transaction
+        db.close()
+        assert other["foo"] == b"new"
+        other.close()
+
+    def test_thread(self) -> None:
+        """Test storing and syncing from another thread"""
+        db = SCons.sqlitedb.open(self.base, "c")
+        db["foo"] = b"bar"
+        errors = []
+
+        def store() -> None:
+            try:
+                db["bar"] = b"foo"
+                db.sync()
+            except Exception as e:
+                errors.append(e)
+
+        t = threading.Thread(target=store)
+        t.start()
+        t.join()
+        assert not errors, errors
+        db.close()
+
+        db = SCons.sqlitedb.open(self.base, "r")
+        assert sorted(db.items()) == [("bar", b"foo"), ("foo", b"bar")]
+        db.close()
+
+    def test_corrupt(self) -> None:
+        """Test handling of a file which is not a database"""
+        self.test.write(self.base + '.sqlite', "not a database\n" * 100)
+        with self.assertRaises(Exception):
+            SCons.sqlitedb.open(self.base, "c")
+
+        warnings = []
+        save_warning = SCons.dblite.corruption_warning
+        SCons.dblite.IGNORE_CORRUPT_DBFILES = True
+        SCons.dblite.corruption_warning = warnings.append
+        try:
+            db = SCons.sqlitedb.open(self.base, "c")
+        finally:
+            SCons.dblite.corruption_warning = save_warning
+        assert warnings == [self.base + '.sqlite'], warnings
+        assert len(db) == 0
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+"""
+Microbenchmark for the parallel job schedulers in SCons/Taskmaster/Job.py.
+
+Builds a synthetic dependency graph of no-op nodes (one top node, a
+layer of intermediate nodes, and leaves under each of those), then walks
+it with the LegacyParallel and NewParallel schedulers at several job
+counts. Since the tasks do no work, the numbers measure scheduling
+overhead: taskmaster turns, lock hand-offs and thread wake-ups.
+
+Unlike the other files in this directory, this is not run through
+bench.py; run it directly:
+
+    python bench/parallel-jobs.py [-n NODES] [-j JOBS[,JOBS...]]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import SCons.Node
+import SCons.Taskmaster
+import SCons.Taskmaster.Job
+
+
+class NodeInfo:
+    def update(self, obj) -> None:
+        pass
+
+
+class NoopNode(SCons.Node.Node):
+    def __init__(self, name) -> None:
+        super().__init__()
+        self.name = name
+        self.ninfo = NodeInfo()
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class NoopTask(SCons.Taskmaster.AlwaysTask):
+    """A task which always needs executing, but does nothing."""
+
+    def execute(self) -> None:
+        pass
+
+
+def make_graph(nodes, fanout):
+    """Return the top node of a graph of about *nodes* no-op nodes."""
+    top = NoopNode('top')
+    mids = max(1, nodes // (fanout + 1))
+    for m in range(mids):
+        mid = NoopNode(f'mid{m}')
+        mid.add_dependency([NoopNode(f'leaf{m}.{l}') for l in range(fanout)])
+        top.add_dependency([mid])
+    return top
+
+
+def run(scheduler, nodes, fanout, num):
+    top = make_graph(nodes, fanout)
+    tm = SCons.Taskmaster.Taskmaster([top], tasker=NoopTask)
+    jobs = scheduler(tm, num, SCons.Taskmaster.Job.default_stack_size)
+    start = time.perf_counter()
+    jobs.start()
+    elapsed = time.perf_counter() - start
+    assert top.get_state() == SCons.Node.up_to_date, "walk did not complete"
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('-n', '--nodes', type=int, default=100000,
+                        help="approximate number of nodes in the graph")
+    parser.add_argument('-f', '--fanout', type=int, default=99,
+                        help="leaves per intermediate node")
+    parser.add_argument('-j', '--jobs', default='8,32,128',
+                        help="comma-separated job counts to try")
+    args = parser.parse_args()
+
+    schedulers = [
+        ('LegacyParallel', SCons.Taskmaster.Job.LegacyParallel),
+        ('NewParallel', SCons.Taskmaster.Job.NewParallel),
+    ]
+    print(f"{'scheduler':<16}{'jobs':>6}{'seconds':>10}{'nodes/s':>12}")
+    for num in [int(j) for j in args.jobs.split(',')]:
+        for name, scheduler in schedulers:
+            elapsed = run(scheduler, args.nodes, args.fanout, num)
+            print(f"{name:<16}{num:>6}{elapsed:>10.2f}{args.nodes / elapsed:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Functions and data for timing the substitution of a compile command
+line with the strings compiled once into templates, against splitting
+them up with the regular expressions on every call as was done before.
+This was used to decide on the template cache in SCons/Subst.py.
+
+Run from this directory, so the SCons package above it is imported.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import SCons.Subst
+
+
+def clear_templates():
+    SCons.Subst._string_templates.clear()
+    SCons.Subst._list_templates.clear()
+
+def Func1(gvars, lvars):
+    """scons_subst_list, strings split on every call"""
+    for i in IterationList:
+        clear_templates()
+        SCons.Subst.scons_subst_list('$CCCOM', None, SCons.Subst.SUBST_CMD,
+                                     gvars=gvars, lvars=lvars)
+
+def Func2(gvars, lvars):
+    """scons_subst_list, compiled templates"""
+    for i in IterationList:
+        SCons.Subst.scons_subst_list('$CCCOM', None, SCons.Subst.SUBST_CMD,
+                                     gvars=gvars, lvars=lvars)
+
+def Func3(gvars, lvars):
+    """scons_subst, strings split on every call"""
+    for i in IterationList:
+        clear_templates()
+        SCons.Subst.scons_subst('$CCCOM', None, SCons.Subst.SUBST_SIG,
+                                gvars=gvars, lvars=lvars)
+
+def Func4(gvars, lvars):
+    """scons_subst, compiled templates"""
+    for i in IterationList:
+        SCons.Subst.scons_subst('$CCCOM', None, SCons.Subst.SUBST_SIG,
+                                gvars=gvars, lvars=lvars)
+
+
+# Data to pass to the functions on each run.  Each entry is a
+# three-element tuple:
+#
+#   (
+#       "Label to print describing this data run",
+#       ('positional', 'arguments'),
+#       {'keyword' : 'arguments'},
+#   ),
+
+gvars = {
+    'CC': 'gcc',
+    'CCCOM': '$CC -o $TARGET -c $CFLAGS $CCFLAGS $_CCCOMCOM $SOURCES',
+    '_CCCOMCOM': '$CPPFLAGS $_CPPDEFFLAGS $_CPPINCFLAGS',
+    'CFLAGS': '-std=c99',
+    'CCFLAGS': '-O2 -g -Wall',
+    'CPPFLAGS': '',
+    '_CPPDEFFLAGS': '-DNDEBUG -DHAVE_CONFIG_H',
+    '_CPPINCFLAGS': '-Iinclude -Ibuild/include',
+}
+
+lvars = {
+    'TARGET': 'build/foo.o',
+    'TARGETS': 'build/foo.o',
+    'SOURCE': 'src/foo.c',
+    'SOURCES': 'src/foo.c',
+}
+
+Data = [
+    (
+        "Compile command",
+        (gvars, lvars),
+        {},
+    ),
+    (
+        "Compile command, with $( $) in the flags",
+        (dict(gvars, CCFLAGS='-O2 $( -fdiagnostics-color $) -g'), lvars),
+        {},
+    ),
+]
+
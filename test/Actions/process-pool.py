@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Verify that Python function actions created with process_pool=True
+run in worker processes with --experimental=process_pool, and in the
+SCons process otherwise (or when they can't be pickled).
+"""
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.subdir('site_scons')
+
+test.write(['site_scons', 'pooled.py'], """\
+import os
+
+def cat(target, source, env):
+    with open(target[0], 'w') as f:
+        f.write(env['HEADER'] + '\\n')
+        for src in source:
+            with open(src) as ifp:
+                f.write(ifp.read())
+    with open(target[0] + '.pid', 'w') as f:
+        f.write(str(os.getpid()))
+""")
+
+test.write('SConstruct', """\
+import os
+import pooled
+DefaultEnvironment(tools=[])
+with open('scons.pid', 'w') as f:
+    f.write(str(os.getpid()))
+env = Environment(tools=[], HEADER=ARGUMENTS.get('HEADER', 'header'))
+pooled_cat = Action(pooled.cat, varlist=['HEADER'], process_pool=True)
+local_cat = Action(lambda target, source, env: pooled.cat(target, source, env),
+                   varlist=['HEADER'], process_pool=True)
+env.Append(BUILDERS={'PoolCat': Builder(action=pooled_cat),
+                     'LocalCat': Builder(action=local_cat)})
+env.PoolCat('aaa.out', 'aaa.in')
+env.PoolCat('bbb.out', 'bbb.in')
+env.LocalCat('ccc.out', 'ccc.in')
+""")
+
+test.write('aaa.in', "aaa.in\n")
+test.write('bbb.in', "bbb.in\n")
+test.write('ccc.in', "ccc.in\n")
+
+test.run(arguments='-j2 --experimental=process_pool .')
+
+test.must_match('aaa.out', "header\naaa.in\n")
+test.must_match('bbb.out', "header\nbbb.in\n")
+test.must_match('ccc.out', "header\nccc.in\n")
+scons_pid = test.read('scons.pid', 'r')
+test.fail_test(test.read('aaa.out.pid', 'r') == scons_pid)
+test.fail_test(test.read('bbb.out.pid', 'r') == scons_pid)
+test.must_match('ccc.out.pid', scons_pid)
+
+test.up_to_date(options='-j2 --experimental=process_pool', arguments='.')
+
+# a change to a variable in the varlist rebuilds the targets
+test.run(arguments='-j2 --experimental=process_pool HEADER=changed .')
+test.must_match('aaa.out', "changed\naaa.in\n")
+test.must_match('ccc.out', "changed\nccc.in\n")
+
+# without the experimental flag, everything runs in the SCons process
+test.run(arguments='-c .')
+test.run(arguments='-j2 .')
+scons_pid = test.read('scons.pid', 'r')
+test.must_match('aaa.out.pid', scons_pid)
+test.must_match('bbb.out.pid', scons_pid)
+test.must_match('aaa.out', "header\naaa.in\n")
+
+test.pass_test()
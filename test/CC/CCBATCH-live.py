@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+
+"""
+Test batching of C compiles with $CCBATCH and $CCBATCHSIZE.
+
+This is a live test, uses the detected C compiler.
+"""
+
+import sys
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+if sys.platform == 'win32':
+    test.skip_test("Batched compiles need a POSIX shell; skipping test.\n")
+
+test.subdir('src', 'inc')
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(
+    CCBATCH=1,
+    CCBATCHSIZE=3,
+    CPPPATH=['#inc'],
+    CCCOMSTR='Compiling $CHANGED_SOURCES',
+    LINKCOMSTR='Linking $TARGET',
+)
+VariantDir('build', 'src')
+env.Program('build/prog', ['build/main.c', 'build/f1.c', 'build/f2.c', 'build/f3.c'])
+env.Object('build/other', 'build/f4.c')
+""")
+
+test.write('inc/value.h', "#define VALUE 1\n")
+test.write(['src', 'main.c'], r"""
+#include <stdio.h>
+#include "value.h"
+
+extern int f1(void), f2(void), f3(void);
+
+int
+main(void)
+{
+        printf("%d\n", f1() + f2() + f3() + VALUE);
+        return 0;
+}
+""")
+for n in range(1, 5):
+    test.write(['src', f'f{n}.c'], f"""
+#include "value.h"
+int f{n}(void) {{ return {n} * VALUE; }}
+""")
+
+test.run(arguments='-Q .', stdout="""\
+Compiling build/main.c build/f1.c build/f2.c
+Compiling build/f3.c
+Compiling build/f4.c
+Linking build/prog
+""")
+test.run(program=test.workpath('build', 'prog'), stdout="7\n")
+test.must_exist(['build', 'other' + TestSCons._obj])
+
+test.up_to_date(arguments='.')
+
+# Only the sources that changed are compiled again.
+test.write(['src', 'f2.c'], """
+int f2(void) { return 5; }
+""")
+test.run(arguments='-Q .', stdout="""\
+Compiling build/f2.c
+Linking build/prog
+""")
+test.run(program=test.workpath('build', 'prog'), stdout="10\n")
+
+# f2.c no longer includes value.h, but the objects of a batch share
+# the dependencies found in all of its sources.
+test.write(['inc', 'value.h'], "#define VALUE 2\n")
+test.run(arguments='-Q .', stdout="""\
+Compiling build/main.c build/f1.c build/f2.c
+Compiling build/f3.c
+Compiling build/f4.c
+Linking build/prog
+""")
+test.run(program=test.workpath('build', 'prog'), stdout="15\n")
+
+# A relative path in the flags would be looked up in the object
+# directory, so such compiles are not batched.
+test.subdir('build2')
+test.write('SConstruct-include', """\
+DefaultEnvironment(tools=[])
+env = Environment(
+    CCBATCH=1,
+    CCFLAGS=['-include', 'inc/extra.h'],
+    CCCOMSTR='Compiling $CHANGED_SOURCES',
+)
+env.Object(['build2/g1.c', 'build2/g2.c'])
+""")
+test.write(['inc', 'extra.h'], "#define EXTRA 3\n")
+for n in range(1, 3):
+    test.write(['build2', f'g{n}.c'], f"int g{n}(void) {{ return EXTRA; }}\n")
+test.run(arguments='-Q -f SConstruct-include .', stdout="""\
+Compiling build2/g1.c
+Compiling build2/g2.c
+""")
+
+test.pass_test()
+
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Verify that a CacheDir set up to compress stores compressed entries,
+records the codec in its config and decompresses them on retrieval.
+"""
+
+import glob
+import json
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.CacheDir({'path': 'cache', 'compress': 'zlib'})
+env.Command('file.out', 'file.in', Copy('$TARGET', '$SOURCE'))
+""")
+
+contents = "file.in\n" * 10000
+test.write('file.in', contents)
+
+test.run(arguments='--cache-debug=- .')
+test.must_contain_all_lines(test.stdout(), ["compressing to"])
+with open(test.workpath('cache', 'config')) as f:
+    test.fail_test(json.load(f).get('codec') != 'zlib')
+cachefile = glob.glob('cache/??/*')[0]
+with open(cachefile, 'rb') as f:
+    test.fail_test(not f.read().startswith(b"\0SCons cache entry:zlib\n"))
+test.fail_test(len(test.read(cachefile)) > len(contents) // 10)
+
+test.run(arguments='-c .')
+test.must_not_exist('file.out')
+test.run(arguments='.')
+test.must_contain_all_lines(test.stdout(), ["Retrieved `file.out' from cache"])
+test.must_match('file.out', contents, mode='r')
+
+test.pass_test()
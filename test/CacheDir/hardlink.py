@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Verify a CacheDir which hard links files: targets share a read-only
+file with the cache entry, and rebuilding a target leaves the cache
+entry alone.
+"""
+
+import glob
+import os
+import sys
+
+import TestSCons
+
+if sys.platform == 'win32':
+    TestSCons.TestSCons().skip_test("No hard linked targets on Windows.\n")
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.CacheDir({'path': 'cache', 'link': 'hardlink'})
+env.Command('file.out', 'file.in', Copy('$TARGET', '$SOURCE'))
+""")
+
+test.write('file.in', "file.in 1\n")
+
+test.run(arguments='.')
+cachefile = glob.glob('cache/??/*')[0]
+if os.getuid() == 0:
+    # Read-only files do not stop root from changing the cache entry
+    # through the target, so the files are copied.
+    test.fail_test(os.path.samefile(cachefile, test.workpath('file.out')))
+    test.run(arguments='-c .')
+    test.run(arguments='.')
+    test.must_contain_all_lines(test.stdout(), ["Retrieved `file.out' from cache"])
+    test.fail_test(os.path.samefile(cachefile, test.workpath('file.out')))
+    test.pass_test()
+if not os.path.samefile(cachefile, test.workpath('file.out')):
+    # The filesystem may clone files instead.
+    test.skip_test("Files in the cache are not hard linked here.\n")
+test.fail_test(os.access(test.workpath('file.out'), os.W_OK))
+
+test.run(arguments='-c .')
+test.run(arguments='.')
+test.must_contain_all_lines(test.stdout(), ["Retrieved `file.out' from cache"])
+test.fail_test(not os.path.samefile(cachefile, test.workpath('file.out')))
+
+# The linked target is removed before it is rebuilt.
+test.write('file.in', "file.in 2\n")
+test.run(arguments='.')
+test.must_match('file.out', "file.in 2\n", mode='r')
+test.must_match(cachefile, "file.in 1\n", mode='r')
+
+test.pass_test()
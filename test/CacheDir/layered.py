@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Verify a layered CacheDir: files are pushed to every writable tier,
+retrieved from the shared tier when the local one misses, and then
+copied into the local tier.
+"""
+
+import glob
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.CacheDir(['local', 'shared'])
+env.Command('file.out', 'file.in', Copy('$TARGET', '$SOURCE'))
+""")
+
+test.write('file.in', "file.in\n")
+
+test.run(arguments='.')
+test.must_exist('file.out')
+test.fail_test(len(glob.glob('local/??/*')) != 1)
+test.fail_test(len(glob.glob('shared/??/*')) != 1)
+
+# A miss in the local tier is a hit in the shared one.
+test.run(arguments='-c .')
+test.must_not_exist('file.out')
+test.unlink(glob.glob('local/??/*')[0])
+
+test.run(arguments='--cache-debug=- .')
+test.must_contain_all_lines(test.stdout(), [
+    "Retrieved `file.out' from cache",
+    "in shared cache",
+])
+test.must_match('file.out', "file.in\n", mode='r')
+test.fail_test(len(glob.glob('local/??/*')) != 1)
+
+# Nothing is pushed to a read-only tier.
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.CacheDir(['local', {'path': 'ro', 'readonly': True}])
+env.Command('file2.out', 'file.in', Copy('$TARGET', '$SOURCE'))
+""")
+
+test.run(arguments='.')
+test.must_exist('file2.out')
+test.fail_test(len(glob.glob('local/??/*')) != 2)
+test.fail_test(glob.glob('ro/??/*'))
+
+test.pass_test()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Verify that a CacheDir with a size limit evicts the least recently
+used files to stay under it, and keeps the limit in its config,
+also after a build was killed while evicting.
+"""
+
+import glob
+import json
+import os
+import time
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.CacheDir({'path': 'cache', 'max_size': 2500})
+for i in range(4):
+    env.Command('file%d.out' % i, 'file%d.in' % i, Copy('$TARGET', '$SOURCE'))
+""")
+
+for i in range(4):
+    test.write('file%d.in' % i, "%d" % i * 1000)
+
+test.run(arguments='file0.out file1.out')
+test.fail_test(len(glob.glob('cache/??/*')) != 2)
+with open(test.workpath('cache', 'config')) as f:
+    test.fail_test(json.load(f).get('max_size') != 2500)
+
+test.run(arguments='.')
+test.fail_test(len(glob.glob('cache/??/*')) != 2)
+
+# The older files were evicted, the newer ones are retrieved.
+test.run(arguments='-c .')
+test.run(arguments='file2.out file3.out')
+test.must_contain_all_lines(test.stdout(), [
+    "Retrieved `file2.out' from cache",
+    "Retrieved `file3.out' from cache",
+])
+test.run(arguments='file0.out')
+test.must_contain_all_lines(test.stdout(), ['Copy("file0.out", "file0.in")'])
+
+# A build holding the eviction lock stops others from evicting...
+lockfile = test.workpath('cache', 'index.lock')
+test.write(lockfile, "")
+test.run(arguments='--cache-debug=- file1.out')
+test.must_contain_all_lines(test.stdout(), ['CacheDir eviction skipped'])
+test.fail_test(len(glob.glob('cache/??/*')) != 3)
+
+# ...but the lock left by a build killed while evicting is broken.
+stale = time.time() - 3600
+os.utime(lockfile, (stale, stale))
+test.write('file2.in', "x" * 1000)
+test.run(arguments='--cache-debug=- file2.out')
+test.must_contain_all_lines(test.stdout(), ['CacheDir broke stale eviction lock'])
+test.fail_test(len(glob.glob('cache/??/*')) != 2)
+test.must_not_exist(lockfile)
+
+test.pass_test()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Verify that the targets in the cache are retrieved before the build
+starts, and are still reported and recorded as retrieved.
+"""
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.CacheDir('cache')
+
+def check(target, source, env):
+    with open(str(target[0]), 'w') as f:
+        f.write("aaa.out exists: %s\\n" % env.fs.File('aaa.out').rexists())
+
+env.NoCache(env.Command('check.out', 'check.in', check))
+env.Command('aaa.out', 'aaa.in', Copy('$TARGET', '$SOURCE'))
+env.Command('all.out', 'aaa.out', Copy('$TARGET', '$SOURCE'))
+Default('check.out', 'all.out')
+""")
+
+test.write('check.in', "check.in\n")
+test.write('aaa.in', "aaa.in\n")
+
+test.run(arguments='-j1')
+test.must_match('check.out', "aaa.out exists: False\n", mode='r')
+
+test.run(arguments='-c .')
+test.run(arguments='-j1', stdout=test.wrap_stdout("""\
+check(["check.out"], ["check.in"])
+Retrieved `aaa.out' from cache
+Retrieved `all.out' from cache
+"""))
+# aaa.out was retrieved before check.out was built.
+test.must_match('check.out', "aaa.out exists: True\n", mode='r')
+test.must_match('all.out', "aaa.in\n", mode='r')
+test.up_to_date(arguments='.')
+
+test.pass_test()
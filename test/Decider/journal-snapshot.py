@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+
+"""
+Verify that builds using the content-timestamp-journal Decider() with
+a watch daemon running leave the project as it was for --graph-snapshot,
+so that the next null build can use the snapshot.
+"""
+
+import sys
+import time
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+if not sys.platform.startswith('linux'):
+    test.skip_test("--watch-daemon needs inotify; skipping test.\n")
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+print("reading SConstruct")
+env = Environment(tools=[])
+env.Decider('content-timestamp-journal')
+env.Command('aaa.out', 'aaa.in', Copy('$TARGET', '$SOURCE'))
+env.Command('bbb.out', Glob('*.in'), Copy('$TARGET', '${SOURCES[0]}'))
+""")
+
+test.write('aaa.in', "aaa.in 1\n")
+
+reading = "reading SConstruct\n"
+snapshot = "scons: SConscript files unchanged, using graph snapshot.\n"
+
+def build(expect_read):
+    # Mtimes have to move on for a changed file to be noticed.
+    time.sleep(0.01)
+    test.run(arguments='--graph-snapshot .')
+    if expect_read:
+        test.fail_test(reading not in test.stdout())
+        test.fail_test(snapshot in test.stdout())
+    else:
+        test.fail_test(reading in test.stdout())
+        test.fail_test(snapshot not in test.stdout())
+
+daemon = test.start(arguments='--watch-daemon')
+test.wait_for(test.workpath('.scons_journal', 'journal'), popen=daemon)
+
+build(True)
+test.must_match('aaa.out', "aaa.in 1\n")
+test.must_exist(['.scons_journal', 'marks'])
+build(False)
+build(False)
+
+test.write('aaa.in', "aaa.in 2\n")
+build(True)
+test.must_match('aaa.out', "aaa.in 2\n")
+build(False)
+
+daemon.terminate()
+test.finish(daemon)
+test.must_not_exist('.scons_journal')
+
+test.pass_test()
+
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Verify the content-timestamp-journal Decider() setting, with and
+without a watch daemon keeping the change journal.
+"""
+
+import sys
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+if not sys.platform.startswith('linux'):
+    test.skip_test("--watch-daemon needs inotify; skipping test.\n")
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+m = Environment(tools=[])
+m.Decider('content-timestamp-journal')
+m.Command('content1.out', 'content1.in', Copy('$TARGET', '$SOURCE'))
+m.Command('content2.out', 'content2.in', Copy('$TARGET', '$SOURCE'))
+m.Command('content3.out', 'content3.in', Copy('$TARGET', '$SOURCE'))
+""")
+
+test.write('content1.in', "content1.in 1\n")
+test.write('content2.in', "content2.in 1\n")
+test.write('content3.in', "content3.in 1\n")
+
+# Without a daemon, this works like content-timestamp.
+test.run(arguments='.')
+test.up_to_date(arguments='.')
+test.must_not_exist('.scons_journal')
+
+daemon = test.start(arguments='--watch-daemon')
+test.wait_for(test.workpath('.scons_journal', 'journal'), popen=daemon)
+
+# The first build of the session records what it sees, the next ones
+# take unchanged files from the records.
+test.up_to_date(arguments='.')
+test.must_exist(['.scons_journal', 'marks'])
+test.up_to_date(arguments='.')
+
+test.sleep()  # delay for timestamps
+test.write('content1.in', "content1.in 2\n")
+test.touch('content2.in')
+
+expect = test.wrap_stdout("""\
+Copy("content1.out", "content1.in")
+""")
+
+test.run(arguments='.', stdout=expect)
+test.must_match('content1.out', "content1.in 2\n")
+test.up_to_date(arguments='.')
+
+test.write('content3.in', "content3.in 2\n")
+
+expect = test.wrap_stdout("""\
+Copy("content3.out", "content3.in")
+""")
+
+test.run(arguments='.', stdout=expect)
+test.up_to_date(arguments='.')
+
+# A stopped daemon removes its journal; files are then checked as usual.
+daemon.terminate()
+test.finish(daemon)
+test.must_not_exist('.scons_journal')
+
+test.write('content2.in', "content2.in 2\n")
+
+expect = test.wrap_stdout("""\
+Copy("content2.out", "content2.in")
+""")
+
+test.run(arguments='.', stdout=expect)
+test.up_to_date(arguments='.')
+
+test.pass_test()
@@ -84,7 +84,8 @@ env = Environment(tools=['msvc', 'mslink'],
                   LINKCOM=linkcom,
                   PROGSUFFIX='.exe',
                   OBJSUFFIX='.obj',
-                  MSVC_BATCH=ARGUMENTS.get('MSVC_BATCH'))
+                  MSVC_BATCH=ARGUMENTS.get('MSVC_BATCH'),
+                  MSVC_BATCH_SIZE=ARGUMENTS.get('MSVC_BATCH_SIZE'))
 p = env.Object('prog.c')
 f1 = env.Object('f1.c')
 f2 = env.Object('f2.c')
@@ -145,4 +146,15 @@ test.must_match('fake_cl.log', """\
 /Fof1.obj f1.c
 """, mode='r')
 
+test.run(arguments='-c .')
+test.unlink('fake_cl.log')
+
+test.run(arguments='MSVC_BATCH=1 MSVC_BATCH_SIZE=2 .')
+test.must_match('prog.exe', "prog.c\nf1.c 3\nf2.c\n", mode='r')
+test.must_match('fake_cl.log', """\
+/Fo.%s prog.c f1.c
+/Fo.%s f2.c
+"""%(os.sep, os.sep), mode='r')
+test.up_to_date(options='MSVC_BATCH=1 MSVC_BATCH_SIZE=2', arguments='.')
+
 test.pass_test()
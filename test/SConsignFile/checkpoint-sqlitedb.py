@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+
+"""
+Verify that --sconsign-checkpoint also keeps the signatures of the
+targets built before a build is killed when the signature database is
+an SCons.sqlitedb one, whose connection the checkpoints use from their
+own thread.
+"""
+
+import sys
+
+import TestSCons
+
+if sys.platform == 'win32':
+    TestSCons.TestSCons().skip_test("Needs SIGKILL; skipping test.\n")
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """
+import os
+import signal
+import time
+
+import SCons.sqlitedb
+SConsignFile(dbm_module=SCons.sqlitedb)
+
+def die(target, source, env):
+    if os.path.exists('die'):
+        # Give the checkpointer time to write the first target.
+        time.sleep(3)
+        os.kill(os.getpid(), signal.SIGKILL)
+    Copy('$TARGET', '$SOURCE')(target, source, env)
+
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+a = env.Command('a.out', 'a.in', Copy('$TARGET', '$SOURCE'))
+b = env.Command('b.out', 'b.in', die)
+env.Depends(b, a)
+""")
+
+test.write('a.in', "a.in\n")
+test.write('b.in', "b.in\n")
+test.write('die', "")
+
+test.run(arguments='--sconsign-checkpoint=1 .', status=None, stderr=None)
+test.fail_test(test.status == 0)
+test.must_not_contain_any_line(test.stderr(), ['checkpoint'])
+test.must_match('a.out', "a.in\n")
+test.must_not_exist('b.out')
+
+test.unlink('die')
+test.run(arguments='.')
+test.must_not_contain_any_line(test.stdout(), ['Copy("a.out", "a.in")'])
+test.must_contain_all_lines(test.stdout(), ['die(["b.out"], ["b.in"])'])
+test.must_match('b.out', "b.in\n")
+test.up_to_date(arguments='.')
+
+test.must_exist(test.workpath(".sconsign.sqlite"))
+
+test.pass_test()
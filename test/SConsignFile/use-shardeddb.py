@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Verify SConsignFile() when used with SCons.shardeddb, and the
+--debug=time report of the shards synced.
+"""
+
+import os
+
+import TestSConsign
+
+test = TestSConsign.TestSConsign(match=TestSConsign.match_re)
+
+test.subdir('subdir')
+
+test.write('SConstruct', """
+import SCons.shardeddb
+SCons.shardeddb.SHARDS = 4
+SConsignFile(dbm_module=SCons.shardeddb)
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.Command('f1.out', 'f1.in', Copy('$TARGET', '$SOURCE'))
+env.Command('subdir/f2.out', 'subdir/f2.in', Copy('$TARGET', '$SOURCE'))
+""")
+
+test.write('f1.in', "f1.in\n")
+test.write(['subdir', 'f2.in'], "subdir/f2.in\n")
+
+test.run()
+
+database_name = test.get_sconsignname()
+shards = database_name + '.shards'
+test.must_exist(test.workpath(shards))
+test.must_not_exist(test.workpath(database_name + '.dblite'))
+test.must_not_exist(test.workpath('subdir', database_name))
+test.fail_test(sorted(os.listdir(test.workpath(shards))) !=
+               ['0.dblite', '1.dblite', '2.dblite', '3.dblite'])
+test.must_match('f1.out', "f1.in\n")
+test.must_match(['subdir', 'f2.out'], "subdir/f2.in\n")
+
+test.up_to_date(arguments='.')
+
+# Only the changed source is rebuilt, and only its shard is synced.
+test.write('f1.in', "f1.in 2\n")
+test.run(arguments='--debug=time .')
+shard_lines = [line for line in test.stdout().splitlines()
+               if line.startswith('SConsign shard sync time:')]
+test.fail_test(len(shard_lines) != 1, message=test.stdout())
+test.must_contain_all_lines(test.stdout(), ['Copy("f1.out", "f1.in")'])
+test.up_to_date(arguments='.')
+
+test.run_sconsign(arguments="-d . -e f1.out %s" % shards,
+                  stdout=r"""=== .:
+f1.out: \S+ \d+ \d+
+        f1.in: \S+ \d+ \d+
+        \S+ \[Copy\("\$TARGET", "\$SOURCE"\)\]
+""")
+
+test.pass_test()
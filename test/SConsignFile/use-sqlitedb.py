@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Verify SConsignFile() when used with SCons.sqlitedb, and converting
+the database with sconsign --convert.
+"""
+
+import TestSConsign
+
+test = TestSConsign.TestSConsign(match=TestSConsign.match_re)
+
+test.subdir('subdir')
+
+test.write('SConstruct', """
+import SCons.sqlitedb
+SConsignFile(dbm_module=SCons.sqlitedb)
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.Command('f1.out', 'f1.in', Copy('$TARGET', '$SOURCE'))
+env.Command('subdir/f2.out', 'subdir/f2.in', Copy('$TARGET', '$SOURCE'))
+""")
+
+test.write('f1.in', "f1.in\n")
+test.write(['subdir', 'f2.in'], "subdir/f2.in\n")
+
+test.run()
+
+database_name = test.get_sconsignname()
+test.must_exist(test.workpath(database_name + '.sqlite'))
+test.must_not_exist(test.workpath(database_name + '.dblite'))
+test.must_not_exist(test.workpath('subdir', database_name))
+test.must_match('f1.out', "f1.in\n")
+test.must_match(['subdir', 'f2.out'], "subdir/f2.in\n")
+
+test.up_to_date(arguments='.')
+
+# Only the changed source is rebuilt.
+test.write('f1.in', "f1.in 2\n")
+test.run(stdout=test.wrap_stdout('Copy("f1.out", "f1.in")\n'),
+         match=TestSConsign.match_exact)
+test.up_to_date(arguments='.')
+
+test.run_sconsign(arguments="-d . -e f1.out %s.sqlite" % database_name,
+                  stdout=r"""=== .:
+f1.out: \S+ \d+ \d+
+        f1.in: \S+ \d+ \d+
+        \S+ \[Copy\("\$TARGET", "\$SOURCE"\)\]
+""")
+
+# Convert to dblite and back: the build stays up to date.
+test.run_sconsign(arguments="--convert=dblite %s.sqlite" % database_name,
+                  stdout="sconsign: copied 2 directories from %s.sqlite\n"
+                         % database_name)
+test.must_exist(test.workpath(database_name + '.dblite'))
+test.unlink(database_name + '.sqlite')
+test.run_sconsign(arguments="--convert=sqlite %s.dblite" % database_name,
+                  stdout="sconsign: copied 2 directories from %s.dblite\n"
+                         % database_name)
+test.up_to_date(arguments='.')
+
+test.pass_test()
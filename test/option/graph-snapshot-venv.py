@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+"""
+Verify that --graph-snapshot notices a change to a module installed in
+the site-packages of a virtual environment which an SConscript file
+imports.
+"""
+
+import os
+import subprocess
+import time
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+try:
+    subprocess.run([TestSCons.python, '-m', 'venv', '--without-pip',
+                    test.workpath('venv')], check=True)
+except (OSError, subprocess.CalledProcessError):
+    test.skip_test("Could not create a virtual environment; skipping test.\n")
+
+python = test.workpath('venv', 'bin', 'python')
+if not os.path.exists(python):
+    python = test.workpath('venv', 'Scripts', 'python.exe')
+purelib = subprocess.run(
+    [python, '-c', "import sysconfig; print(sysconfig.get_paths()['purelib'])"],
+    stdout=subprocess.PIPE, universal_newlines=True, check=True,
+).stdout.strip()
+
+test.write(os.path.join(purelib, 'venvhelper.py'), """\
+MESSAGE = 'one'
+""")
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+import venvhelper
+print("message " + venvhelper.MESSAGE)
+env = Environment(tools=[])
+env.Command('aaa.out', 'aaa.in', Copy('$TARGET', '$SOURCE'))
+""")
+
+test.write('aaa.in', "aaa.in\n")
+
+snapshot = "scons: SConscript files unchanged, using graph snapshot.\n"
+
+def build(message):
+    # Mtimes have to move on for a changed file to be noticed.
+    time.sleep(0.01)
+    test.run(arguments='--graph-snapshot .', interpreter=python)
+    if message:
+        test.must_contain_all_lines(test.stdout(), ["message " + message])
+        test.fail_test(snapshot in test.stdout())
+    else:
+        test.fail_test(snapshot not in test.stdout())
+
+build('one')
+build(None)
+
+test.write(os.path.join(purelib, 'venvhelper.py'), """\
+MESSAGE = 'two'
+""")
+build('two')
+build(None)
+
+test.pass_test()
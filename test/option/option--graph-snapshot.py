@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Verify that --graph-snapshot skips reading the SConscript files when
+a null build is known to be up to date, and that changes to sources,
+SConscript files, site_scons or the command line force a normal build.
+"""
+
+import time
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.subdir('sub', 'site_scons')
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+import helper
+print("reading SConstruct")
+env = Environment(tools=[], BUILDERS={'Cat': Builder(action=helper.cat)})
+env.Cat('aaa.out', 'aaa.in')
+env.Cat('all', ['aaa.out'] + Glob('sub/*.in'))
+SConscript('sub/SConscript', exports='env')
+""")
+
+test.write(['sub', 'SConscript'], """\
+Import('env')
+env.Cat('bbb.out', 'bbb.in')
+""")
+
+test.write(['site_scons', 'helper.py'], """\
+def cat(env, source, target):
+    with open(str(target[0]), "w") as f:
+        for src in source:
+            with open(str(src)) as ifp:
+                f.write(ifp.read())
+""")
+
+test.write('aaa.in', "aaa.in\n")
+test.write(['sub', 'bbb.in'], "bbb.in\n")
+test.write(['sub', 'ccc.in'], "ccc.in\n")
+
+reading = "reading SConstruct\n"
+snapshot = "scons: SConscript files unchanged, using graph snapshot.\n"
+
+def build(expect_read, arguments='--graph-snapshot .'):
+    # Mtimes have to move on for a changed file to be noticed.
+    time.sleep(0.01)
+    test.run(arguments=arguments)
+    if expect_read:
+        test.fail_test(reading not in test.stdout())
+        test.fail_test(snapshot in test.stdout())
+    else:
+        test.fail_test(reading in test.stdout())
+        test.fail_test(snapshot not in test.stdout())
+        test.must_contain_all_lines(test.stdout(), ["scons: `.' is up to date."])
+
+build(True)
+test.must_match('all', "aaa.in\nbbb.in\nccc.in\n")
+test.must_exist('.scons_snapshot')
+
+build(False)
+build(False)
+
+# a changed source
+test.write('aaa.in', "aaa.in 2\n")
+build(True)
+test.must_match('all', "aaa.in 2\nbbb.in\nccc.in\n")
+build(False)
+
+# a new file picked up by Glob
+test.write(['sub', 'ddd.in'], "ddd.in\n")
+build(True)
+test.must_match('all', "aaa.in 2\nbbb.in\nccc.in\nddd.in\n")
+build(False)
+
+# a changed SConscript file
+test.write(['sub', 'SConscript'], """\
+Import('env')
+env.Cat('bbb.out', 'bbb.in')
+env.Cat('eee.out', 'bbb.in')
+""")
+build(True)
+test.must_exist(['sub', 'eee.out'])
+build(False)
+
+# a changed module in site_scons
+test.write(['site_scons', 'helper.py'], """\
+def cat(env, source, target):
+    with open(str(target[0]), "w") as f:
+        for src in source:
+            with open(str(src)) as ifp:
+                f.write(ifp.read().upper())
+""")
+build(True)
+build(False)
+
+# a removed target
+test.unlink('all')
+build(True)
+test.must_match('all', "AAA.IN 2\nBBB.IN\nCCC.IN\nDDD.IN\n")
+build(False)
+
+# different command-line arguments
+build(True, arguments='--graph-snapshot FOO=1 .')
+build(False, arguments='--graph-snapshot FOO=1 .')
+build(True, arguments='--graph-snapshot .')
+
+# without the option, the snapshot is not used
+test.run(arguments='.')
+test.fail_test(reading not in test.stdout())
+
+# a build that cannot be a null build leaves no snapshot
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+print("reading SConstruct")
+env = Environment(tools=[])
+AlwaysBuild(env.Command('always.out', [], Touch('$TARGET')))
+""")
+build(True)
+test.must_not_exist('.scons_snapshot')
+build(True)
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
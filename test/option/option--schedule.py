@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Verify that we build correctly using the --schedule option,
+and that build durations are recorded for the critical-path mode.
+"""
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+def cat(env, source, target):
+    with open(target[0], "wb") as f:
+        for src in source:
+            with open(src, "rb") as ifp:
+                f.write(ifp.read())
+env = Environment(tools=[], BUILDERS={'Cat': Builder(action=cat)})
+env.Cat('aaa.out', 'aaa.in')
+env.Cat('bbb.1', 'bbb.in')
+env.Cat('bbb.2', 'bbb.1')
+env.Cat('bbb.out', 'bbb.2')
+env.Cat('all', ['aaa.out', 'bbb.out'])
+""")
+
+test.write('aaa.in', "aaa.in\n")
+test.write('bbb.in', "bbb.in\n")
+
+test.run(arguments='-Q -j2 --schedule=critical-path .')
+test.must_match('all', "aaa.in\nbbb.in\n")
+
+test.run(arguments='-Q -j2 --schedule=critical-path .')
+test.must_contain_all_lines(test.stdout(), ["`.' is up to date."])
+
+# the build time of each target ends up in the stored build info
+test.write('check.py', """\
+import SCons.SConsign
+import SCons.dblite
+db = SCons.dblite.open('.sconsign')
+entries = SCons.SConsign.decode_entries(db['.'])
+for name in ('aaa.out', 'bbb.1', 'bbb.2', 'bbb.out', 'all'):
+    assert entries[name].binfo.bduration >= 0.0, name
+print("durations recorded")
+""")
+test.run(program=TestSCons.python,
+         arguments='check.py',
+         stdout="durations recorded\n")
+
+test.run(arguments='-c -Q .')
+test.run(arguments='-Q -j2 --schedule=default .')
+test.must_match('all', "aaa.in\nbbb.in\n")
+
+expect = r"""usage: scons [OPTIONS] [VARIABLES] [TARGETS]
+
+SCons Error: `nonsense' is not a valid schedule option type, try:
+    default, critical-path
+"""
+test.run(arguments='--schedule=nonsense .', status=2, stderr=expect)
+
+test.pass_test()
@@ -23,16 +23,72 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+"""
+Test the -l (--load-average, --max-load) option, and the holding back
+of parallel jobs by the JOB_MEMORY construction variable.
+"""
+
+import sys
+
 import TestSCons
 
 test = TestSCons.TestSCons()
 
-test.write('SConstruct', "")
+# Each build step records the most jobs that were running at once.
+test.write('SConstruct', """\
+import threading
+import time
+
+DefaultEnvironment(tools=[])
+lock = threading.Lock()
+running = [0, 0]
+
+def build(target, source, env):
+    with lock:
+        running[0] += 1
+        running[1] = max(running)
+    time.sleep(0.5)
+    with lock:
+        running[0] -= 1
+    with open(str(target[0]), 'w') as f:
+        f.write('%d\\n' % running[1])
 
-test.option_not_yet_implemented('-l', '1 .')
+env = Environment(tools=[], BUILDERS={'B': Builder(action=build)})
+if ARGUMENTS.get('memory'):
+    env['JOB_MEMORY'] = {'B': int(ARGUMENTS['memory'])}
+print('load_average: %s' % GetOption('load_average'))
+for i in range(4):
+    env.B('f%d.out' % i, 'f%d.in' % i)
+""")
 
-test.option_not_yet_implemented('--load-average', '=1 .')
+for i in range(4):
+    test.write('f%d.in' % i, 'f%d.in\n' % i)
 
-test.option_not_yet_implemented('--max-load', '=1 .')
+for opt in ('-l 4.5', '--load-average=4.5', '--max-load=4.5'):
+    test.run(arguments='-Q -n %s .' % opt)
+    test.must_contain_all_lines(test.stdout(), ['load_average: 4.5'])
+
+test.run(arguments='-Q -l 1000 -j 4 .')
+test.must_contain_all_lines(test.stdout(), ['load_average: 1000.0'])
+test.must_exist(*['f%d.out' % i for i in range(4)])
+test.run(arguments='-c .')
+
+if sys.platform.startswith('linux'):
+    # No job fits in memory next to another, so they run one at a time.
+    test.run(arguments='-Q -j 4 memory=100000000 .')
+    for i in range(4):
+        test.must_match('f%d.out' % i, '1\n')
+    test.run(arguments='-c .')
+
+    # A tiny load limit can't be met, so again one job at a time.
+    test.run(arguments='-Q -j 4 -l 0.0001 .')
+    for i in range(4):
+        test.must_match('f%d.out' % i, '1\n')
 
 test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4: